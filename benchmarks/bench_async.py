@@ -0,0 +1,98 @@
+"""Concurrent throughput of the sync (thread per command) and async pipelines.
+
+Runs JiraAgent against a local fake Ollama server with a fixed per-request
+latency and reports commands/second at each concurrency level.
+
+    python -m benchmarks.bench_async --latency 0.2 --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeLLMServer
+
+
+def command_for(i: int) -> str:
+    # Distinct text per request so the response cache cannot short-circuit the LLM
+    return f"We need someone to look at benchmark problem {i} in TEST"
+
+
+def build_agent(llm_url: str):
+    # Jira is not under test here: the in-memory backend in dry-run mode keeps
+    # the measurement on the LLM path, and the fast path is off so every
+    # command reaches it.
+    os.environ.update({
+        "OLLAMA_HOST": llm_url,
+        "LLM_PROVIDER": "deepseek",
+        "JIRA_BACKEND": "memory",
+        "FAST_PATH_PARSER": "false",
+        "LLM_CACHE_SIZE": "0",
+        "LLM_CACHE_PATH": "",
+    })
+    from src.main import JiraAgent
+    agent = JiraAgent(dry_run=True)
+    agent.warmup()
+    return agent
+
+
+def failures(results: list) -> int:
+    return sum(1 for result in results if "Would create" not in result)
+
+
+def run_sync(agent, concurrency: int, total: int, offset: int = 0):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(agent.process_command, map(command_for, range(offset, offset + total))))
+    return time.perf_counter() - start, failures(results)
+
+
+def run_async(agent, concurrency: int, total: int, offset: int = 0):
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                return await agent.aprocess_command(command_for(i))
+
+        # Fresh client per run: the async client binds to the running loop
+        agent.llm._async_client = None
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(offset, offset + total)))
+        return time.perf_counter() - start, failures(results)
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--requests-per-level", type=int, default=None,
+                        help="commands per level (default: 4x concurrency)")
+    args = parser.parse_args()
+
+    with FakeLLMServer(latency=args.latency) as server:
+        agent = build_agent(server.url)
+        rows = []
+        offset = 0
+        for concurrency in args.concurrency:
+            total = args.requests_per_level or concurrency * 4
+            for mode, runner in (("sync", run_sync), ("async", run_async)):
+                elapsed, errors = runner(agent, concurrency, total, offset)
+                offset += total
+                rows.append({
+                    "mode": mode,
+                    "concurrency": concurrency,
+                    "requests": total,
+                    "errors": errors,
+                    "seconds": round(elapsed, 3),
+                    "throughput": round(total / elapsed, 2),
+                })
+                print(json.dumps(rows[-1]))
+
+
+if __name__ == "__main__":
+    main()
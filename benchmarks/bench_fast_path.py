@@ -0,0 +1,83 @@
+"""Latency of the rule-based fast path versus the LLM path.
+
+Replays a command mix (some matching the src/fast_path.py grammar, some
+free-form) through JiraAgent.process_command against a local fake Ollama
+server, once with the fast path enabled and once without, and reports
+per-path latency and the fast-path hit rate.
+
+    python -m benchmarks.bench_fast_path --llm-latency 0.5 --rounds 5
+"""
+import argparse
+import json
+import os
+import time
+from unittest.mock import Mock, patch
+
+from benchmarks.e2e import percentile
+from benchmarks.fakes import FakeLLMServer
+
+COMMANDS = [
+    ("fast", "create task in TEST: Renew TLS certificate"),
+    ("fast", "add a ticket for project TEST - Rotate API keys"),
+    ("fast", "TEST:\n- Patch kernel on build hosts\n- Update base images\n- Clean old artifacts"),
+    ("llm", "We need someone to look at the flaky login test in TEST"),
+    ("llm", "Open an issue about slow dashboards for the TEST team"),
+]
+
+
+def build_agent(llm_url: str):
+    os.environ["OLLAMA_HOST"] = llm_url
+    os.environ["LLM_PROVIDER"] = "deepseek"
+    os.environ["LLM_CACHE_SIZE"] = "0"
+    os.environ["LLM_CACHE_PATH"] = ""
+    with patch("src.main.JIRA") as mock_jira:
+        project = Mock()
+        project.key = "TEST"
+        mock_jira.return_value.projects.return_value = [project]
+        from src.main import JiraAgent
+        agent = JiraAgent(dry_run=True)
+        agent.warmup()
+        return agent
+
+
+def measure(agent, rounds: int) -> dict:
+    latencies = {"fast": [], "llm": []}
+    for _ in range(rounds):
+        for kind, command in COMMANDS:
+            start = time.perf_counter()
+            agent.process_command(command)
+            latencies[kind].append(time.perf_counter() - start)
+    return latencies
+
+
+def summary(latencies: list) -> dict:
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="fake LLM latency in seconds")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with FakeLLMServer(latency=args.llm_latency) as llm:
+        agent = build_agent(llm.url)
+        enabled = measure(agent, args.rounds)
+        stats = agent.fast_path.stats()
+        agent.fast_path = None
+        disabled = measure(agent, args.rounds)
+
+    for kind in ("fast", "llm"):
+        print(json.dumps({
+            "commands": kind,
+            "fast_path_on": summary(enabled[kind]),
+            "fast_path_off": summary(disabled[kind]),
+        }))
+    print(json.dumps({"fast_path": stats}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Safety policy cost on multi-kilobyte commands and large rule sets.
+
+Compares the original substring loop (one `in` test per keyword) against
+src/policy.py's compiled Policy.match at several command sizes and rule
+counts; the per-KB column should stay flat as either grows. The
+"hostile" rows run a backtracking pattern the loader still accepts
+("[a-z]+;") against input built to make it fail slowly.
+
+    python -m benchmarks.bench_policy --sizes 1 8 64 --keywords 5 500 5000 --patterns 20
+"""
+import argparse
+import json
+import timeit
+
+from src.policy import DEFAULT_KEYWORDS, Policy
+
+TEXT = ("Please create tickets for the flaky login test, the slow dashboard queries "
+        "and the broken nightly export job in TEST. ")
+
+
+def make_patterns(count: int) -> list:
+    return [rf"\bsecret-{i:02d}[0-9a-f]{{8}}\b" for i in range(count)]
+
+
+def make_command(kilobytes: int) -> str:
+    return (TEXT * (kilobytes * 1024 // len(TEXT) + 1))[:kilobytes * 1024]
+
+
+def make_keywords(count: int) -> list:
+    keywords = list(DEFAULT_KEYWORDS)
+    keywords += [f"forbidden{i}" for i in range(count - len(keywords))]
+    return keywords[:count]
+
+
+HOSTILE_PATTERN = r"[a-z]+;"
+
+
+def substring_loop(keywords: list):
+    lowered = [keyword.rstrip("*") for keyword in keywords]
+
+    def check(command: str) -> bool:
+        text = command.lower()
+        return any(keyword in text for keyword in lowered)
+    return check
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 8, 64], help="command sizes in KB")
+    parser.add_argument("--keywords", type=int, nargs="+", default=[5, 500, 5000])
+    parser.add_argument("--patterns", type=int, default=20, help="regex rules added to every rule set")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for count in args.keywords:
+        keywords = make_keywords(count)
+        policy = Policy(keywords=keywords, patterns=make_patterns(args.patterns))
+        for size in args.sizes:
+            command = make_command(size)
+            number = max(1, 200 // size)
+            for name, fn in (("substring_loop", substring_loop(keywords)), ("policy", policy.match)):
+                best = min(timeit.repeat(lambda: fn(command), number=number, repeat=args.repeat))
+                print(json.dumps({
+                    "impl": name,
+                    "keywords": count,
+                    "patterns": args.patterns,
+                    "command_kb": size,
+                    "us_per_check": round(best / number * 1e6, 2),
+                    "us_per_kb": round(best / number / size * 1e6, 3),
+                }))
+
+    hostile = Policy(keywords=(), patterns=[HOSTILE_PATTERN])
+    for size in args.sizes:
+        command = "a" * size * 1024
+        best = min(timeit.repeat(lambda: hostile.match(command), number=1, repeat=args.repeat))
+        print(json.dumps({
+            "impl": "policy_hostile",
+            "pattern": HOSTILE_PATTERN,
+            "command_kb": size,
+            "us_per_check": round(best * 1e6, 2),
+            "us_per_kb": round(best / size * 1e6, 3),
+        }))
+
+
+if __name__ == "__main__":
+    main()
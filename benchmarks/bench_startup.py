@@ -0,0 +1,62 @@
+"""Cold-start time for the agent and the web app.
+
+Each sample runs in a fresh interpreter with Jira and Ollama pointed at
+unreachable addresses, so any network access at startup shows up as time.
+
+    python -m benchmarks.bench_startup --samples 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("jira", "openai", "ollama", "jsonschema") if m in sys.modules]
+print(json.dumps({{"ms": elapsed * 1000, "heavy_imports": heavy}}))
+"""
+
+TARGETS = {
+    "agent": "from src.main import JiraAgent\nJiraAgent()",
+    "web_app": "import src.web.app",
+}
+
+
+def sample(body: str) -> dict:
+    env = dict(
+        os.environ,
+        JIRA_SERVER="http://127.0.0.1:9",
+        OLLAMA_HOST="http://127.0.0.1:9",
+        PYTHONPATH=os.getcwd(),
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(body=body)],
+        capture_output=True, text=True, env=env, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, body in TARGETS.items():
+        runs = [sample(body) for _ in range(args.samples)]
+        times = [run["ms"] for run in runs]
+        print(json.dumps({
+            "target": name,
+            "samples": args.samples,
+            "median_ms": round(statistics.median(times), 1),
+            "max_ms": round(max(times), 1),
+            "heavy_imports": runs[-1]["heavy_imports"],
+        }))
+
+
+if __name__ == "__main__":
+    main()
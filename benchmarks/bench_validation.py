@@ -0,0 +1,57 @@
+"""Microbenchmark for action validation at 1, 50 and 500 actions per reply.
+
+Compares per-call jsonschema.validate() (the original implementation)
+against the precompiled validator, with and without the batch API.
+
+    python -m benchmarks.bench_validation
+"""
+import argparse
+import json
+import timeit
+
+from jsonschema import validate
+
+from src.schemas import ACTION_SCHEMA, validate_action, validate_actions
+
+
+def make_actions(count: int) -> list:
+    return [
+        {"action": "create_issue", "project": "TEST", "summary": f"Benchmark issue {i}",
+         "description": "Generated by the validation benchmark"}
+        for i in range(count)
+    ]
+
+
+def per_call_jsonschema(actions):
+    for action in actions:
+        validate(instance=action, schema=ACTION_SCHEMA)
+
+
+def per_call_compiled(actions):
+    for action in actions:
+        validate_action(action)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        actions = make_actions(size)
+        number = max(1, 2000 // size)
+        for name, fn in (("jsonschema.validate", per_call_jsonschema),
+                         ("validate_action", per_call_compiled),
+                         ("validate_actions", validate_actions)):
+            best = min(timeit.repeat(lambda: fn(actions), number=number, repeat=args.repeat))
+            print(json.dumps({
+                "impl": name,
+                "actions": size,
+                "us_per_batch": round(best / number * 1e6, 2),
+                "us_per_action": round(best / number / size * 1e6, 3),
+            }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""End-to-end latency and throughput against local Jira and LLM stand-ins.
+
+Starts a fake Jira REST server and a fake Ollama/OpenAI server, then drives
+JiraAgent.process_command directly and the FastAPI /command endpoint over
+HTTP at each concurrency level. Writes a JSON report that can be compared
+with one from another commit:
+
+    python -m benchmarks.e2e --concurrency 1 4 16 --output report.json
+    python -m benchmarks.e2e --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeJiraServer, FakeLLMServer
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(target: str, concurrency: int, latencies: list, errors: int, elapsed: float) -> dict:
+    total = len(latencies)
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def run_level(call, concurrency: int, total: int):
+    """Run `call(i)` `total` times on `concurrency` threads; return latencies, errors, wall time"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        start = time.perf_counter()
+        ok = call(i)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def command_for(i: int) -> str:
+    # Distinct text per request so the response cache cannot short-circuit the LLM
+    return f"Create a benchmark issue in TEST number {i}"
+
+
+def succeeded(result: str) -> bool:
+    return "Issue created" in result and "Issue failed" not in result
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_web_app(max_concurrency: int):
+    import uvicorn
+    os.environ["COMMAND_WORKERS"] = str(max_concurrency)
+    os.environ["COMMAND_QUEUE_LIMIT"] = str(max_concurrency)
+    from src.web.app import app
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(report: dict, baseline: dict):
+    previous = {(r["target"], r["concurrency"]): r for r in baseline["results"]}
+    for row in report["results"]:
+        base = previous.get((row["target"], row["concurrency"]))
+        if base is None:
+            continue
+        print(json.dumps({
+            "target": row["target"],
+            "concurrency": row["concurrency"],
+            "p95_ms_delta": round(row["p95_ms"] - base["p95_ms"], 2),
+            "throughput_rps_delta": round(row["throughput_rps"] - base["throughput_rps"], 2),
+            "throughput_ratio": round(row["throughput_rps"] / base["throughput_rps"], 3) if base["throughput_rps"] else None,
+        }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests-per-level", type=int, default=None,
+                        help="requests per level (default: 4x concurrency, at least 20)")
+    parser.add_argument("--targets", nargs="+", choices=["agent", "http"], default=["agent", "http"])
+    parser.add_argument("--provider", choices=["deepseek", "openai"], default="deepseek")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--jira-latency", type=float, default=0.01)
+    parser.add_argument("--jira-error-rate", type=float, default=0.0)
+    parser.add_argument("--jira-error-status", type=int, default=400,
+                        help="status for injected Jira failures (5xx are retried by the jira client)")
+    parser.add_argument("--jira-backend", choices=["http", "memory"], default="http",
+                        help="fake REST server, or the in-process InMemoryJira (no network)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline report to diff against")
+    args = parser.parse_args()
+
+    llm = FakeLLMServer(latency=args.llm_latency, error_rate=args.llm_error_rate, seed=args.seed).start()
+    if args.jira_backend == "memory":
+        jira = None
+        os.environ.update({
+            "JIRA_BACKEND": "memory",
+            "JIRA_MEMORY_LATENCY": str(args.jira_latency),
+            "JIRA_MEMORY_FAILURE_RATE": str(args.jira_error_rate),
+            "JIRA_MEMORY_SEED": str(args.seed),
+        })
+    else:
+        jira = FakeJiraServer(latency=args.jira_latency, error_rate=args.jira_error_rate,
+                              error_status=args.jira_error_status, seed=args.seed).start()
+        os.environ.update({"JIRA_SERVER": jira.url, "JIRA_USER": "bench", "JIRA_TOKEN": "bench"})
+    os.environ.update({
+        "OLLAMA_HOST": llm.url,
+        "OPENAI_BASE_URL": f"{llm.url}/v1",
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "bench"),
+        "OPENAI_MODEL": os.getenv("OPENAI_MODEL", "gpt-4"),
+        "LLM_PROVIDER": args.provider,
+        "LLM_CACHE_SIZE": "0",
+        "LLM_CACHE_PATH": "",
+        "DRY_RUN": "false",
+    })
+
+    results = []
+    try:
+        if "agent" in args.targets:
+            from src.main import JiraAgent
+            agent = JiraAgent()
+            agent.warmup()
+            for concurrency in args.concurrency:
+                total = args.requests_per_level or max(20, concurrency * 4)
+                latencies, errors, elapsed = run_level(
+                    lambda i: succeeded(agent.process_command(command_for(i))), concurrency, total
+                )
+                results.append(summarize("agent", concurrency, latencies, errors, elapsed))
+                print(json.dumps(results[-1]))
+
+        if "http" in args.targets:
+            import httpx
+            server, base_url = start_web_app(max(args.concurrency))
+            client = httpx.Client(base_url=base_url, timeout=60,
+                                  limits=httpx.Limits(max_connections=max(args.concurrency)))
+            while client.get("/ready").status_code != 200:
+                time.sleep(0.05)
+
+            def post(i):
+                response = client.post("/command", data={"command": command_for(i)})
+                return response.status_code == 200 and response.json().get("success") and succeeded(response.json()["result"])
+
+            try:
+                for concurrency in args.concurrency:
+                    total = args.requests_per_level or max(20, concurrency * 4)
+                    latencies, errors, elapsed = run_level(post, concurrency, total)
+                    results.append(summarize("http", concurrency, latencies, errors, elapsed))
+                    print(json.dumps(results[-1]))
+            finally:
+                client.close()
+                server.should_exit = True
+    finally:
+        llm.stop()
+        if jira is not None:
+            jira.stop()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            "jira_server": jira.stats() if jira is not None else None,
+            "llm_server": llm.stats(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Local HTTP stand-ins for Jira, Ollama and OpenAI used by the benchmarks.
+
+Each server answers after a configurable latency and fails a configurable
+fraction of requests, so client behaviour can be measured without any
+external service.
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = """<think>Creating benchmark issue</think>
+<answer>{"action": "create_issues", "issues": [{"project": "TEST", "summary": "Benchmark issue"}]}</answer>"""
+
+
+class FakeServer:
+    """Threaded HTTP server with latency and error injection.
+
+    Subclasses implement `route(method, path, body)` returning
+    `(status, payload)`; payload is sent as JSON.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, error_status: int = 500,
+                 host: str = "127.0.0.1", port: int = 0, seed: int = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors}
+
+    def route(self, method: str, path: str, body: dict):
+        raise NotImplementedError
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                return True
+            return False
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without this, Nagle
+            # plus delayed ACKs add ~40 ms to every keep-alive response
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _dispatch(self, method: str):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else {}
+                if server.latency:
+                    time.sleep(server.latency)
+                if server._should_fail():
+                    status, payload = server.error_status, {"errorMessages": ["injected failure"]}
+                else:
+                    status, payload = server.route(method, self.path.split("?")[0], body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+        return Handler
+
+
+class FakeLLMServer(FakeServer):
+    """Stand-in for the Ollama and OpenAI chat APIs answering with `reply`"""
+
+    def __init__(self, reply: str = DEFAULT_REPLY, models: tuple = ("deepseek-r1:14b",), **kwargs):
+        super().__init__(**kwargs)
+        self.reply = reply
+        self.models = list(models)
+
+    def route(self, method: str, path: str, body: dict):
+        if method == "GET" and path == "/api/tags":
+            return 200, {"models": [{"model": m, "name": m} for m in self.models]}
+        if method == "POST" and path == "/api/chat":
+            return 200, {
+                "model": body.get("model"),
+                "created_at": "2024-01-01T00:00:00Z",
+                "message": {"role": "assistant", "content": self.reply},
+                "done": True,
+            }
+        if method == "POST" and path.endswith("/chat/completions"):
+            return 200, {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": self.reply},
+                }],
+            }
+        return 404, {"error": "not found"}
+
+
+class FakeJiraServer(FakeServer):
+    """Stand-in for the subset of the Jira REST API the agent uses"""
+
+    _PROJECT = re.compile(r"^/rest/api/2/project/([^/]+)$")
+    _ISSUE = re.compile(r"^/rest/api/2/issue/([A-Z][A-Z0-9]*-\d+)$")
+    _CREATEMETA = re.compile(r"^/rest/api/2/issue/createmeta/([^/]+)/issuetypes(?:/([^/]+))?$")
+    _FIELDS = [
+        {"fieldId": "summary", "name": "Summary", "required": True, "schema": {"type": "string"}},
+        {"fieldId": "issuetype", "name": "Issue Type", "required": True, "schema": {"type": "issuetype"}},
+        {"fieldId": "description", "name": "Description", "required": False, "schema": {"type": "string"}},
+        {"fieldId": "priority", "name": "Priority", "required": False, "hasDefaultValue": True,
+         "schema": {"type": "priority"}, "allowedValues": [{"id": "1", "name": "High"}, {"id": "2", "name": "Low"}]},
+        {"fieldId": "labels", "name": "Labels", "required": False, "schema": {"type": "array", "items": "string"}},
+    ]
+
+    def __init__(self, projects: tuple = ("TEST",), **kwargs):
+        super().__init__(**kwargs)
+        self.projects = {
+            key: {"id": str(10000 + i), "key": key, "name": key, "self": f"/rest/api/2/project/{10000 + i}"}
+            for i, key in enumerate(projects)
+        }
+        self.issues = {}
+        self._counter = 0
+
+    def route(self, method: str, path: str, body: dict):
+        if method == "GET":
+            if path == "/rest/api/2/serverInfo":
+                return 200, {
+                    "baseUrl": self.url, "version": "9.0.0", "versionNumbers": [9, 0, 0],
+                    "deploymentType": "Server", "buildNumber": 1, "serverTitle": "Fake Jira",
+                }
+            if path == "/rest/api/2/project":
+                return 200, list(self.projects.values())
+            match = self._PROJECT.match(path)
+            if match:
+                project = self._find_project({"key": match.group(1)}) or self._find_project({"id": match.group(1)})
+                return (200, project) if project else (404, {"errorMessages": ["No project"]})
+            match = self._CREATEMETA.match(path)
+            if match:
+                values = self._FIELDS if match.group(2) else [{"id": "10001", "name": "Task", "subtask": False}]
+                return 200, {"startAt": 0, "maxResults": 50, "total": len(values), "isLast": True, "values": values}
+            match = self._ISSUE.match(path)
+            if match and match.group(1) in self.issues:
+                return 200, self.issues[match.group(1)]
+        if method == "POST":
+            if path == "/rest/api/2/issue":
+                return self._create(body.get("fields", {}))
+            if path == "/rest/api/2/issue/bulk":
+                issues, errors = [], []
+                for index, update in enumerate(body.get("issueUpdates", [])):
+                    status, payload = self._create(update.get("fields", {}))
+                    if status == 201:
+                        issues.append(payload)
+                    else:
+                        errors.append({"failedElementNumber": index, "elementErrors": payload, "status": status})
+                return (201 if issues or not errors else 400), {"issues": issues, "errors": errors}
+        return 404, {"errorMessages": [f"{method} {path} not implemented"]}
+
+    def _find_project(self, ref: dict):
+        for project in self.projects.values():
+            if ref.get("key") == project["key"] or str(ref.get("id")) == project["id"]:
+                return project
+        return None
+
+    def _create(self, fields: dict):
+        project = self._find_project(fields.get("project") or {})
+        if project is None:
+            return 400, {"errorMessages": [], "errors": {"project": "project is required"}}
+        with self._lock:
+            self._counter += 1
+            key = f"{project['key']}-{self._counter}"
+        issue = {"id": str(self._counter), "key": key, "self": f"{self.url}/rest/api/2/issue/{key}"}
+        self.issues[key] = dict(issue, fields=fields)
+        return 201, issue
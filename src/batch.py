@@ -0,0 +1,158 @@
+"""Batch mode: run JSONL commands through the agent with a pool of workers.
+
+Each input line is either a JSON object with a "command" (and optional
+"id") or a bare JSON string. Results are written as JSONL in completion
+order, one object per input line:
+
+    {"id": ..., "line": 12, "outcome": "ok", "result": "...",
+     "elapsed_ms": 812.4, "stages_ms": {"llm": 790.1, ...}}
+
+With a checkpoint file, an interrupted run can be restarted with the same
+input and picks up where it stopped. A command that was already running
+when the process died may or may not have reached Jira, so it is reported
+with outcome "interrupted" rather than re-run, unless `retry_interrupted`
+is set.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Checkpoint:
+    """Progress of a batch run: everything below `done_below` is finished.
+
+    Lines finished out of order are kept in `done` until the watermark
+    passes them, so the file stays as small as the worker window however
+    long the input is.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.done_below = 1
+        self.done = set()
+        self.in_flight = set()
+        self.interrupted = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self.done_below = state["done_below"]
+            self.done = set(state["done"])
+            # Started but never finished in the previous run
+            self.interrupted = set(state["in_flight"])
+
+    def status(self, line: int):
+        with self._lock:
+            if line < self.done_below or line in self.done:
+                return "done"
+            if line in self.interrupted:
+                return "interrupted"
+            return None
+
+    def start(self, line: int):
+        with self._lock:
+            self.in_flight.add(line)
+            self._save()
+
+    def finish(self, line: int):
+        with self._lock:
+            self.in_flight.discard(line)
+            self.interrupted.discard(line)
+            if line >= self.done_below:
+                self.done.add(line)
+            while self.done_below in self.done:
+                self.done.remove(self.done_below)
+                self.done_below += 1
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        state = {
+            "done_below": self.done_below,
+            "done": sorted(self.done),
+            "in_flight": sorted(self.in_flight | self.interrupted),
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.path)
+
+
+class BatchRunner:
+    """Feeds input lines to `agent.process_command_with_timings` on `workers` threads.
+
+    At most `2 * workers` lines are read ahead of the workers, so memory
+    stays flat regardless of input size.
+    """
+
+    def __init__(self, agent, output, workers: int = 4, checkpoint: Checkpoint = None,
+                 retry_interrupted: bool = False):
+        self.agent = agent
+        self.output = output
+        self.workers = max(1, workers)
+        self.checkpoint = checkpoint or Checkpoint()
+        self.retry_interrupted = retry_interrupted
+        self.counts = {}
+        self._window = threading.BoundedSemaphore(2 * self.workers)
+        self._write_lock = threading.Lock()
+
+    def run(self, lines) -> dict:
+        """Process every line of the iterable `lines`; return outcome counts"""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as pool:
+            try:
+                for number, raw in enumerate(lines, start=1):
+                    status = self.checkpoint.status(number)
+                    if status == "done":
+                        continue
+                    if status == "interrupted" and not self.retry_interrupted:
+                        self._emit({"line": number, "outcome": "interrupted",
+                                    "result": "Started before an interruption; check Jira before re-running"})
+                        self.checkpoint.finish(number)
+                        continue
+                    self._window.acquire()
+                    future = pool.submit(self._process, number, raw)
+                    future.add_done_callback(lambda _: self._window.release())
+            except KeyboardInterrupt:
+                # Queued lines that never started are re-run on resume
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+        return dict(self.counts)
+
+    def _process(self, number: int, raw: str):
+        record = {"line": number}
+        try:
+            item = json.loads(raw) if raw.strip() else None
+            command = item.get("command") if isinstance(item, dict) else item
+            if isinstance(item, dict) and "id" in item:
+                record["id"] = item["id"]
+            if not isinstance(command, str) or not command.strip():
+                raise ValueError("expected a JSON string or an object with a \"command\" field")
+        except ValueError as e:
+            if not raw.strip():
+                self.checkpoint.finish(number)
+                return
+            record.update(outcome="invalid", result=f"Invalid input line: {str(e)}")
+            self._emit(record)
+            self.checkpoint.finish(number)
+            return
+
+        self.checkpoint.start(number)
+        start = time.perf_counter()
+        try:
+            result, timer = self.agent.process_command_with_timings(command)
+            record.update(outcome=timer.outcome, result=result,
+                          stages_ms={k: round(v * 1000, 2) for k, v in timer.timings.items()})
+        except Exception as e:
+            record.update(outcome="error", result=f"System Error: {str(e)}")
+        record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        self._emit(record)
+        self.checkpoint.finish(number)
+
+    def _emit(self, record: dict):
+        with self._write_lock:
+            self.counts[record["outcome"]] = self.counts.get(record["outcome"], 0) + 1
+            self.output.write(json.dumps(record) + "\n")
+            self.output.flush()
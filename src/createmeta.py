@@ -0,0 +1,253 @@
+"""Per-project Jira create metadata ("createmeta") and the field rules compiled from it.
+
+Jira describes, for every project and issue type, which fields can be set
+on create, which are required and which values they accept. FieldRules
+turns that into lookups done once, so an action asking for an unknown
+issue type, a priority the project does not have or a missing required
+field is rejected locally instead of by a failed create request.
+"""
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Fields the agent always sends (or Jira fills in) on create
+_ALWAYS_SET = frozenset({"project", "issuetype", "summary", "reporter"})
+# Action keys that map directly onto system fields
+SYSTEM_FIELDS = ("priority", "assignee", "labels", "components")
+# Used when no createmeta is available (validation off or the fetch failed)
+_SYSTEM_SCHEMAS = {
+    "priority": {"type": "priority"},
+    "assignee": {"type": "user"},
+    "labels": {"type": "array", "items": "string"},
+    "components": {"type": "array", "items": "component"},
+}
+_NAMED = frozenset({"priority", "component", "version", "resolution", "issuetype", "project"})
+# Jira Cloud account ids ("5b10ac8d82e05b22cc7d4ef5" or "557058:f58131cb-...")
+_ACCOUNT_ID = re.compile(r"^(?:\d+:)?[0-9a-f-]{24,}$")
+
+
+def fetch_createmeta(jira, project: str) -> dict:
+    """{issue type name: {field id: field metadata}} for `project`.
+
+    Uses the per-project createmeta endpoints (Jira Server/DC 8.4+) and
+    falls back to the expanded createmeta call (Jira Cloud, older servers).
+    """
+    try:
+        issue_types = jira.project_issue_types(project, maxResults=100)
+    except Exception:
+        issue_types = None
+    meta = {}
+    for issue_type in issue_types or ():
+        fields = jira.project_issue_fields(project, issue_type.id, maxResults=200)
+        meta[issue_type.name] = {field.raw["fieldId"]: field.raw for field in fields}
+    if not meta:
+        response = jira.createmeta(projectKeys=project, expand="projects.issuetypes.fields")
+        for entry in response.get("projects", []):
+            if entry.get("key") == project:
+                meta = {issue_type["name"]: issue_type.get("fields", {}) for issue_type in entry.get("issuetypes", [])}
+    if not meta:
+        # No issue type this user can create: leave the verdict to Jira
+        raise ValueError(f"No create metadata for project {project}")
+    return meta
+
+
+def _label(value) -> str:
+    """How a value from `allowedValues` is referred to: its name, or its value for options"""
+    if isinstance(value, dict):
+        return value.get("name") or value.get("value")
+    return str(value)
+
+
+def _user(value: str) -> dict:
+    return {"accountId": value} if _ACCOUNT_ID.match(value) else {"name": value}
+
+
+def _wrap_one(kind, value):
+    if kind in _NAMED:
+        return {"name": value}
+    if kind == "user":
+        return _user(value)
+    if kind == "option":
+        return {"value": value}
+    return value
+
+
+def _wrap(schema: dict, value):
+    """Shape a plain value the way Jira expects it for a field with `schema`"""
+    if schema.get("type") == "array":
+        items = value if isinstance(value, list) else [value]
+        return [_wrap_one(schema.get("items"), item) for item in items]
+    return _wrap_one(schema.get("type"), value)
+
+
+def plain_fields(action: dict, default_type: str = "Task") -> dict:
+    """Create fields for an action without metadata: nothing is checked and
+    custom fields must be given by id ("customfield_10010")."""
+    fields = {"issuetype": {"name": action.get("issuetype") or default_type}}
+    for name in SYSTEM_FIELDS:
+        if name in action:
+            fields[name] = _wrap(_SYSTEM_SCHEMAS[name], action[name])
+    fields.update(action.get("fields", {}))
+    return fields
+
+
+class _IssueTypeRules:
+    """Field lookups for one issue type of one project"""
+
+    def __init__(self, name: str, fields: dict):
+        self.name = name
+        self.names = {}     # field id -> display name
+        self.schemas = {}   # field id -> schema
+        self.ids = {}       # lower-cased field id or name -> field id
+        self.allowed = {}   # field id -> {lower-cased value: Jira spelling}
+        self.required = []  # (field id, name) the action has to supply
+        for field_id, field in fields.items():
+            name = field.get("name") or field_id
+            self.names[field_id] = name
+            self.schemas[field_id] = field.get("schema") or {}
+            self.ids[field_id.lower()] = field_id
+            self.ids.setdefault(name.lower(), field_id)
+            if "allowedValues" in field:
+                labels = (_label(value) for value in field["allowedValues"])
+                self.allowed[field_id] = {label.lower(): label for label in labels if label}
+            if field.get("required") and not field.get("hasDefaultValue") and field_id not in _ALWAYS_SET:
+                self.required.append((field_id, name))
+
+    def build(self, action: dict) -> dict:
+        errors = []
+        fields = {"issuetype": {"name": self.name}}
+        for key in SYSTEM_FIELDS:
+            if key in action:
+                if key not in self.schemas:
+                    errors.append(f"{key} cannot be set on {self.name} issues")
+                else:
+                    fields[key] = self._value(key, action[key], errors)
+        for name, value in action.get("fields", {}).items():
+            field_id = self.ids.get(name.lower())
+            if field_id is None or field_id in _ALWAYS_SET:
+                errors.append(f"unknown field '{name}' for {self.name} issues")
+            else:
+                fields[field_id] = self._value(field_id, value, errors)
+        for field_id, name in self.required:
+            if field_id not in fields and not (field_id == "description" and action.get("description")):
+                errors.append(f"missing required field '{name}'")
+        if errors:
+            raise ValueError("; ".join(errors))
+        return fields
+
+    def _value(self, field_id: str, value, errors: list):
+        allowed = self.allowed.get(field_id)
+        if allowed is not None:
+            values = []
+            for item in value if isinstance(value, list) else [value]:
+                match = allowed.get(str(item).lower())
+                if match is None:
+                    errors.append(f"{self.names[field_id]} '{item}' is not one of: {_choices(allowed.values())}")
+                values.append(match or item)
+            value = values if isinstance(value, list) else values[0]
+        return _wrap(self.schemas[field_id], value)
+
+
+def _choices(values, limit: int = 10) -> str:
+    values = sorted(values)
+    if not values:
+        return "(none)"
+    return ", ".join(values[:limit]) + (", ..." if len(values) > limit else "")
+
+
+class FieldRules:
+    """Create rules for one project, compiled from its createmeta.
+
+    `build(action)` checks the action's issue type and rich fields in one
+    pass and returns the Jira fields to send (names in Jira's spelling,
+    custom field names resolved to ids, values wrapped as {"name": ...} or
+    {"value": ...}), or raises ValueError listing every problem.
+    """
+
+    def __init__(self, project: str, meta: dict, default_type: str = "Task"):
+        self.project = project
+        self.default_type = default_type
+        self._types = {name.lower(): _IssueTypeRules(name, fields) for name, fields in meta.items()}
+
+    def issue_types(self) -> list:
+        return [rules.name for rules in self._types.values()]
+
+    def build(self, action: dict) -> dict:
+        name = action.get("issuetype") or self.default_type
+        rules = self._types.get(name.lower())
+        if rules is None:
+            raise ValueError(
+                f"issue type '{name}' is not available in {self.project} (choose from: {_choices(self.issue_types())})"
+            )
+        return rules.build(action)
+
+
+class CreateMetaCache:
+    """TTL-cached FieldRules per project, loaded with `fetch(project)`.
+
+    Concurrent misses for one project share a single fetch. A failed fetch
+    is remembered for `retry_after` seconds: earlier rules keep being used
+    if there are any, otherwise `get()` returns None and creates go ahead
+    unchecked, leaving validation to Jira.
+    """
+
+    def __init__(self, fetch, ttl: float = 3600.0, retry_after: float = 60.0, default_type: str = "Task"):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.default_type = default_type
+        self._entries = {}
+        self._fetch_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, project: str):
+        """Return the project's FieldRules, or None when no metadata is available"""
+        entry = self._fresh(project)
+        if entry is not None:
+            return entry[0]
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(project, threading.Lock())
+        with fetch_lock:
+            entry = self._fresh(project)
+            if entry is not None:
+                return entry[0]
+            with self._lock:
+                self.misses += 1
+                stale = self._entries.get(project)
+            try:
+                rules = FieldRules(project, self._fetch(project), self.default_type)
+                expires = time.monotonic() + self.ttl
+            except Exception as e:
+                logger.warning(f"Could not load create metadata for {project}: {str(e)}")
+                rules = stale[0] if stale else None
+                expires = time.monotonic() + self.retry_after
+                with self._lock:
+                    self.errors += 1
+            with self._lock:
+                self._entries[project] = (rules, expires)
+        return rules
+
+    def invalidate(self, project: str = None):
+        with self._lock:
+            if project is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(project, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+    def _fresh(self, project: str):
+        with self._lock:
+            entry = self._entries.get(project)
+            if entry is not None and time.monotonic() < entry[1]:
+                self.hits += 1
+                return entry
+            return None
@@ -0,0 +1,235 @@
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+_MASK = (1 << 32) - 1
+EMPTY = 1 << 32
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+# Key prefix of summaries reserved by an in-flight create
+_PENDING = "pending:"
+
+
+def normalize_summary(summary: str) -> str:
+    """Lower-case, punctuation-free, whitespace-collapsed form of a summary"""
+    return " ".join(_PUNCTUATION.sub(" ", summary.lower()).split())
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """Character n-grams of `text`; short texts are their own single shingle"""
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class DuplicateIndex:
+    """Bounded per-project index of issue summaries for near-duplicate checks.
+
+    Each summary is stored as a MinHash signature of its character
+    trigrams and bucketed by LSH bands,
+    so `find()` compares a candidate only with summaries sharing a band
+    instead of scanning the project (4 bands of 4 rows put the LSH cut-off
+    near 0.7, just under the default 0.8 threshold). Every project keeps at most
+    `max_per_project` entries, least recently added first out.
+
+    `search(project, since)` yields (key, summary) pairs for issues updated
+    since the given epoch time (None for a first sync); each project is
+    resynced in the background once `refresh_interval` has passed. The
+    first check of a project waits up to `initial_sync_wait` seconds for
+    its first sync, so it is not checked against an empty index.
+    """
+
+    def __init__(self, search=None, threshold: float = 0.8, num_bins: int = 16, bands: int = 4,
+                 max_per_project: int = 5000, refresh_interval: float = 300.0, initial_sync_wait: float = 5.0):
+        if num_bins & (num_bins - 1) or num_bins % bands:
+            raise ValueError("num_bins must be a power of two and a multiple of bands")
+        self._search = search
+        self.threshold = threshold
+        self.num_bins = num_bins
+        self.rows = num_bins // bands
+        self.bands = bands
+        self.max_per_project = max_per_project
+        self.refresh_interval = refresh_interval
+        self.initial_sync_wait = initial_sync_wait
+        self._bin_shift = 32 - (num_bins.bit_length() - 1)
+        self._value_mask = (1 << self._bin_shift) - 1
+        self._projects = {}
+        self._synced_at = {}
+        self._syncing = {}
+        self._reservations = 0
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.duplicates = 0
+
+    def signature(self, normalized: str) -> tuple:
+        """One-permutation MinHash: each shingle hash lands in one bin, keep each bin's minimum.
+
+        A single hash per shingle instead of one per permutation keeps this
+        at a few microseconds; empty bins hold EMPTY and are ignored when
+        comparing.
+        """
+        signature = [EMPTY] * self.num_bins
+        shift, mask = self._bin_shift, self._value_mask
+        for shingle in shingles(normalized):
+            # Fibonacci multiply spreads crc32's bits into the high bits used for the bin
+            h = (zlib.crc32(shingle.encode()) * 0x9E3779B1) & _MASK
+            slot, value = h >> shift, h & mask
+            if value < signature[slot]:
+                signature[slot] = value
+        return tuple(signature)
+
+    def add(self, project: str, key: str, summary: str, reservation: str = None):
+        """Index an issue; `reservation` (from reserve()) is replaced by it"""
+        normalized = normalize_summary(summary)
+        signature = self.signature(normalized)
+        with self._lock:
+            if reservation is not None:
+                self._release(project, reservation)
+            self._insert(project, key, normalized, signature)
+
+    def find(self, project: str, summary: str):
+        """Return (key, similarity) of the closest indexed duplicate, or None"""
+        return self._check(project, summary, reserve=False)[0]
+
+    def reserve(self, project: str, summary: str) -> tuple:
+        """find(), but when nothing matches also index the summary as pending,
+        in the same critical section, so a concurrent identical request sees it.
+
+        Returns (duplicate, reservation). Pass the reservation to add() once
+        the issue exists, or to release() if it was not created.
+        """
+        return self._check(project, summary, reserve=True)
+
+    def release(self, project: str, reservation: str):
+        if reservation is not None:
+            with self._lock:
+                self._release(project, reservation)
+
+    def _check(self, project: str, summary: str, reserve: bool) -> tuple:
+        self._maybe_sync(project)
+        normalized = normalize_summary(summary)
+        with self._lock:
+            self.checks += 1
+            index = self._projects.get(project)
+            # Resubmitted commands usually repeat the summary exactly
+            exact = index["exact"].get(normalized) if index is not None else None
+            if exact is not None:
+                self.duplicates += 1
+                return (self._visible(exact), 1.0), None
+            if index is None and not reserve:
+                return None, None
+        signature = self.signature(normalized)
+        with self._lock:
+            index = self._projects.get(project)
+            best = None
+            if index is not None:
+                exact = index["exact"].get(normalized)
+                if exact is not None:
+                    best = (exact, 1.0)
+                for key in () if best else self._candidates(index, signature):
+                    similarity = self._similarity(signature, index["entries"][key][1])
+                    if similarity >= self.threshold and (best is None or similarity > best[1]):
+                        best = (key, similarity)
+            if best is not None:
+                self.duplicates += 1
+                return (self._visible(best[0]), best[1]), None
+            if not reserve:
+                return None, None
+            self._reservations += 1
+            reservation = f"{_PENDING}{self._reservations}"
+            self._insert(project, reservation, normalized, signature)
+            return None, reservation
+
+    def sync(self, project: str):
+        """Pull issues updated since the last sync of `project` into the index"""
+        with self._lock:
+            since = self._synced_at.get(project)
+        started = time.time()
+        for key, summary in self._search(project, since):
+            self.add(project, key, summary)
+        with self._lock:
+            self._synced_at[project] = started
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "projects": len(self._projects),
+                "entries": sum(len(index["entries"]) for index in self._projects.values()),
+                "checks": self.checks,
+                "duplicates": self.duplicates,
+            }
+
+    def _insert(self, project: str, key: str, normalized: str, signature: tuple):
+        index = self._projects.setdefault(project, {"entries": OrderedDict(), "exact": {}, "buckets": {}})
+        if key in index["entries"]:
+            self._remove(index, key)
+        index["entries"][key] = (normalized, signature)
+        index["exact"][normalized] = key
+        for band in self._bands(signature):
+            index["buckets"].setdefault(band, set()).add(key)
+        while len(index["entries"]) > self.max_per_project:
+            self._remove(index, next(iter(index["entries"])))
+
+    def _remove(self, index: dict, key: str):
+        normalized, signature = index["entries"].pop(key)
+        if index["exact"].get(normalized) == key:
+            del index["exact"][normalized]
+        for band in self._bands(signature):
+            bucket = index["buckets"].get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del index["buckets"][band]
+
+    def _bands(self, signature: tuple):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def _candidates(self, index: dict, signature: tuple) -> set:
+        candidates = set()
+        for band in self._bands(signature):
+            candidates |= index["buckets"].get(band, set())
+        return candidates
+
+    @staticmethod
+    def _similarity(first: tuple, second: tuple) -> float:
+        """MinHash estimate of the Jaccard similarity of two shingle sets"""
+        matches = used = 0
+        for a, b in zip(first, second):
+            if a == EMPTY and b == EMPTY:
+                continue
+            used += 1
+            matches += a == b
+        return matches / used if used else 1.0
+
+    def _release(self, project: str, reservation: str):
+        index = self._projects.get(project)
+        if index is not None and reservation in index["entries"]:
+            self._remove(index, reservation)
+
+    @staticmethod
+    def _visible(key: str) -> str:
+        return "an issue being created" if key.startswith(_PENDING) else key
+
+    def _maybe_sync(self, project: str):
+        if self._search is None:
+            return
+        with self._lock:
+            synced = self._synced_at.get(project)
+            done = self._syncing.get(project)
+            if done is None and (synced is None or time.time() - synced >= self.refresh_interval):
+                done = self._syncing[project] = threading.Event()
+                threading.Thread(target=self._background_sync, args=(project,), daemon=True).start()
+        if synced is None and done is not None:
+            done.wait(self.initial_sync_wait)
+
+    def _background_sync(self, project: str):
+        try:
+            self.sync(project)
+        except Exception:
+            # Checks keep using what is already indexed; the next check retries
+            pass
+        finally:
+            with self._lock:
+                self._syncing.pop(project).set()
@@ -0,0 +1,104 @@
+"""Rule-based parser for commands simple enough to skip the LLM.
+
+Recognised grammar (case-insensitive keywords, KEY is a 2-10 letter
+upper-case project key, SEP is one of ":", "-", "–" or "—"):
+
+    single   := VERB [a|an|one] [new] NOUN PREP [project] KEY [project] SEP SUMMARY
+                [("; " | ", ") description SEP DESCRIPTION]
+    list     := header NEWLINE item {NEWLINE item}
+    header   := VERB [these|the following] NOUNS PREP [project] KEY [project] [":"]
+              | KEY ":"
+    item     := ("-" | "*" | "+" | "•" | DIGITS "." | DIGITS ")") SUMMARY
+
+    VERB  := create | add | open | file | new
+    NOUN  := task | issue | ticket            NOUNS := tasks | issues | tickets
+    PREP  := in | for | under | on
+
+For example "create task in OPS: renew TLS cert", or a pasted bullet list
+under an "OPS:" line. Anything else, and anything that would fail
+ACTION_SCHEMA, returns None so the command goes to the LLM instead; so
+does a command naming a project Jira does not have (see JiraAgent).
+"""
+import re
+import threading
+from src.metrics import FAST_PATH_COMMANDS
+from src.schemas import action_errors
+
+_VERB = r"(?:create|add|open|file|new)"
+_PREP = r"(?:in|for|under|on)"
+# Upper case even though the keywords are not, so "for me" or "on Monday"
+# is not read as a project
+_KEY = r"(?:project\s+)?(?P<project>(?-i:[A-Z]{2,10}))(?:\s+project)?"
+_SEP = r"\s*(?::|-|–|—)\s*"
+
+_SINGLE = re.compile(
+    rf"^(?:please\s+)?{_VERB}\s+(?:(?:a|an|one)\s+)?(?:new\s+)?(?:task|issue|ticket)\s+{_PREP}\s+{_KEY}"
+    rf"{_SEP}(?P<summary>.+?)"
+    rf"(?:\s*[;,]\s*description{_SEP}(?P<description>.+?))?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+_LIST_HEADER = re.compile(
+    rf"^(?:please\s+)?{_VERB}\s+(?:(?:these|the\s+following)\s+)?(?:tasks|issues|tickets)\s+{_PREP}\s+{_KEY}\s*:?\s*$",
+    re.IGNORECASE
+)
+_KEY_HEADER = re.compile(r"^(?P<project>[A-Z]{2,10})\s*:\s*$")
+_ITEM = re.compile(r"^\s*(?:[-*+•]|\d+[.)])\s+(?P<summary>\S.*?)\s*$")
+
+
+class FastPathParser:
+    """Turns commands matching the grammar above into create_issue actions"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def parse(self, command: str):
+        """Return validated actions shaped like _extract_actions' output, or None"""
+        actions = self._match(command.strip())
+        if actions and not action_errors(actions):
+            self._count(True)
+            return actions
+        self._count(False)
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def _count(self, hit: bool):
+        FAST_PATH_COMMANDS.inc(("hit" if hit else "miss",))
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _match(self, command: str):
+        if "\n" not in command:
+            match = _SINGLE.match(command)
+            if match is None:
+                return None
+            action = _action(match.group("project"), match.group("summary"))
+            if match.group("description"):
+                action["description"] = match.group("description")
+            return [action]
+
+        header, *lines = command.splitlines()
+        match = _LIST_HEADER.match(header.strip()) or _KEY_HEADER.match(header.strip())
+        if match is None:
+            return None
+        actions = []
+        for line in lines:
+            if not line.strip():
+                continue
+            item = _ITEM.match(line)
+            if item is None:
+                return None
+            actions.append(_action(match.group("project"), item.group("summary")))
+        return actions
+
+
+def _action(project: str, summary: str) -> dict:
+    return {"project": project.upper(), "summary": summary.strip(), "action": "create_issue"}
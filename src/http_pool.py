@@ -0,0 +1,284 @@
+import asyncio
+import functools
+import importlib.util
+import os
+import threading
+import weakref
+from src.lazy import LazyImports
+from src.metrics import REGISTRY
+
+_lazy = LazyImports(
+    globals(),
+    httpx="httpx",
+    HTTPTransport="httpx:HTTPTransport",
+    AsyncHTTPTransport="httpx:AsyncHTTPTransport",
+    HTTPAdapter="requests.adapters:HTTPAdapter",
+    Retry="urllib3.util.retry:Retry"
+)
+__getattr__ = _lazy.module_getattr
+
+
+class PoolSettings:
+    """Pool size, keep-alive and timeouts shared by every HTTP backend.
+
+    `http2` is "auto" (on when the h2 package is installed), "true" or
+    "false"; it applies to the httpx-based LLM clients, since requests
+    (used by the jira library) only speaks HTTP/1.1. `jira_read_retries`
+    is how often the Jira pool retries a failed read (see _jira_adapter).
+    """
+
+    def __init__(self, pool_size: int = 20, keepalive: float = 60.0, connect_timeout: float = 5.0,
+                 read_timeout: float = 120.0, http2: str = "auto", jira_read_retries: int = 3):
+        self.pool_size = pool_size
+        self.jira_read_retries = jira_read_retries
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        if http2 == "auto":
+            http2 = "true" if importlib.util.find_spec("h2") is not None else "false"
+        self.http2 = http2 == "true"
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            pool_size=int(os.getenv('HTTP_POOL_SIZE', '20')),
+            keepalive=float(os.getenv('HTTP_KEEPALIVE', '60')),
+            connect_timeout=float(os.getenv('HTTP_CONNECT_TIMEOUT', '5')),
+            read_timeout=float(os.getenv('HTTP_READ_TIMEOUT', '120')),
+            http2=os.getenv('HTTP2', 'auto').strip().lower(),
+            jira_read_retries=int(os.getenv('JIRA_READ_RETRIES', '3'))
+        )
+
+
+class ConnectionStats:
+    """Requests sent versus connections opened for one backend"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self._lock = threading.Lock()
+
+    def request(self):
+        with self._lock:
+            self.requests += 1
+
+    def trace(self, event: str, info: dict):
+        """httpcore trace callback; only fires for connections that are actually opened"""
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+        elif event == "connection.start_tls.complete":
+            with self._lock:
+                self.tls_handshakes += 1
+
+    async def atrace(self, event: str, info: dict):
+        self.trace(event, info)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused": max(0, self.requests - self.new_connections),
+                "tls_handshakes": self.tls_handshakes,
+            }
+
+
+class HTTPPools:
+    """One connection pool per backend, shared by every client in the process.
+
+    httpx backends (Ollama, OpenAI) share a transport per backend name, so
+    each new client reuses the keep-alive connections of the others; async
+    transports are kept per event loop because their connections belong to
+    the loop that opened them. Jira clients mount one shared requests
+    adapter.
+    """
+
+    def __init__(self, settings: PoolSettings = None):
+        self.settings = settings or PoolSettings.from_env()
+        self._transports = {}
+        self._async_transports = {}
+        self._stats = {}
+        self._adapter = None
+        self._lock = threading.Lock()
+
+    def timeout(self):
+        httpx = _lazy.resolve("httpx")
+        return httpx.Timeout(self.settings.read_timeout, connect=self.settings.connect_timeout)
+
+    def client_options(self, name: str) -> dict:
+        """Keyword arguments for an httpx.Client talking to backend `name`"""
+        stats = self._stats_for(name)
+
+        def on_request(request):
+            stats.request()
+            request.extensions["trace"] = stats.trace
+
+        return {"transport": self._transport(name), "timeout": self.timeout(), "event_hooks": {"request": [on_request]}}
+
+    def async_client_options(self, name: str) -> dict:
+        """Keyword arguments for an httpx.AsyncClient; call from the loop that will use it"""
+        stats = self._stats_for(name)
+
+        async def on_request(request):
+            stats.request()
+            request.extensions["trace"] = stats.atrace
+
+        return {
+            "transport": self._async_transport(name),
+            "timeout": self.timeout(),
+            "event_hooks": {"request": [on_request]},
+        }
+
+    def mount(self, session):
+        """Route a requests session (e.g. a JIRA client's) through the shared Jira pool"""
+        adapter = self._jira_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {name: s.snapshot() for name, s in self._stats.items()}
+            adapter = self._adapter
+        if adapter is not None:
+            stats["jira"] = self._adapter_stats(adapter)
+        return stats
+
+    def _stats_for(self, name: str) -> ConnectionStats:
+        with self._lock:
+            return self._stats.setdefault(name, ConnectionStats())
+
+    def _limits(self):
+        httpx = _lazy.resolve("httpx")
+        return httpx.Limits(
+            max_connections=self.settings.pool_size,
+            max_keepalive_connections=self.settings.pool_size,
+            keepalive_expiry=self.settings.keepalive
+        )
+
+    def _transport(self, name: str):
+        with self._lock:
+            transport = self._transports.get(name)
+            if transport is None:
+                transport = self._transports[name] = _shared_class("HTTPTransport")(
+                    limits=self._limits(), http2=self.settings.http2
+                )
+            return transport
+
+    def _async_transport(self, name: str):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transports = self._async_transports.setdefault(name, weakref.WeakKeyDictionary())
+            transport = transports.get(loop)
+            if transport is None:
+                transport = transports[loop] = _shared_class("AsyncHTTPTransport")(
+                    limits=self._limits(), http2=self.settings.http2
+                )
+            return transport
+
+    def _jira_adapter(self):
+        """requests adapter for Jira that retries reads, not writes.
+
+        The JIRA client's own retry loop is off (it would retry creates and
+        fight the WriteScheduler, which paces and retries writes), so reads
+        such as projects(), createmeta and search_issues are retried here:
+        GETs on connection errors, 429 (honouring Retry-After) and 502-504.
+        Failed connects are retried for any method, as nothing was sent.
+        """
+        with self._lock:
+            if self._adapter is None:
+                retries = self.settings.jira_read_retries
+                self._adapter = _shared_class("HTTPAdapter")(
+                    pool_connections=4,
+                    pool_maxsize=self.settings.pool_size,
+                    max_retries=_lazy.resolve("Retry")(
+                        total=retries,
+                        connect=retries,
+                        read=retries,
+                        status=retries,
+                        other=0,
+                        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+                        status_forcelist=(429, 502, 503, 504),
+                        backoff_factor=0.5,
+                        respect_retry_after_header=True,
+                        # Hand the last error response to the caller as usual
+                        raise_on_status=False
+                    )
+                )
+            return self._adapter
+
+    @staticmethod
+    def _adapter_stats(adapter) -> dict:
+        requests = new_connections = 0
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                requests += pool.num_requests
+                new_connections += pool.num_connections
+        return {
+            "requests": requests,
+            "new_connections": new_connections,
+            "reused": max(0, requests - new_connections),
+        }
+
+
+def _ignore_close(self, *args):
+    pass
+
+
+async def _aignore_close(self, *args):
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_class(name: str):
+    """Subclass of transport/adapter `name` that ignores close.
+
+    The instance is shared by every client in the process, so one client
+    being closed (or used as a context manager) must not drop the pool.
+    """
+    base = _lazy.resolve(name)
+    if name == "AsyncHTTPTransport":
+        methods = {"__aexit__": _aignore_close, "aclose": _aignore_close}
+    else:
+        methods = {"__exit__": _ignore_close, "close": _ignore_close}
+    return type(f"Shared{base.__name__}", (base,), methods)
+
+
+_pools = None
+_pools_lock = threading.Lock()
+
+
+def shared_pools() -> HTTPPools:
+    """The process-wide HTTPPools, configured from the environment on first use"""
+    global _pools
+    if _pools is None:
+        with _pools_lock:
+            if _pools is None:
+                _pools = HTTPPools()
+    return _pools
+
+
+class _PoolCollector:
+    """Renders the shared pools' request and connection counts for /metrics"""
+
+    def render(self) -> list:
+        if _pools is None:
+            return []
+        lines = [
+            "# HELP jira_agent_http_requests_total HTTP requests sent through the shared pools",
+            "# TYPE jira_agent_http_requests_total counter",
+        ]
+        stats = _pools.stats()
+        lines += [f'jira_agent_http_requests_total{{backend="{name}"}} {s["requests"]}' for name, s in stats.items()]
+        lines += [
+            "# HELP jira_agent_http_connections_total Connections opened by the shared pools",
+            "# TYPE jira_agent_http_connections_total counter",
+        ]
+        lines += [f'jira_agent_http_connections_total{{backend="{name}"}} {s["new_connections"]}' for name, s in stats.items()]
+        return lines
+
+
+REGISTRY.register(_PoolCollector())
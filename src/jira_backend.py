@@ -0,0 +1,281 @@
+import importlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+_PROJECT_CLAUSE = re.compile(r'\bproject\s*=\s*"?([A-Z][A-Z0-9]*)"?', re.IGNORECASE)
+_UPDATED_CLAUSE = re.compile(r'\bupdated\s*>=\s*"?([^"]+?)"?(?:\s+(?:AND|ORDER)\b|$)', re.IGNORECASE)
+
+
+def default_createmeta() -> dict:
+    """Create metadata every in-memory project starts with: {issue type: {field id: field}}"""
+    fields = {
+        "summary": {"name": "Summary", "required": True, "schema": {"type": "string", "system": "summary"}},
+        "issuetype": {"name": "Issue Type", "required": True, "schema": {"type": "issuetype", "system": "issuetype"}},
+        "description": {"name": "Description", "required": False, "schema": {"type": "string", "system": "description"}},
+        "priority": {
+            "name": "Priority", "required": False, "hasDefaultValue": True,
+            "schema": {"type": "priority", "system": "priority"},
+            "allowedValues": [{"id": str(i + 1), "name": name} for i, name in enumerate(("Highest", "High", "Medium", "Low", "Lowest"))]
+        },
+        "labels": {"name": "Labels", "required": False, "schema": {"type": "array", "items": "string", "system": "labels"}},
+        "assignee": {"name": "Assignee", "required": False, "schema": {"type": "user", "system": "assignee"}},
+    }
+    return {name: dict(fields) for name in ("Task", "Bug", "Story")}
+
+
+class MemoryJiraError(Exception):
+    """Error raised by InMemoryJira, shaped like jira.JIRAError for the retry logic"""
+
+    def __init__(self, status_code: int, text: str, headers: dict = None):
+        super().__init__(f"HTTP {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class MemoryIssue:
+    def __init__(self, key: str, issue_id: str, fields: dict, created: float):
+        self.key = key
+        self.id = issue_id
+        self.created = created
+        self.updated = created
+        self.fields = SimpleNamespace(**fields)
+
+    def raw(self) -> dict:
+        return {
+            "key": self.key,
+            "id": self.id,
+            "created": self.created,
+            "fields": {
+                **vars(self.fields),
+                "project": self.fields.project.key,
+            },
+        }
+
+
+class InMemoryJira:
+    """Stand-in for the `jira.JIRA` client that keeps everything in memory.
+
+    Implements the calls the agent makes (`projects`, `create_issue`,
+    `create_issues`, `search_issues`, `createmeta`) with generated keys per
+    project. Creates are checked against each project's create metadata
+    (`default_createmeta()` unless replaced with `set_createmeta()`) and
+    rejected with a 400 the way Jira would.
+    `latency` seconds are added to every call, and `failure_rate` of calls
+    (or the next `fail_next()` calls) raise MemoryJiraError with
+    `failure_status`, so rate limiting and retries can be exercised offline.
+    `snapshot()`/`export()` return the issues created so far.
+    """
+
+    def __init__(self, projects=("TEST",), latency: float = 0.0, failure_rate: float = 0.0,
+                 failure_status: int = 503, seed: int = None):
+        self._projects = {
+            key: SimpleNamespace(key=key, id=str(10000 + i), name=key)
+            for i, key in enumerate(projects)
+        }
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._random = random.Random(seed)
+        self._forced_failures = []
+        self._issues = {}
+        self._counters = {key: 0 for key in self._projects}
+        self._createmeta = {key: default_createmeta() for key in self._projects}
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls):
+        seed = os.getenv('JIRA_MEMORY_SEED')
+        return cls(
+            projects=[key.strip().upper() for key in os.getenv('JIRA_MEMORY_PROJECTS', 'TEST').split(",") if key.strip()],
+            latency=float(os.getenv('JIRA_MEMORY_LATENCY', '0')),
+            failure_rate=float(os.getenv('JIRA_MEMORY_FAILURE_RATE', '0')),
+            seed=int(seed) if seed else None
+        )
+
+    def fail_next(self, count: int = 1, status: int = None, retry_after: float = None):
+        """Make the next `count` calls fail with `status` (default failure_status)"""
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+        with self._lock:
+            self._forced_failures.extend([(status or self.failure_status, headers)] * count)
+
+    def projects(self) -> list:
+        self._request()
+        return list(self._projects.values())
+
+    def project(self, key: str):
+        self._request()
+        project = self._projects.get(key) or self._project_by_id(key)
+        if project is None:
+            raise MemoryJiraError(404, f"No project could be found with key '{key}'.")
+        return project
+
+    def set_createmeta(self, project: str, issue_types: dict):
+        """Replace a project's create metadata ({issue type name: {field id: field}})"""
+        with self._lock:
+            self._createmeta[project] = issue_types
+
+    def createmeta(self, projectKeys=None, expand: str = None, **kwargs) -> dict:
+        """Legacy createmeta response; issue type fields are included when `expand` asks for them"""
+        self._request()
+        keys = projectKeys.split(",") if isinstance(projectKeys, str) else projectKeys or list(self._projects)
+        with_fields = bool(expand) and "fields" in expand
+        projects = []
+        for key in keys:
+            project = self._projects.get(key)
+            if project is None:
+                continue
+            issue_types = [
+                {"id": str(i + 1), "name": name, **({"fields": fields} if with_fields else {})}
+                for i, (name, fields) in enumerate(self._createmeta[key].items())
+            ]
+            projects.append({"id": project.id, "key": key, "name": project.name, "issuetypes": issue_types})
+        return {"projects": projects}
+
+    def create_issue(self, fields: dict = None, prefetch: bool = True, **fieldargs):
+        self._request()
+        return self._create({**(fields or {}), **fieldargs})
+
+    def create_issues(self, field_list: list, prefetch: bool = True) -> list:
+        """One request for the whole list; rows fail individually, as with the bulk endpoint"""
+        self._request()
+        results = []
+        for fields in field_list:
+            try:
+                issue = self._create(fields)
+            except MemoryJiraError as e:
+                results.append({"status": "Error", "error": e.text, "issue": None, "input_fields": fields})
+            else:
+                results.append({"status": "Success", "error": None, "issue": issue, "input_fields": fields})
+        return results
+
+    def search_issues(self, jql_str: str, startAt: int = 0, maxResults: int = 50, fields=None, **kwargs) -> list:
+        """Understands `project = KEY` and `updated >= "yyyy/MM/dd HH:mm"` / `-Nd`; other clauses are ignored"""
+        self._request()
+        project = _PROJECT_CLAUSE.search(jql_str)
+        updated = _UPDATED_CLAUSE.search(jql_str)
+        since = self._parse_since(updated.group(1)) if updated else None
+        with self._lock:
+            issues = [
+                issue for issue in self._issues.values()
+                if (project is None or issue.fields.project.key == project.group(1).upper())
+                and (since is None or issue.updated >= since)
+            ]
+        issues.sort(key=lambda issue: issue.updated, reverse=True)
+        return issues[startAt:startAt + maxResults]
+
+    def issue(self, key: str):
+        self._request()
+        with self._lock:
+            issue = self._issues.get(key)
+        if issue is None:
+            raise MemoryJiraError(404, "Issue Does Not Exist")
+        return issue
+
+    def snapshot(self) -> list:
+        """Created issues as plain dicts, in creation order"""
+        with self._lock:
+            return [issue.raw() for issue in self._issues.values()]
+
+    def export(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._issues.clear()
+            self._counters = {key: 0 for key in self._projects}
+
+    def _request(self):
+        """Account for one API call: simulated latency, then any injected failure"""
+        with self._lock:
+            self.calls += 1
+            failure = self._forced_failures.pop(0) if self._forced_failures else None
+            if failure is None and self.failure_rate and self._random.random() < self.failure_rate:
+                failure = (self.failure_status, None)
+        if self.latency:
+            time.sleep(self.latency)
+        if failure is not None:
+            status, headers = failure
+            raise MemoryJiraError(status, "Injected failure", headers)
+
+    def _create(self, fields: dict) -> MemoryIssue:
+        project = self._resolve_project(fields.get("project"))
+        summary = fields.get("summary")
+        if not summary:
+            raise MemoryJiraError(400, "summary: You must specify a summary of the issue.")
+        self._check_fields(project.key, fields)
+        with self._lock:
+            self._counters[project.key] += 1
+            key = f"{project.key}-{self._counters[project.key]}"
+            issue = MemoryIssue(key, str(len(self._issues) + 1), {
+                **fields,
+                "project": project,
+                "summary": summary,
+                "description": fields.get("description", ""),
+                "issuetype": fields.get("issuetype", {"name": "Task"}),
+            }, time.time())
+            self._issues[key] = issue
+        return issue
+
+    def _check_fields(self, project: str, fields: dict):
+        issue_type = (fields.get("issuetype") or {"name": "Task"}).get("name")
+        meta = self._createmeta[project].get(issue_type)
+        if meta is None:
+            raise MemoryJiraError(400, "issuetype: Specify a valid issue type")
+        for field_id, field in meta.items():
+            if field_id not in fields:
+                if field.get("required") and not field.get("hasDefaultValue") and field_id not in ("project", "issuetype"):
+                    raise MemoryJiraError(400, f"{field_id}: {field['name']} is required.")
+                continue
+            if "allowedValues" in field:
+                allowed = {value.get("name") or value.get("value") for value in field["allowedValues"]}
+                values = fields[field_id] if isinstance(fields[field_id], list) else [fields[field_id]]
+                for value in values:
+                    if not isinstance(value, dict) or (value.get("name") or value.get("value")) not in allowed:
+                        raise MemoryJiraError(400, f"{field_id}: Specify a valid value for {field['name']}")
+        for field_id in fields:
+            if field_id not in meta and field_id not in ("project", "issuetype", "summary", "description"):
+                raise MemoryJiraError(400, f"{field_id}: Field '{field_id}' cannot be set. It is not on the appropriate screen, or unknown.")
+
+    def _resolve_project(self, value):
+        if isinstance(value, dict):
+            project = self._projects.get(value.get("key")) or self._project_by_id(value.get("id"))
+        else:
+            project = self._projects.get(value) or self._project_by_id(value)
+        if project is None:
+            raise MemoryJiraError(400, "project: valid project is required")
+        return project
+
+    def _project_by_id(self, project_id):
+        return next((p for p in self._projects.values() if p.id == project_id), None)
+
+    @staticmethod
+    def _parse_since(value: str):
+        value = value.strip()
+        relative = re.fullmatch(r"-(\d+)([dhm])", value)
+        if relative:
+            amount, unit = int(relative.group(1)), relative.group(2)
+            return time.time() - amount * {"d": 86400, "h": 3600, "m": 60}[unit]
+        for pattern in ("%Y/%m/%d %H:%M", "%Y-%m-%d %H:%M", "%Y/%m/%d", "%Y-%m-%d"):
+            try:
+                return time.mktime(time.strptime(value, pattern))
+            except ValueError:
+                continue
+        return None
+
+
+def create_backend(spec: str):
+    """Build a Jira client from JIRA_BACKEND: "memory" or "package.module:factory" """
+    if spec == "memory":
+        return InMemoryJira.from_env()
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Unsupported JIRA_BACKEND: {spec}")
+    return getattr(importlib.import_module(module_name), attribute)()
@@ -0,0 +1,160 @@
+import importlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+INTERRUPTED = "interrupted"
+
+
+class JobQueue:
+    """Interface for command job storage.
+
+    Implementations must make `claim()` atomic across every process sharing
+    the queue, so several web workers can drain it without running a job
+    twice. Jobs are plain dicts as returned by `get()`.
+    """
+
+    def enqueue(self, command: str) -> str:
+        raise NotImplementedError
+
+    def claim(self, worker: str):
+        """Mark the oldest queued job as running by `worker` and return it, or None"""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: str):
+        raise NotImplementedError
+
+    def append_partial(self, job_id: str, line: str):
+        raise NotImplementedError
+
+    def finish(self, job_id: str, status: str, result: str, timings: dict = None):
+        raise NotImplementedError
+
+    def get(self, job_id: str):
+        raise NotImplementedError
+
+    def recover(self, lease: float) -> int:
+        """Mark running jobs without a heartbeat for `lease` seconds as interrupted"""
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue in a SQLite file; survives restarts and is shared by processes on one host.
+
+    A job whose worker died mid-run may already have created issues, so
+    `recover()` marks it interrupted instead of queueing it again.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, command TEXT NOT NULL, status TEXT NOT NULL, "
+            "created REAL NOT NULL, started REAL, finished REAL, heartbeat REAL, worker TEXT, "
+            "partial TEXT NOT NULL DEFAULT '[]', result TEXT, timings TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created)")
+
+    def enqueue(self, command: str) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, command, status, created) VALUES (?, ?, ?, ?)",
+                (job_id, command, QUEUED, time.time())
+            )
+        return job_id
+
+    def claim(self, worker: str):
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock, so two processes cannot claim the same row
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, started = ?, heartbeat = ?, worker = ? WHERE id = ?",
+                        (RUNNING, now, now, worker, row[0])
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return self.get(row[0]) if row is not None else None
+
+    def heartbeat(self, job_id: str):
+        with self._lock:
+            self._db.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time(), job_id))
+
+    def append_partial(self, job_id: str, line: str):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET partial = json_insert(partial, '$[#]', ?), heartbeat = ? WHERE id = ?",
+                (line, time.time(), job_id)
+            )
+
+    def finish(self, job_id: str, status: str, result: str, timings: dict = None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, timings = ?, finished = ? WHERE id = ?",
+                (status, result, json.dumps(timings or {}), time.time(), job_id)
+            )
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, command, status, created, started, finished, partial, result, timings "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "command": row[1],
+            "status": row[2],
+            "created": row[3],
+            "started": row[4],
+            "finished": row[5],
+            "partial": json.loads(row[6]),
+            "result": row[7],
+            "timings": json.loads(row[8]) if row[8] else {},
+        }
+
+    def recover(self, lease: float) -> int:
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, finished = ?, "
+                "result = 'Worker stopped before the job finished; check Jira before re-submitting' "
+                "WHERE status = ? AND heartbeat < ?",
+                (INTERRUPTED, now, RUNNING, now - lease)
+            )
+            self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished < ?",
+                (DONE, ERROR, INTERRUPTED, now - self.ttl)
+            )
+        return cursor.rowcount
+
+
+def create_queue(spec: str) -> JobQueue:
+    """Build a queue from JOB_QUEUE: "sqlite:///path/jobs.db", ":memory:" or "package.module:factory" """
+    if spec.startswith("sqlite:///"):
+        return SQLiteJobQueue(spec[len("sqlite:///"):])
+    if spec == ":memory:":
+        return SQLiteJobQueue(":memory:")
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Unsupported JOB_QUEUE: {spec}")
+    return getattr(importlib.import_module(module_name), attribute)()
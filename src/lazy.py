@@ -0,0 +1,35 @@
+import importlib
+import threading
+
+
+class LazyImports:
+    """Defers heavy client imports until first use.
+
+    Registered names resolve through the owning module's namespace, so once
+    loaded (or replaced with `unittest.mock.patch`) they behave like ordinary
+    module attributes. Assign `module_getattr` to the module's `__getattr__`
+    to make `module.NAME` work before the first `resolve()`.
+    """
+
+    def __init__(self, namespace: dict, **targets):
+        self._namespace = namespace
+        self._targets = targets
+        self._lock = threading.Lock()
+
+    def resolve(self, name: str):
+        """Return the object registered as `name`, importing it if needed"""
+        try:
+            return self._namespace[name]
+        except KeyError:
+            pass
+        module_name, _, attribute = self._targets[name].partition(":")
+        with self._lock:
+            value = importlib.import_module(module_name)
+            if attribute:
+                value = getattr(value, attribute)
+            return self._namespace.setdefault(name, value)
+
+    def module_getattr(self, name: str):
+        if name not in self._targets:
+            raise AttributeError(f"module {self._namespace['__name__']!r} has no attribute {name!r}")
+        return self.resolve(name)
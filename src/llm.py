@@ -1,51 +1,369 @@
 import os
-import ollama
-import openai
-from openai import OpenAI
+import asyncio
+import threading
+from src.lazy import LazyImports
+from src.http_pool import shared_pools
+from src.metrics import LLM_PHASE_SECONDS, LLM_TOKENS
+from src.schemas import RESPONSE_SCHEMA
+
+# The client libraries are slow to import, so load them on first use
+_lazy = LazyImports(
+    globals(),
+    ollama="ollama",
+    openai="openai",
+    OpenAI="openai:OpenAI",
+    AsyncOpenAI="openai:AsyncOpenAI",
+    DefaultHttpxClient="openai:DefaultHttpxClient",
+    DefaultAsyncHttpxClient="openai:DefaultAsyncHttpxClient"
+)
+__getattr__ = _lazy.module_getattr
+
+OPENAI_SYSTEM_PROMPT = """Return ONLY JSON with these exact fields:
+{
+  "action": "create_issues",
+  "issues": [
+    {
+      "project": "TEST",  // Must be uppercase
+      "summary": "Task summary here"  // 5-255 characters
+    }
+  ]
+}
+Only if the command asks for them, issues may also set "description",
+"issuetype" (e.g. "Bug"), "priority" (e.g. "High"), "assignee" (username),
+"labels" and "components" (lists of names) and "fields" (other fields by name)."""
+
+# OpenAI models that accept response_format={"type": "json_object"}. Older
+# snapshots (gpt-4, gpt-4-0613, gpt-3.5-turbo-0613) reject it with a 400, so
+# any model not listed here gets no response_format at all.
+_OPENAI_JSON_MODELS = ("gpt-3.5-turbo", "gpt-4-turbo", "gpt-4-1106", "gpt-4-0125", "gpt-4o", "gpt-4.1",
+                       "gpt-5", "o1", "o3", "o4")
+_OPENAI_NO_JSON = ("o1-mini", "o1-preview")
+_OPENAI_OLD_SNAPSHOTS = ("-0301", "-0613")
+
+
+def default_structured(provider: str, model: str = None) -> str:
+    """The structured output mode used when none is configured for `provider`.
+
+    Ollama constrains any model to the schema. For OpenAI the json_schema
+    format only works with gpt-4o-2024-08-06, gpt-4o-mini and later models,
+    so it is opt-in; JSON mode is used where the model supports it.
+    """
+    if provider != "openai":
+        return "schema"
+    model = (model or "").lower()
+    if model.startswith(_OPENAI_JSON_MODELS) and not model.startswith(_OPENAI_NO_JSON) \
+            and not model.endswith(_OPENAI_OLD_SNAPSHOTS):
+        return "json"
+    return "off"
+
+
+class GenerationOptions:
+    """Output controls applied to every provider request.
+
+    `structured` is "schema" (constrain the reply to RESPONSE_SCHEMA), "json"
+    (any JSON object) or "off". Constrained replies skip deepseek-r1's
+    <think> section entirely. `stop` ends generation at the closing answer
+    tag and `max_tokens` caps the reply (0 = the backend's default).
+    """
+
+    modes = ("schema", "json", "off")
+
+    def __init__(self, structured: str = "schema", max_tokens: int = 2048, stop: tuple = ("</answer>",)):
+        if structured not in self.modes:
+            raise ValueError(f"Unsupported structured output mode: {structured}")
+        self.structured = structured
+        self.max_tokens = max_tokens
+        self.stop = list(stop)
+
+    @classmethod
+    def from_env(cls, provider: str = "ollama", model: str = None):
+        """Options for `provider`: <PROVIDER>_STRUCTURED_OUTPUT, else
+        LLM_STRUCTURED_OUTPUT, else "auto" (see default_structured)"""
+        structured = (
+            os.getenv(f"{provider.upper()}_STRUCTURED_OUTPUT") or os.getenv('LLM_STRUCTURED_OUTPUT') or 'auto'
+        ).strip().lower()
+        if structured == "auto":
+            structured = default_structured(provider, model)
+        return cls(
+            structured=structured,
+            max_tokens=int(os.getenv('LLM_MAX_TOKENS', '2048'))
+        )
+
+    def ollama(self, max_tokens: int = None) -> dict:
+        """Keyword arguments for ollama's chat(); `max_tokens` overrides the configured cap"""
+        options = {"stop": self.stop}
+        max_tokens = self.max_tokens if max_tokens is None else max_tokens
+        if max_tokens:
+            options["num_predict"] = max_tokens
+        kwargs = {"options": options}
+        if self.structured == "schema":
+            kwargs["format"] = RESPONSE_SCHEMA
+        elif self.structured == "json":
+            kwargs["format"] = "json"
+        return kwargs
+
+    def openai(self, max_tokens: int = None) -> dict:
+        """Keyword arguments for chat.completions.create(); `max_tokens` overrides the configured cap"""
+        kwargs = {"stop": self.stop}
+        max_tokens = self.max_tokens if max_tokens is None else max_tokens
+        if max_tokens:
+            kwargs["max_tokens"] = max_tokens
+        if self.structured == "schema":
+            kwargs["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "create_issues", "schema": RESPONSE_SCHEMA}
+            }
+        elif self.structured == "json":
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
 
 class BaseLLMProvider:
-    def chat(self, messages: list) -> dict:
+    name = "base"
+    model_name = None
+
+    def chat(self, messages: list, max_tokens: int = None) -> dict:
+        """Reply to `messages`; `max_tokens` overrides the configured cap for this request"""
         raise NotImplementedError("chat method not implemented")
 
+    def warmup(self):
+        """Prepare the backend for the first request; a no-op for hosted APIs"""
+
+    def stats(self) -> dict:
+        return {}
+
+    def _count_tokens(self, prompt_tokens, completion_tokens):
+        labels = (self.name, self.model_name or "")
+        LLM_TOKENS.inc(labels + ("prompt",), prompt_tokens)
+        LLM_TOKENS.inc(labels + ("completion",), completion_tokens)
+
+    async def achat(self, messages: list, max_tokens: int = None) -> dict:
+        """Async chat; providers without a native client fall back to a thread"""
+        return await asyncio.to_thread(self.chat, messages, max_tokens)
+
+    def stream(self, messages: list):
+        """Yield reply text as it is generated; joined, it equals the chat() content"""
+        yield self.chat(messages)['message']['content']
+
+    async def astream(self, messages: list):
+        """Yield reply text as it is generated; joined, it equals the chat() content"""
+        response = await self.achat(messages)
+        yield response['message']['content']
+
 class OllamaProvider(BaseLLMProvider):
-    def __init__(self, model_name: str):
+    """Chat with a local Ollama model.
+
+    Every request sends `keep_alive`, so Ollama keeps the model loaded for
+    that long after the latest request instead of unloading it when idle
+    for its default five minutes. `warmup()` loads it before the first command.
+    """
+    name = "ollama"
+    # A load_duration above this means the request paid for loading the model
+    cold_load_threshold = 0.5
+    _durations = (("load", "load_duration"), ("prompt_eval", "prompt_eval_duration"), ("eval", "eval_duration"))
+
+    def __init__(self, model_name: str, generation: GenerationOptions = None):
         self.model_name = model_name
-        self.client = ollama.Client(host=os.getenv('OLLAMA_HOST'))
+        self.host = os.getenv('OLLAMA_HOST')
+        self.keep_alive = os.getenv('OLLAMA_KEEP_ALIVE', '30m')
+        self.generation = generation or GenerationOptions.from_env("ollama")
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "cold_starts": 0, "prompt_tokens": 0, "eval_tokens": 0}
+        self._stats.update({f"{phase}_seconds": 0.0 for phase, _ in self._durations})
+        self.last = {}
+        self.client = _lazy.resolve("ollama").Client(host=self.host, **shared_pools().client_options("ollama"))
+        self._async_client = None
         models = self.client.list()
         available_models = [m["model"].lower() for m in models["models"]]
         if self.model_name.lower() not in available_models:
             raise ValueError(f"Model {model_name} not available in Ollama")
 
-    def chat(self, messages: list) -> dict:
-        return self.client.chat(
+    @property
+    def async_client(self):
+        # Created on first use so it binds to the event loop that awaits it
+        if self._async_client is None:
+            self._async_client = _lazy.resolve("ollama").AsyncClient(
+                host=self.host, **shared_pools().async_client_options("ollama")
+            )
+        return self._async_client
+
+    def warmup(self):
+        """Load the model with a one-token generation so the first command does not pay for it"""
+        self._record(self.client.chat(
+            model=self.model_name,
+            messages=[{"role": "user", "content": "ok"}],
+            options={"num_predict": 1},
+            keep_alive=self.keep_alive
+        ))
+
+    def chat(self, messages: list, max_tokens: int = None) -> dict:
+        response = self.client.chat(
             model=self.model_name,
-            messages=messages
+            messages=messages,
+            keep_alive=self.keep_alive,
+            **self.generation.ollama(max_tokens)
+        )
+        self._record(response)
+        return response
+
+    async def achat(self, messages: list, max_tokens: int = None) -> dict:
+        response = await self.async_client.chat(
+            model=self.model_name,
+            messages=messages,
+            keep_alive=self.keep_alive,
+            **self.generation.ollama(max_tokens)
+        )
+        self._record(response)
+        return response
+
+    def stream(self, messages: list):
+        for chunk in self.client.chat(
+            model=self.model_name,
+            messages=messages,
+            stream=True,
+            keep_alive=self.keep_alive,
+            **self.generation.ollama()
+        ):
+            content = chunk['message']['content']
+            if content:
+                yield content
+            if chunk.get('done'):
+                self._record(chunk)
+
+    async def astream(self, messages: list):
+        stream = await self.async_client.chat(
+            model=self.model_name,
+            messages=messages,
+            stream=True,
+            keep_alive=self.keep_alive,
+            **self.generation.ollama()
         )
+        async for chunk in stream:
+            content = chunk['message']['content']
+            if content:
+                yield content
+            if chunk.get('done'):
+                self._record(chunk)
+
+    def stats(self) -> dict:
+        """Totals of Ollama's timing metadata, plus the figures from the latest request"""
+        with self._stats_lock:
+            return {**self._stats, "keep_alive": self.keep_alive, "last": dict(self.last)}
+
+    def _record(self, response):
+        """Collect load/prompt-eval/eval durations (nanoseconds) from a final response"""
+        try:
+            values = {key: response.get(key) for key in
+                      ("load_duration", "prompt_eval_duration", "eval_duration", "prompt_eval_count", "eval_count")}
+        except AttributeError:
+            return
+        if not isinstance(values["eval_duration"], int):
+            return
+        last = {f"{phase}_seconds": (values[key] or 0) / 1e9 for phase, key in self._durations}
+        last["prompt_tokens"] = values["prompt_eval_count"] or 0
+        last["eval_tokens"] = values["eval_count"] or 0
+        last["cold"] = last["load_seconds"] > self.cold_load_threshold
+        with self._stats_lock:
+            self.last = last
+            self._stats["requests"] += 1
+            self._stats["cold_starts"] += last["cold"]
+            for key, value in last.items():
+                if key != "cold":
+                    self._stats[key] += value
+        for phase, _ in self._durations:
+            LLM_PHASE_SECONDS.observe(last[f"{phase}_seconds"], (phase, self.model_name))
+        self._count_tokens(last["prompt_tokens"], last["eval_tokens"])
 
 class OpenAIProvider(BaseLLMProvider):
-    def __init__(self):
+    name = "openai"
+
+    def __init__(self, generation: GenerationOptions = None):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY must be set for OpenAI API")
-        self.client = OpenAI(api_key=api_key)
-
-    def chat(self, messages: list) -> dict:
-        system_prompt = """Return ONLY JSON with these exact fields:
-        {
-          "action": "create_issues",
-          "issues": [
-            {
-              "project": "TEST",  // Must be uppercase
-              "summary": "Task summary here"  // 5-255 characters
-            }
-          ]
-        }"""
-        messages.insert(0, {"role": "system", "content": system_prompt})
-        response = self.client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL"),
-            messages=messages,
-            temperature=0
+        self.api_key = api_key
+        self.model_name = os.getenv("OPENAI_MODEL")
+        self.client = _lazy.resolve("OpenAI")(
+            api_key=api_key,
+            http_client=_lazy.resolve("DefaultHttpxClient")(**shared_pools().client_options("openai"))
         )
+        self._async_client = None
+        self.generation = generation or GenerationOptions.from_env("openai", self.model_name)
+        self._usage_lock = threading.Lock()
+        self._usage = {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self.last = {}
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = _lazy.resolve("AsyncOpenAI")(
+                api_key=self.api_key,
+                http_client=_lazy.resolve("DefaultAsyncHttpxClient")(**shared_pools().async_client_options("openai"))
+            )
+        return self._async_client
+
+    def chat(self, messages: list, max_tokens: int = None) -> dict:
+        response = self.client.chat.completions.create(**self._request(messages, max_tokens))
+        self._record(response.usage)
+        return self._wrap(response)
+
+    async def achat(self, messages: list, max_tokens: int = None) -> dict:
+        response = await self.async_client.chat.completions.create(**self._request(messages, max_tokens))
+        self._record(response.usage)
+        return self._wrap(response)
+
+    def stream(self, messages: list):
+        stream = self.client.chat.completions.create(**self._stream_request(messages))
+        yield "<answer>"
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if getattr(chunk, "usage", None):
+                self._record(chunk.usage)
+        yield "</answer>"
+
+    async def astream(self, messages: list):
+        stream = await self.async_client.chat.completions.create(**self._stream_request(messages))
+        yield "<answer>"
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if getattr(chunk, "usage", None):
+                self._record(chunk.usage)
+        yield "</answer>"
+
+    def stats(self) -> dict:
+        with self._usage_lock:
+            return {**self._usage, "last": dict(self.last)}
+
+    def _request(self, messages: list, max_tokens: int = None) -> dict:
+        # The agent already sends the system prompt; only add one when the caller did not
+        if not any(message.get("role") == "system" for message in messages):
+            messages = [{"role": "system", "content": OPENAI_SYSTEM_PROMPT}, *messages]
+        return {
+            "model": self.model_name,
+            "messages": messages,
+            "temperature": 0,
+            **self.generation.openai(max_tokens)
+        }
+
+    def _stream_request(self, messages: list) -> dict:
+        # The final chunk then carries the token usage, with no choices
+        return {**self._request(messages), "stream": True, "stream_options": {"include_usage": True}}
+
+    def _record(self, usage):
+        """Count prompt and completion tokens from a response's usage block"""
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        if not isinstance(prompt_tokens, int) or not isinstance(completion_tokens, int):
+            return
+        with self._usage_lock:
+            self.last = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+            self._usage["requests"] += 1
+            self._usage["prompt_tokens"] += prompt_tokens
+            self._usage["completion_tokens"] += completion_tokens
+        self._count_tokens(prompt_tokens, completion_tokens)
+
+    def _wrap(self, response) -> dict:
         content = response.choices[0].message.content
         wrapped_content = f"<answer>{content}</answer>"
         return {'message': {'content': wrapped_content}}
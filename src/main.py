@@ -1,14 +1,44 @@
 import os
+import sys
 import json
-import re
+import time
+import argparse
+import asyncio
 import logging
-from jira import JIRA
+from collections import deque
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from src.schemas import validate_action
+from src.createmeta import CreateMetaCache, fetch_createmeta, plain_fields
+from src.dedupe import DuplicateIndex
+from src.fast_path import FastPathParser
+from src.http_pool import shared_pools
+from src.jira_backend import create_backend
+from src.lazy import LazyImports
+from src.micro_batch import CommandBatcher
+from src.metrics import JIRA_ERRORS, PARSE_FAILURES, CommandTimer
+from src.policy import PolicyEngine, PolicyViolation
+from src.schemas import validate_actions
 from src.llm import OllamaProvider, OpenAIProvider
+from src.projects import ProjectCache
+from src.rate_limit import RateLimitedError, SQLiteTokenBucket, TokenBucket, WriteScheduler
+from src.response_cache import ResponseCache
+from src.routing import RoutingProvider
+from src.sessions import SessionStore, refers_back
+from src.stream_parser import IssueStreamParser
 
 load_dotenv()
 
+# jira is slow to import; load it when the first client is created
+_lazy = LazyImports(
+    globals(),
+    JIRA="jira:JIRA",
+    RequestsConnectionError="requests.exceptions:ConnectionError",
+    RequestException="requests.exceptions:RequestException",
+    ConnectTimeoutError="urllib3.exceptions:ConnectTimeoutError"
+)
+__getattr__ = _lazy.module_getattr
+
 DEEPSEEK_SYSTEM_PROMPT = """Return ONLY JSON with these exact fields:
 {
   "action": "create_issues",
@@ -18,140 +48,940 @@ DEEPSEEK_SYSTEM_PROMPT = """Return ONLY JSON with these exact fields:
       "summary": "Task summary here"  // 5-255 characters
     }
   ]
-}"""
+}
+Only if the command asks for them, issues may also set "description",
+"issuetype" (e.g. "Bug"), "priority" (e.g. "High"), "assignee" (username),
+"labels" and "components" (lists of names) and "fields" (other fields by name)."""
+
+def _never_sent(error) -> bool:
+    """True if a failed write certainly did not reach Jira: the endpoint does
+    not exist (404/405 from servers without bulk create) or no connection was made"""
+    if getattr(error, "status_code", None) in (404, 405):
+        return True
+    if isinstance(error, _lazy.resolve("RequestsConnectionError")):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, _lazy.resolve("ConnectTimeoutError"))
+    return False
+
+
+def _outcome_unknown(error) -> bool:
+    """True if a failed write may still have been applied: a gateway error or
+    a request that was sent but got no answer (e.g. a read timeout)"""
+    if _never_sent(error):
+        return False
+    if getattr(error, "status_code", None) in (502, 504):
+        return True
+    return isinstance(error, _lazy.resolve("RequestException"))
+
 
 class JiraAgent:
-    def __init__(self, dry_run: bool = False):
+    """Natural-language front end for Jira.
+
+    Construction is cheap: the Jira client and LLM provider are created on
+    first use, or up front and concurrently by `warmup()`/`start_warmup()`.
+    """
+
+    def __init__(self, dry_run: bool = False, bulk_create: bool = None):
         self.dry_run = dry_run
-        self._init_jira()
-        self._init_llm()
+        if bulk_create is None:
+            bulk_create = os.getenv('JIRA_BULK_CREATE', 'false').strip().lower() == 'true'
+        self.bulk_create = bulk_create
+        self.bulk_chunk_size = int(os.getenv('JIRA_BULK_CHUNK_SIZE', '50'))
+        self.stream_pipeline = os.getenv('LLM_STREAM_PIPELINE', 'false').strip().lower() == 'true'
+        self.log_timings = os.getenv('METRICS_LOG_TIMINGS', 'false').strip().lower() == 'true'
+        self.llm_warmup = os.getenv('LLM_WARMUP', 'true').strip().lower() == 'true'
+        self.warmup_retry_max = float(os.getenv('WARMUP_RETRY_MAX', '60'))
+        # Simple, fully structured commands skip the LLM (see src/fast_path.py)
+        fast_path = os.getenv('FAST_PATH_PARSER', 'true').strip().lower() == 'true'
+        self.fast_path = FastPathParser() if fast_path else None
+        self._jira = None
+        self._llm = None
+        self._jira_lock = threading.Lock()
+        self._llm_lock = threading.Lock()
+        self.status = {"jira": "pending", "llm": "pending"}
+        self.projects = ProjectCache(
+            self._load_projects,
+            ttl=float(os.getenv('PROJECT_CACHE_TTL', '300'))
+        )
+        self.default_issue_type = os.getenv('JIRA_DEFAULT_ISSUE_TYPE', 'Task')
+        self.createmeta = self._init_createmeta()
+        # Commands and the actions extracted from them pass through src/policy.py
+        self.policy = PolicyEngine.from_env()
+        self._init_cache()
+        self.batcher = self._init_batcher()
+        self.sessions = SessionStore(
+            max_sessions=int(os.getenv('SESSION_MAX', '1000')),
+            idle_ttl=float(os.getenv('SESSION_IDLE_TTL', '1800')),
+            token_budget=int(os.getenv('SESSION_TOKEN_BUDGET', '1000')),
+            max_turns=int(os.getenv('SESSION_MAX_TURNS', '6'))
+        )
+        self.session_history = os.getenv('SESSION_HISTORY', 'auto').strip().lower()
+        if self.session_history not in ('auto', 'always'):
+            raise ValueError(f"Unsupported SESSION_HISTORY: {self.session_history}")
+        self.writes = self._init_scheduler()
+        self.duplicates = self._init_duplicates()
         self.logger = logging.getLogger(__name__)
         logging.basicConfig(level=logging.INFO)
 
+    @property
+    def jira(self):
+        if self._jira is None:
+            with self._jira_lock:
+                if self._jira is None:
+                    self._jira = self._connect("jira", self._init_jira)
+        return self._jira
+
+    @jira.setter
+    def jira(self, client):
+        self._jira = client
+        self.status["jira"] = "ready"
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = self._connect("llm", self._init_llm)
+        return self._llm
+
+    @llm.setter
+    def llm(self, provider):
+        self._llm = provider
+        self.status["llm"] = "ready"
+
+    def _connect(self, component: str, factory):
+        try:
+            client = factory()
+        except Exception as e:
+            self.status[component] = f"error: {str(e)}"
+            raise
+        self.status[component] = "ready"
+        return client
+
     def _init_jira(self):
-        """Initialize JIRA connection with validation"""
+        """Initialize JIRA connection with validation.
+
+        JIRA_BACKEND=memory swaps in src.jira_backend.InMemoryJira, so dry
+        runs, tests and load tests need no Jira server at all.
+        """
+        backend = os.getenv('JIRA_BACKEND', 'live').strip()
+        if backend != 'live':
+            return create_backend(backend)
+        pools = shared_pools()
         try:
-            self.jira = JIRA(
+            client = _lazy.resolve("JIRA")(
                 server=os.getenv('JIRA_SERVER'),
                 basic_auth=(
                     os.getenv('JIRA_USER'),
                     os.getenv('JIRA_TOKEN')
-                )
+                ),
+                # Writes are retried by the WriteScheduler and reads by the
+                # shared pool's adapter; the client's own retry loop would
+                # retry creates too, doubling every Retry-After
+                max_retries=0,
+                timeout=(pools.settings.connect_timeout, pools.settings.read_timeout)
             )
-            _ = self.jira.projects()
         except Exception as e:
             raise ConnectionError(f"JIRA connection failed: {str(e)}")
+        # Every agent in the process writes through one keep-alive pool
+        pools.mount(client._session)
+        return client
         
     def _init_llm(self):
-        """Initialize LLM client based on selected provider"""
-        provider = os.getenv("LLM_PROVIDER", "deepseek").lower()
+        """Initialize LLM client based on selected provider.
+
+        A comma-separated LLM_PROVIDER (e.g. "deepseek,openai") routes each
+        request to the fastest healthy backend; backends that fail to start
+        are left out as long as one remains.
+        """
+        names = [name.strip() for name in os.getenv("LLM_PROVIDER", "deepseek").lower().split(",") if name.strip()]
+        if len(names) <= 1:
+            try:
+                return self._make_provider(names[0] if names else "deepseek")
+            except Exception as e:
+                raise ConnectionError(f"LLM initialization failed: {str(e)}")
+
+        providers, errors = [], []
+        for name in names:
+            try:
+                providers.append(self._make_provider(name))
+            except Exception as e:
+                errors.append(f"{name}: {str(e)}")
+        if not providers:
+            raise ConnectionError(f"LLM initialization failed: {'; '.join(errors)}")
+        for error in errors:
+            self.logger.warning(f"LLM backend unavailable, routing without it: {error}")
+        hedge_delay = os.getenv("LLM_HEDGE_DELAY")
+        return RoutingProvider(
+            providers,
+            hedge_delay=float(hedge_delay) if hedge_delay else None,
+            hedge_budget=float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))
+        )
+
+    @staticmethod
+    def _make_provider(provider: str):
         if provider == "openai":
-            self.llm = OpenAIProvider()
+            return OpenAIProvider()
         elif provider == "llama":
-            self.llm = OllamaProvider(model_name="llama-model")
+            return OllamaProvider(model_name="llama-model")
         else:
-            self.llm = OllamaProvider(model_name="deepseek-r1:14b")
+            return OllamaProvider(model_name="deepseek-r1:14b")
+
+    def warmup(self, components: tuple = ("jira", "llm")) -> dict:
+        """Connect to Jira (loading the project index) and the LLM concurrently"""
+        def warm_jira():
+            self.projects.refresh()
+
+        def warm_llm():
+            llm = self.llm
+            if self.llm_warmup:
+                try:
+                    llm.warmup()
+                except Exception as e:
+                    # Reachable but not preloaded: the first command pays the load instead
+                    self.logger.warning(f"LLM warmup generation failed: {str(e)}")
 
-    def process_command(self, command: str) -> str:
-        """Process user command with validation pipeline"""
-        if self._is_dangerous_command(command):
-            return "Blocked: Command contains restricted keywords"
-            
+        warmers = {"jira": warm_jira, "llm": warm_llm}
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="warmup") as pool:
+            futures = {component: pool.submit(warmers[component]) for component in components}
+        for component, future in futures.items():
+            error = future.exception()
+            if error is not None:
+                self.status[component] = f"error: {str(error)}"
+                self.logger.warning(f"Warmup of {component} failed: {str(error)}")
+        return self.readiness()
+
+    def start_warmup(self) -> threading.Thread:
+        """Run warmup() in the background and return immediately; whatever
+        fails is retried with backoff (up to WARMUP_RETRY_MAX seconds apart)
+        until everything is ready"""
+        thread = threading.Thread(target=self._warmup_until_ready, name="agent-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def _warmup_until_ready(self):
+        readiness = self.warmup()
+        delay = 1.0
+        while not readiness["ready"]:
+            time.sleep(delay)
+            delay = min(delay * 2, self.warmup_retry_max)
+            failed = tuple(component for component, state in self.status.items() if state != "ready")
+            readiness = self.warmup(failed) if failed else self.readiness()
+
+    def readiness(self) -> dict:
+        return {
+            "ready": all(state == "ready" for state in self.status.values()),
+            **self.status
+        }
+
+    def _load_projects(self) -> list:
+        projects = self.jira.projects()
+        # Any successful refresh, including one a command triggers, clears an
+        # earlier warmup failure
+        self.status["jira"] = "ready"
+        return projects
+
+    def _init_cache(self):
+        """Initialize the LLM response cache"""
+        self.response_cache = ResponseCache(
+            max_size=int(os.getenv('LLM_CACHE_SIZE', '256')),
+            ttl=float(os.getenv('LLM_CACHE_TTL', '3600')),
+            path=os.getenv('LLM_CACHE_PATH') or None
+        )
+
+    def _init_batcher(self):
+        """Combine concurrent commands into one LLM request when LLM_BATCH_WINDOW is set"""
+        window = float(os.getenv('LLM_BATCH_WINDOW', '0'))
+        if window <= 0:
+            return None
+        return CommandBatcher(
+            lambda messages, **options: self.llm.chat(messages, **options),
+            self._build_messages,
+            window=window,
+            max_size=int(os.getenv('LLM_BATCH_SIZE', '8')),
+            max_inflight=int(os.getenv('LLM_BATCH_INFLIGHT') or os.getenv('COMMAND_WORKERS', '4')),
+            max_tokens=int(os.getenv('LLM_MAX_TOKENS', '2048'))
+        )
+
+    def _init_scheduler(self) -> WriteScheduler:
+        """Pace Jira writes; JIRA_RATE_LIMIT_PATH shares the budget across processes"""
+        rate = float(os.getenv('JIRA_WRITE_RATE', '0'))
+        burst = float(os.getenv('JIRA_WRITE_BURST', '0')) or None
+        path = os.getenv('JIRA_RATE_LIMIT_PATH') or None
+        if path:
+            limiter = SQLiteTokenBucket(path, rate, burst=burst)
+        else:
+            limiter = TokenBucket(rate, burst=burst)
+        return WriteScheduler(
+            limiter,
+            max_concurrency=int(os.getenv('JIRA_WRITE_CONCURRENCY', '1')),
+            max_retries=int(os.getenv('JIRA_WRITE_RETRIES', '3'))
+        )
+
+    def _init_createmeta(self):
+        """Per-project create metadata used to check issue types and fields locally"""
+        if os.getenv('JIRA_FIELD_VALIDATION', 'true').strip().lower() != 'true':
+            return None
+        return CreateMetaCache(
+            lambda project: fetch_createmeta(self.jira, project),
+            ttl=float(os.getenv('CREATEMETA_CACHE_TTL', '3600')),
+            default_type=self.default_issue_type
+        )
+
+    def _init_duplicates(self):
+        """Near-duplicate index checked before each create; DUPLICATE_MODE=off disables it"""
+        self.duplicate_mode = os.getenv('DUPLICATE_MODE', 'off').strip().lower()
+        if self.duplicate_mode not in ('off', 'warn', 'skip', 'force'):
+            raise ValueError(f"Unsupported DUPLICATE_MODE: {self.duplicate_mode}")
+        if self.duplicate_mode == 'off':
+            return None
+        self.duplicate_lookback_days = int(os.getenv('DUPLICATE_LOOKBACK_DAYS', '30'))
+        return DuplicateIndex(
+            search=self._search_recent,
+            threshold=float(os.getenv('DUPLICATE_THRESHOLD', '0.8')),
+            max_per_project=int(os.getenv('DUPLICATE_INDEX_SIZE', '5000')),
+            refresh_interval=float(os.getenv('DUPLICATE_REFRESH_INTERVAL', '300')),
+            initial_sync_wait=float(os.getenv('DUPLICATE_INITIAL_SYNC_WAIT', '5'))
+        )
+
+    def _search_recent(self, project: str, since: float = None):
+        """Yield (key, summary) for issues in `project` updated since `since`, or within the lookback window"""
+        if since is None:
+            updated = f"-{self.duplicate_lookback_days}d"
+        else:
+            # Relative to Jira's clock, so neither our time zone nor the Jira
+            # user's matters; minute resolution, so overlap rather than miss
+            updated = f"-{int(time.time() - since) // 60 + 2}m"
+        jql = f'project = "{project}" AND updated >= "{updated}" ORDER BY updated DESC'
+        start = 0
+        while True:
+            page = self.jira.search_issues(jql, startAt=start, maxResults=100, fields="summary")
+            for issue in page:
+                yield issue.key, issue.fields.summary
+            if len(page) < 100:
+                return
+            start += len(page)
+
+    def process_command(self, command: str, session_id: str = None) -> str:
+        """Process user command with validation pipeline.
+
+        With a `session_id`, recent turns of that session are sent along so
+        follow-up commands can refer to earlier ones.
+        """
+        return self.process_command_with_timings(command, session_id)[0]
+
+    def process_command_with_timings(self, command: str, session_id: str = None) -> tuple:
+        """process_command, also returning the CommandTimer (outcome and per-stage timings)"""
+        timer = self.command_timer()
+        blocked = self._check_command(command)
+        if blocked:
+            timer.finish("blocked")
+            return blocked, timer
+
+        conversation, history = self._session(session_id, command)
         try:
-            response = self.llm.chat([
-                {"role": "system", "content": DEEPSEEK_SYSTEM_PROMPT},
-                {"role": "user", "content": command}
-            ])
-            
-            response_data = self._parse_response(response)
-            actions = self._extract_actions(response_data)
-            return self._execute_actions(actions)
-            
-        except json.JSONDecodeError as jde:
-            return f"Error: Invalid JSON format - {str(jde)}"
-        except ValueError as ve:
-            return f"Validation Error: {str(ve)}"
-        except KeyError as ke:
-            return f"Configuration Error: {str(ke)}"
+            actions = self._fast_path_actions(command, timer)
+            if actions is not None:
+                with timer.stage("jira"):
+                    result = self._execute_actions(actions)
+            elif self.stream_pipeline:
+                result = self._process_streaming(command, timer, history)
+            else:
+                cache_key = self._cache_key(command, history)
+                response = self.response_cache.get(cache_key)
+                cached = response is not None
+                if not cached:
+                    with timer.stage("llm"):
+                        response = self._chat(command, history, session_id)
+                actions = self._timed_actions(response, timer)
+                if not cached:
+                    self.response_cache.put(cache_key, response)
+                with timer.stage("jira"):
+                    result = self._execute_actions(actions)
+        except Exception as e:
+            timer.finish(self._outcome(e))
+            result = self._format_error(e)
+        else:
+            timer.finish()
+        if conversation is not None:
+            conversation.record(command, result)
+        return result, timer
+
+    async def aprocess_command(self, command: str, session_id: str = None) -> str:
+        """Async variant of process_command; the LLM call shares the event loop"""
+        blocked = self._check_command(command)
+        if blocked:
+            self.command_timer().finish("blocked")
+            return blocked
+
+        if self.stream_pipeline:
+            async for event, data in self.astream_command(command, session_id=session_id):
+                if event in ("done", "error"):
+                    return data
+
+        conversation, history = self._session(session_id, command)
+        timer = self.command_timer()
+        try:
+            actions = self._fast_path_actions(command, timer)
+            if actions is None:
+                cache_key = self._cache_key(command, history)
+                response = self.response_cache.get(cache_key)
+                cached = response is not None
+                if not cached:
+                    with timer.stage("llm"):
+                        response = await self._achat(command, history, session_id)
+                actions = self._timed_actions(response, timer)
+                if not cached:
+                    self.response_cache.put(cache_key, response)
+            # The Jira client is synchronous, so writes run in a worker thread
+            with timer.stage("jira"):
+                result = await asyncio.to_thread(self._execute_actions, actions)
+        except Exception as e:
+            timer.finish(self._outcome(e))
+            result = self._format_error(e)
+        else:
+            timer.finish()
+        if conversation is not None:
+            conversation.record(command, result)
+        return result
+
+    async def astream_command(self, command: str, timer: CommandTimer = None, session_id: str = None):
+        """Yield (event, data) pairs as tokens arrive and each issue is processed.
+
+        Each issue is validated and written as soon as its JSON object is
+        complete, so Jira writes overlap with the rest of the generation.
+        Pass `timer` to read the per-stage timings afterwards.
+        """
+        blocked = self._check_command(command)
+        if blocked:
+            (timer or self.command_timer()).finish("blocked")
+            yield "error", blocked
+            return
+
+        conversation, history = self._session(session_id, command)
+        async for event, data in self._astream_events(command, timer, history):
+            if conversation is not None and event in ("done", "error"):
+                conversation.record(command, data)
+            yield event, data
+
+    async def _astream_events(self, command: str, timer: CommandTimer, history: list):
+        timer = timer or self.command_timer()
+        execute_action = timer.timed("jira", self._execute_action)
+        execute_bulk = timer.timed("jira", self._execute_bulk)
+        pending = deque()
+        try:
+            actions = self._fast_path_actions(command, timer)
+            if actions is not None:
+                for action in actions:
+                    yield "validated", {"project": action['project'], "summary": action['summary']}
+                result = await asyncio.to_thread(timer.timed("jira", self._execute_actions), actions)
+                for line in result.split("\n"):
+                    yield "issue", line
+                timer.finish()
+                yield "done", result
+                return
+
+            cache_key = self._cache_key(command, history)
+            response = self.response_cache.get(cache_key)
+            cached = response is not None
+            parser = IssueStreamParser()
+            chunks = []
+            batch = []
+            results = []
+
+            def schedule(issues):
+                actions = self._prepare_actions(issues, parser.action)
+                for action in actions:
+                    if self.bulk_create:
+                        batch.append(action)
+                    else:
+                        # The Jira client is synchronous, so writes run in a worker thread
+                        pending.append(asyncio.ensure_future(asyncio.to_thread(execute_action, action)))
+                return actions
+
+            if cached:
+                tokens = self._replay(response['message']['content'])
+            else:
+                tokens = self.llm.astream(self._build_messages(command, history))
+            # Parsing and validation are interleaved with generation here,
+            # so the "llm" stage covers the whole token loop
+            with timer.stage("llm"):
+                async for token in tokens:
+                    chunks.append(token)
+                    yield "token", token
+                    for action in schedule(self._feed(parser, token)):
+                        yield "validated", {"project": action['project'], "summary": action['summary']}
+                    while pending and pending[0].done():
+                        line = pending.popleft().result()
+                        results.append(line)
+                        yield "issue", line
+            with timer.stage("parse"):
+                closing = schedule(self._feed(parser))
+            for action in closing:
+                yield "validated", {"project": action['project'], "summary": action['summary']}
+            if not cached:
+                self.response_cache.put(cache_key, {'message': {'content': "".join(chunks)}})
+
+            if self.bulk_create:
+                results = (await asyncio.to_thread(execute_bulk, batch)).split("\n")
+                for line in results:
+                    yield "issue", line
+            while pending:
+                line = await pending.popleft()
+                results.append(line)
+                yield "issue", line
+            timer.finish()
+            yield "done", "\n".join(results)
         except Exception as e:
-            self.logger.error(f"System Error: {str(e)}", exc_info=True)
-            return f"System Error: {str(e)}"
+            # Report writes that were already in flight before the failure
+            while pending:
+                try:
+                    yield "issue", await pending.popleft()
+                except Exception:
+                    pass
+            timer.finish(self._outcome(e))
+            yield "error", self._format_error(e)
+
+    def _process_streaming(self, command: str, timer: CommandTimer, history: list = ()) -> str:
+        """Sync counterpart of astream_command's overlapped validate-and-write loop"""
+        execute_action = timer.timed("jira", self._execute_action)
+        cache_key = self._cache_key(command, history)
+        response = self.response_cache.get(cache_key)
+        cached = response is not None
+        if cached:
+            tokens = [response['message']['content']]
+        else:
+            tokens = self.llm.stream(self._build_messages(command, history))
+        parser = IssueStreamParser()
+        chunks = []
+        batch = []
+        futures = []
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            def schedule(issues):
+                for action in self._prepare_actions(issues, parser.action):
+                    if self.bulk_create:
+                        batch.append(action)
+                    else:
+                        futures.append(writer.submit(execute_action, action))
+
+            with timer.stage("llm"):
+                for token in tokens:
+                    chunks.append(token)
+                    schedule(self._feed(parser, token))
+            with timer.stage("parse"):
+                schedule(self._feed(parser))
+            if not cached:
+                self.response_cache.put(cache_key, {'message': {'content': "".join(chunks)}})
+            if self.bulk_create:
+                with timer.stage("jira"):
+                    return self._execute_bulk(batch)
+            return "\n".join(future.result() for future in futures)
+
+    @staticmethod
+    async def _replay(content: str):
+        yield content
+
+    def _session(self, session_id: str, command: str) -> tuple:
+        """The session's Conversation (or None) and the history to send with `command`.
+
+        With SESSION_HISTORY=auto, history goes only with commands that refer
+        to earlier turns; the rest stay cacheable and batchable.
+        """
+        conversation = self.sessions.get(session_id) if session_id else None
+        if conversation is None or (self.session_history == 'auto' and not refers_back(command)):
+            return conversation, []
+        return conversation, conversation.history()
+
+    def _chat(self, command: str, history: list = (), session_id: str = None) -> dict:
+        # Batched prompts carry no per-session history, and only commands of
+        # the same session share one
+        if self.batcher is not None and not history:
+            return self.batcher.submit(command, domain=session_id)
+        return self.llm.chat(self._build_messages(command, history))
+
+    async def _achat(self, command: str, history: list = (), session_id: str = None) -> dict:
+        if self.batcher is not None and not history:
+            return await self.batcher.asubmit(command, domain=session_id)
+        return await self.llm.achat(self._build_messages(command, history))
+
+    def _build_messages(self, command: str, history: list = ()) -> list:
+        return [
+            {"role": "system", "content": DEEPSEEK_SYSTEM_PROMPT},
+            *history,
+            {"role": "user", "content": command}
+        ]
+
+    def command_timer(self) -> CommandTimer:
+        """New CommandTimer labelled with this agent's provider and model"""
+        return CommandTimer(self._metric_labels, log_timings=self.log_timings)
+
+    def _metric_labels(self) -> tuple:
+        # Read _llm directly: labelling a metric must never trigger LLM initialization
+        llm = self._llm
+        if llm is None:
+            return ("unknown", "unknown")
+        return (llm.name, llm.model_name or "unknown")
+
+    def _fast_path_actions(self, command: str, timer: CommandTimer):
+        """Actions for a command the rule-based parser understands, else None"""
+        if self.fast_path is None:
+            return None
+        start = time.perf_counter()
+        actions = self.fast_path.parse(command)
+        if actions is not None and any(action['project'] not in self.projects for action in actions):
+            # Probably not a project key after all; let the LLM read it
+            return None
+        if actions is not None:
+            self.policy.check_actions(actions)
+            # Only hits count as the parse stage; a miss costs microseconds
+            timer.labels = lambda: ("fast_path", "none")
+            timer.record("parse", time.perf_counter() - start)
+        return actions
+
+    def _timed_actions(self, response: dict, timer: CommandTimer) -> list:
+        with timer.stage("parse"):
+            response_data = self._parse_response(response)
+        with timer.stage("validate"):
+            return self._extract_actions(response_data)
+
+    def _cache_key(self, command: str, history: list = ()) -> str:
+        # The same follow-up means something different after different turns
+        context = DEEPSEEK_SYSTEM_PROMPT + (json.dumps(history) if history else "")
+        return ResponseCache.make_key(command, self.llm.name, self.llm.model_name, context)
+
+    def _format_error(self, error: Exception) -> str:
+        """Map pipeline exceptions to user-facing messages"""
+        if isinstance(error, PolicyViolation):
+            return f"Blocked: {str(error)}"
+        if isinstance(error, json.JSONDecodeError):
+            return f"Error: Invalid JSON format - {str(error)}"
+        if isinstance(error, ValueError):
+            return f"Validation Error: {str(error)}"
+        if isinstance(error, KeyError):
+            return f"Configuration Error: {str(error)}"
+        if isinstance(error, RateLimitedError):
+            return f"Rate Limited: {str(error)}"
+        self.logger.error(f"System Error: {str(error)}", exc_info=error)
+        return f"System Error: {str(error)}"
+
+    @staticmethod
+    def _outcome(error: Exception) -> str:
+        return "blocked" if isinstance(error, PolicyViolation) else "error"
 
-    def _is_dangerous_command(self, command: str) -> bool:
-        """Check for potentially dangerous operations"""
-        BLACKLISTED_KEYWORDS = ['delete', 'drop', 'admin', 'password', 'token']
-        return any(kw in command.lower() for kw in BLACKLISTED_KEYWORDS)
+    def _check_command(self, command: str):
+        """The reply for a command the safety policy rejects, else None"""
+        try:
+            self.policy.check_command(command)
+        except PolicyViolation as e:
+            return f"Blocked: {str(e)}"
+        return None
 
     def _parse_response(self, response: dict) -> dict:
         """Parse and validate response structure"""
+        parser = IssueStreamParser()
+        self._feed(parser, response['message']['content'])
+        self._feed(parser)
+        return parser.document
+
+    @staticmethod
+    def _feed(parser: IssueStreamParser, chunk: str = None) -> list:
+        """parser.feed(chunk), or parser.close() and a check of the finished
+        document when `chunk` is None; every parse failure is counted here"""
         try:
-            content = response['message']['content']
-            answer_match = re.search(r'<answer>(.*?)</answer>', content, re.DOTALL)
-            if answer_match:
-                json_str = answer_match.group(1)
-            else:
-                json_match = re.search(r'({.*})', content, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                else:
-                    raise ValueError("No valid JSON found in response")
-            return json.loads(json_str)
-        except json.JSONDecodeError:
-            raise ValueError("Invalid JSON structure in LLM response")
+            if chunk is not None:
+                return parser.feed(chunk)
+            issues = parser.close()
+            if parser.document is None:
+                if parser.invalid:
+                    raise ValueError("Invalid JSON structure in LLM response")
+                raise ValueError("No valid JSON found in response")
+            if "issues" not in parser.document:
+                raise ValueError("Missing required field: 'issues'")
+            return issues
+        except ValueError:
+            PARSE_FAILURES.inc()
+            raise
 
     def _extract_actions(self, response_data: dict) -> list:
         """Extract and validate actions"""
         try:
             issues = response_data["issues"]
-            if "action" in response_data and response_data["action"] == "create_issues":
-                for issue in issues:
-                    issue["action"] = "create_issue"
+        except KeyError as e:
+            raise ValueError(f"Missing required field: {str(e)}")
+        return self._prepare_actions(issues, response_data.get("action"))
+
+    def _prepare_actions(self, issues: list, response_action: str = None) -> list:
+        """Normalize and validate issue objects into executable actions"""
+        try:
             for action in issues:
+                if response_action == "create_issues":
+                    action["action"] = "create_issue"
                 action["project"] = action["project"].upper()
-                validate_action(action)
-            return issues
         except KeyError as e:
             raise ValueError(f"Missing required field: {str(e)}")
+        validate_actions(issues)
+        self.policy.check_actions(issues)
+        return issues
 
     def _execute_actions(self, actions: list) -> str:
         """Execute validated JIRA actions"""
-        results = []
+        if self.bulk_create:
+            return self._execute_bulk(actions)
+        results = self.writes.map(self._execute_action, actions)
+        if all(isinstance(result, Exception) for result in results):
+            # Nothing was written; fail the command as a whole
+            raise results[0]
+        return "\n".join(
+            self._format_failure(action, str(result)) if isinstance(result, Exception) else result
+            for action, result in zip(actions, results)
+        )
+
+    def _execute_action(self, action: dict) -> str:
+        """Execute a single validated action"""
+        if action['action'] == 'create_issue':
+            if action['project'] not in self.projects:
+                raise ValueError(f"Project {action['project']} not found")
+            try:
+                fields = self._create_fields(action)
+            except ValueError as e:
+                return self._format_failure(action, str(e))
+            duplicate, reservation = self._find_duplicate(action)
+            if duplicate is not None and self.duplicate_mode == 'skip':
+                return self._format_skipped(action, duplicate)
+            try:
+                result = self._create_issue(action, fields, reservation)
+            except Exception as e:
+                if _outcome_unknown(e):
+                    # Jira may have created it; the reservation stays so a
+                    # resubmission is flagged as a duplicate
+                    self.logger.error(f"Create failed with an unknown outcome: {str(e)}")
+                    return self._format_failure(action, f"outcome unknown, check Jira before retrying ({str(e)})")
+                self._release_duplicate(action, reservation)
+                raise
+            return self._format_created(action, result, duplicate)
+        raise ValueError(f"Unsupported action: {action['action']}")
+
+    def _find_duplicate(self, action: dict) -> tuple:
+        """(key, similarity) of an indexed issue resembling the action or None,
+        and a reservation holding the summary until the create finishes, so a
+        concurrent identical command sees it (see DuplicateIndex.reserve)"""
+        if self.duplicates is None or action['project'] not in self.projects:
+            return None, None
+        if self.dry_run:
+            return self.duplicates.find(action['project'], action['summary']), None
+        duplicate, reservation = self.duplicates.reserve(action['project'], action['summary'])
+        if duplicate is not None and self.duplicate_mode == 'force':
+            self.logger.info(f"Creating {action['summary']!r} despite possible duplicate {duplicate[0]}")
+        return duplicate, reservation
+
+    def _release_duplicate(self, action: dict, reservation: str):
+        if self.duplicates is not None:
+            self.duplicates.release(action['project'], reservation)
+
+    def _index_created(self, project: str, key: str, summary: str, reservation: str = None):
+        if self.duplicates is not None:
+            self.duplicates.add(project, key, summary, reservation)
+
+    def _create_fields(self, action: dict) -> dict:
+        """Issue type and optional fields for a create, checked against the project's
+        create metadata when it is available (ValueError lists what Jira would reject)"""
+        rules = self.createmeta.get(action['project']) if self.createmeta is not None else None
+        if rules is None:
+            return plain_fields(action, self.default_issue_type)
+        return rules.build(action)
+
+    def _create_issue(self, action: dict, fields: dict, reservation: str = None) -> str:
+        """Create JIRA issue from a validated action and its _create_fields()"""
+        project = action['project']
+        if self.dry_run:
+            return f"[DRY RUN] Would create issue: {project}-???"
+        try:
+            issue = self.writes.call(
+                self.jira.create_issue,
+                project=project,
+                summary=action['summary'],
+                description=action.get('description', ''),
+                **fields
+            )
+        except Exception:
+            JIRA_ERRORS.inc()
+            raise
+        self._index_created(project, issue.key, action['summary'], reservation)
+        return f"Issue {issue.key} created successfully"
+
+    def _execute_bulk(self, actions: list) -> str:
+        """Create issues through the bulk endpoint, reporting each row separately"""
         for action in actions:
-            if action['action'] == 'create_issue':
-                result = self._create_issue(
-                    project=action['project'],
-                    summary=action['summary'],
-                    description=action.get('description', '')
+            if action['action'] != 'create_issue':
+                raise ValueError(f"Unsupported action: {action['action']}")
+
+        results = [None] * len(actions)
+        duplicates = [None] * len(actions)
+        reservations = [None] * len(actions)
+        fields = [None] * len(actions)
+        pending = []
+        for index, action in enumerate(actions):
+            if action['project'] not in self.projects:
+                results[index] = self._format_failure(action, f"Project {action['project']} not found")
+                continue
+            try:
+                fields[index] = self._create_fields(action)
+            except ValueError as e:
+                results[index] = self._format_failure(action, str(e))
+                continue
+            duplicates[index], reservations[index] = self._find_duplicate(action)
+            if duplicates[index] is not None and self.duplicate_mode == 'skip':
+                results[index] = self._format_skipped(action, duplicates[index])
+            elif self.dry_run:
+                results[index] = self._format_created(
+                    action, f"[DRY RUN] Would create issue: {action['project']}-???", duplicates[index]
                 )
-                results.append(f"Issue created: {action['project']} - {action['summary']} -> {result}")
             else:
-                raise ValueError(f"Unsupported action: {action['action']}")
+                pending.append(index)
+
+        for start in range(0, len(pending), self.bulk_chunk_size):
+            chunk = pending[start:start + self.bulk_chunk_size]
+            try:
+                outcomes = self.writes.call(
+                    self.jira.create_issues,
+                    field_list=[self._issue_fields(actions[i], fields[i]) for i in chunk],
+                    prefetch=False
+                )
+            except RateLimitedError as e:
+                # Falling back to one request per issue would only add load
+                JIRA_ERRORS.inc()
+                for index in chunk:
+                    self._release_duplicate(actions[index], reservations[index])
+                    results[index] = self._format_failure(actions[index], str(e))
+                continue
+            except Exception as e:
+                JIRA_ERRORS.inc()
+                if not _never_sent(e):
+                    # Jira may have created some or all of the chunk before
+                    # failing; creating it again one by one could duplicate them.
+                    # The reservations stay, so resubmitting is flagged as well.
+                    self.logger.error(f"Bulk create failed with an unknown outcome: {str(e)}")
+                    for index in chunk:
+                        results[index] = self._format_failure(
+                            actions[index], f"outcome unknown, check Jira before retrying ({str(e)})"
+                        )
+                    continue
+                self.logger.warning(f"Bulk create failed, falling back to single creates: {str(e)}")
+                for index in chunk:
+                    self._release_duplicate(actions[index], reservations[index])
+                    results[index] = self._create_single(actions[index])
+                continue
+            for index, outcome in zip(chunk, outcomes):
+                if outcome['status'] == 'Success':
+                    key = outcome['issue'].key
+                    self._index_created(actions[index]['project'], key, actions[index]['summary'], reservations[index])
+                    results[index] = self._format_created(
+                        actions[index], f"Issue {key} created successfully", duplicates[index]
+                    )
+                else:
+                    JIRA_ERRORS.inc()
+                    self._release_duplicate(actions[index], reservations[index])
+                    results[index] = self._format_failure(actions[index], outcome['error'])
         return "\n".join(results)
 
-    def _create_issue(self, project: str, summary: str, description: str) -> str:
-        """Create JIRA issue with validation"""
-        if not any(p.key == project for p in self.jira.projects()):
-            raise ValueError(f"Project {project} not found")
-        if self.dry_run:
-            return f"[DRY RUN] Would create issue: {project}-???"
-        issue = self.jira.create_issue(
-            project=project,
-            summary=summary,
-            description=description,
-            issuetype={'name': 'Task'}
+    def _create_single(self, action: dict) -> str:
+        """Per-issue fallback used when a bulk chunk cannot be sent"""
+        try:
+            return self._execute_action(action)
+        except Exception as e:
+            return self._format_failure(action, str(e))
+
+    def _issue_fields(self, action: dict, fields: dict) -> dict:
+        """Build bulk-create fields, using the cached project id to skip a lookup per row"""
+        return {
+            'project': {'id': self.projects.get(action['project']).id},
+            'summary': action['summary'],
+            'description': action.get('description', ''),
+            **fields
+        }
+
+    def _format_created(self, action: dict, result: str, duplicate: tuple = None) -> str:
+        line = f"Issue created: {action['project']} - {action['summary']} -> {result}"
+        if duplicate is not None and self.duplicate_mode == 'warn':
+            line += f" (possible duplicate of {duplicate[0]})"
+        return line
+
+    def _format_skipped(self, action: dict, duplicate: tuple) -> str:
+        key, similarity = duplicate
+        return f"Issue skipped: {action['project']} - {action['summary']} -> duplicate of {key} (similarity {similarity:.2f})"
+
+    def _format_failure(self, action: dict, error) -> str:
+        return f"Issue failed: {action['project']} - {action['summary']} -> {error}"
+
+def run_batch(agent: JiraAgent, args) -> dict:
+    """Run --batch input through the agent; see src/batch.py for the formats"""
+    from src.batch import BatchRunner, Checkpoint
+    source = sys.stdin if args.batch == "-" else open(args.batch)
+    # Resumed runs append to the earlier results instead of overwriting them
+    resuming = bool(args.checkpoint) and os.path.exists(args.checkpoint)
+    output = sys.stdout if args.output == "-" else open(args.output, "a" if resuming else "w")
+    try:
+        runner = BatchRunner(
+            agent, output,
+            workers=args.workers,
+            checkpoint=Checkpoint(args.checkpoint),
+            retry_interrupted=args.retry_interrupted
         )
-        return f"Issue {issue.key} created successfully"
+        return runner.run(source)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+def export_issues(agent: JiraAgent, path: str):
+    """Write the issues created on the in-memory Jira backend to `path`"""
+    export = getattr(agent._jira, "export", None)
+    if export is None:
+        print("--export-issues needs JIRA_BACKEND=memory; nothing written", file=sys.stderr)
+        return
+    export(path)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Natural-language Jira agent")
+    parser.add_argument("--batch", metavar="FILE", help="JSONL commands to run non-interactively ('-' for stdin)")
+    parser.add_argument("--output", default="-", help="where to write JSONL results (default: stdout)")
+    parser.add_argument("--workers", type=int, default=4, help="commands processed concurrently")
+    parser.add_argument("--checkpoint", help="progress file used to resume an interrupted batch")
+    parser.add_argument("--retry-interrupted", action="store_true",
+                        help="re-run commands that were in flight when a previous run stopped")
+    parser.add_argument("--dry-run", action="store_true", help="validate commands without creating issues")
+    parser.add_argument("--export-issues", metavar="FILE",
+                        help="with JIRA_BACKEND=memory, write the created issues to FILE as JSON on exit")
+    return parser.parse_args(argv)
 
 if __name__ == '__main__':
+    args = parse_args()
+    agent = None
     try:
-        agent = JiraAgent()
+        agent = JiraAgent(dry_run=args.dry_run)
+        readiness = agent.warmup()
+        if not readiness["ready"]:
+            failed = [f"{name}: {state}" for name, state in readiness.items() if name != "ready" and state != "ready"]
+            raise ConnectionError("; ".join(failed))
+        if args.batch:
+            counts = run_batch(agent, args)
+            print(f"Batch complete: {json.dumps(counts)}", file=sys.stderr)
+            sys.exit(0)
         print("JIRA Agent Ready (CTRL+C to exit)")
         while True:
             command = input("\nCommand: ")
             if command.lower() in ['exit', 'quit']:
                 break
-            print(f">> {agent.process_command(command)}")
+            if command.lower() == 'reset':
+                agent.sessions.drop("cli")
+                print(">> Conversation cleared")
+                continue
+            print(f">> {agent.process_command(command, session_id='cli')}")
     except KeyboardInterrupt:
         print("\nSession ended")
     except Exception as e:
         print(f"Fatal Error: {str(e)}")
+    finally:
+        if agent is not None and args.export_issues:
+            export_issues(agent, args.export_issues)
@@ -0,0 +1,199 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter, rendered in the Prometheus text format"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: tuple = ()) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram, rendered in the Prometheus text format"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += 1
+            series[2] += value
+
+    def count(self, labels: tuple = ()) -> int:
+        with self._lock:
+            series = self._series.get(labels)
+            return series[1] if series else 0
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, value_sum) in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    le = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                le = _format_labels(self.labelnames, labels, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{le} {total}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {value_sum}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {total}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "jira_agent_stage_seconds", "Time spent in each command processing stage",
+    ("stage", "provider", "model", "outcome")
+))
+COMMAND_SECONDS = REGISTRY.register(Histogram(
+    "jira_agent_command_seconds", "End-to-end command processing time",
+    ("provider", "model", "outcome")
+))
+BLOCKED_COMMANDS = REGISTRY.register(Counter(
+    "jira_agent_blocked_commands_total", "Commands rejected by the safety check"
+))
+PARSE_FAILURES = REGISTRY.register(Counter(
+    "jira_agent_parse_failures_total", "LLM replies that did not contain usable JSON"
+))
+JIRA_ERRORS = REGISTRY.register(Counter(
+    "jira_agent_jira_errors_total", "Failed Jira API calls"
+))
+JIRA_THROTTLED = REGISTRY.register(Counter(
+    "jira_agent_jira_throttled_total", "Jira writes answered with 429 Too Many Requests"
+))
+
+LLM_PHASE_SECONDS = REGISTRY.register(Histogram(
+    "jira_agent_llm_phase_seconds", "Model load, prompt evaluation and generation time reported by Ollama",
+    ("phase", "model")
+))
+
+LLM_TOKENS = REGISTRY.register(Counter(
+    "jira_agent_llm_tokens_total", "Prompt and completion tokens reported by the LLM backend",
+    ("provider", "model", "kind")
+))
+
+FAST_PATH_COMMANDS = REGISTRY.register(Counter(
+    "jira_agent_fast_path_total", "Commands checked against the rule-based parser, by result",
+    ("result",)
+))
+
+timing_logger = logging.getLogger("src.metrics.timings")
+
+
+class CommandTimer:
+    """Collects per-stage durations for one command and feeds the histograms.
+
+    `labels` is called when each observation is recorded, so provider and
+    model labels resolve once the LLM has been initialised.
+    """
+
+    def __init__(self, labels, log_timings: bool = False):
+        self.labels = labels
+        self._log_timings = log_timings
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.timings = {}
+        self.outcome = "ok"
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            self.record(name, time.perf_counter() - start, outcome)
+
+    def timed(self, name: str, fn):
+        """Wrap `fn` so each call is recorded as stage `name` (safe across threads)"""
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def finish(self, outcome: str = None):
+        if outcome is not None:
+            self.outcome = outcome
+        elapsed = time.perf_counter() - self._start
+        provider, model = self.labels()
+        COMMAND_SECONDS.observe(elapsed, (provider, model, self.outcome))
+        if self._log_timings:
+            timing_logger.info(json.dumps({
+                "provider": provider,
+                "model": model,
+                "outcome": self.outcome,
+                "total_ms": round(elapsed * 1000, 2),
+                "stages_ms": {k: round(v * 1000, 2) for k, v in self.timings.items()},
+            }))
+
+    def record(self, name: str, elapsed: float, outcome: str = "ok"):
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+        provider, model = self.labels()
+        STAGE_SECONDS.observe(elapsed, (name, provider, model, outcome))
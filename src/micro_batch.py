@@ -0,0 +1,173 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from src.stream_parser import IssueStreamParser
+
+BATCH_SYSTEM_PROMPT = """You receive a JSON list of commands, each with an "id".
+Return ONLY JSON with these exact fields:
+{
+  "action": "create_issues",
+  "issues": [
+    {
+      "id": "1",  // id of the command this issue comes from
+      "project": "TEST",  // Must be uppercase
+      "summary": "Task summary here"  // 5-255 characters
+    }
+  ]
+}
+Every command must produce at least one issue.
+Only if the command asks for them, issues may also set "description",
+"issuetype" (e.g. "Bug"), "priority" (e.g. "High"), "assignee" (username),
+"labels" and "components" (lists of names) and "fields" (other fields by name)."""
+
+
+class CommandBatcher:
+    """Groups commands arriving within `window` seconds into one LLM request.
+
+    `submit()` blocks until the caller's own reply is ready and returns it
+    in the same {'message': {'content': ...}} shape as `chat()`, holding only
+    that command's issues, so callers parse it as usual. A command with no
+    other command of its domain queued or in flight is sent at once;
+    otherwise a batch is sent when `max_size` commands are waiting or the
+    oldest has waited `window` seconds. A batch of one is sent as a normal
+    single-command request. Commands the batched reply has no issues for
+    are retried on their own.
+
+    Text in one command can steer the model's answer for the others in its
+    prompt, so only commands submitted with the same `domain` (a session,
+    or None for one trusted caller) share a request. With `max_tokens` set,
+    a batch of n commands may generate n times that many tokens.
+    """
+
+    def __init__(self, chat, build_messages, window: float = 0.02, max_size: int = 8, max_inflight: int = 4,
+                 max_tokens: int = 0):
+        self._chat = chat
+        self._build_messages = build_messages
+        self.window = window
+        self.max_size = max_size
+        self.max_tokens = max_tokens
+        self._pending = []
+        # Submitted and not yet answered, per domain
+        self._outstanding = {}
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self._pool = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="llm-batch")
+        self.commands = 0
+        self.batches = 0
+        self.llm_calls = 0
+        self.fallbacks = 0
+
+    def submit(self, command: str, domain: str = None) -> dict:
+        return self._enqueue(command, domain).result()
+
+    async def asubmit(self, command: str, domain: str = None) -> dict:
+        return await asyncio.wrap_future(self._enqueue(command, domain))
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "commands": self.commands,
+                "batches": self.batches,
+                "llm_calls": self.llm_calls,
+                "fallbacks": self.fallbacks,
+                "pending": len(self._pending),
+            }
+
+    def _enqueue(self, command: str, domain: str) -> Future:
+        future = Future()
+        with self._cond:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._collect, name="llm-batcher", daemon=True)
+                self._dispatcher.start()
+            self._pending.append((time.monotonic(), domain, command, future))
+            self._outstanding[domain] = self._outstanding.get(domain, 0) + 1
+            self.commands += 1
+            self._cond.notify()
+        future.add_done_callback(lambda _: self._answered(domain))
+        return future
+
+    def _answered(self, domain: str):
+        with self._cond:
+            self._outstanding[domain] -= 1
+            if not self._outstanding[domain]:
+                del self._outstanding[domain]
+            self._cond.notify()
+
+    def _collect(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                queued_at, domain = self._pending[0][:2]
+                deadline = queued_at + self.window
+                # Holding a command only pays off if others of its domain may join it
+                while self._waiting(domain) < self.max_size and self._outstanding.get(domain, 0) > 1:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [entry for entry in self._pending if entry[1] == domain][:self.max_size]
+                taken = {id(entry) for entry in batch}
+                self._pending = [entry for entry in self._pending if id(entry) not in taken]
+                self.batches += 1
+            self._pool.submit(self._dispatch, [(command, future) for _, _, command, future in batch])
+
+    def _waiting(self, domain: str) -> int:
+        return sum(1 for entry in self._pending if entry[1] == domain)
+
+    def _dispatch(self, batch: list):
+        if len(batch) == 1:
+            self._answer_alone(*batch[0])
+            return
+        commands = [{"id": str(i + 1), "command": command} for i, (command, _) in enumerate(batch)]
+        try:
+            # Each command's issues need their own share of the reply
+            response = self._call([
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(commands)}
+            ], self.max_tokens * len(batch))
+            action, issues = self._split(response)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for entry, (command, future) in zip(commands, batch):
+            own = issues.get(entry["id"])
+            if not own:
+                with self._cond:
+                    self.fallbacks += 1
+                self._answer_alone(command, future)
+                continue
+            content = json.dumps({"action": action, "issues": own})
+            future.set_result({'message': {'content': content}})
+
+    def _answer_alone(self, command: str, future: Future):
+        try:
+            future.set_result(self._call(self._build_messages(command)))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _call(self, messages: list, max_tokens: int = 0) -> dict:
+        with self._cond:
+            self.llm_calls += 1
+        if max_tokens:
+            return self._chat(messages, max_tokens=max_tokens)
+        return self._chat(messages)
+
+    @staticmethod
+    def _split(response: dict) -> tuple:
+        """Group a batched reply's issues by command id (issues without one are dropped)"""
+        parser = IssueStreamParser()
+        parser.feed(response['message']['content'])
+        parser.close()
+        document = parser.document
+        if not isinstance(document, dict) or not isinstance(document.get("issues"), list):
+            return "create_issues", {}
+        issues = {}
+        for issue in document["issues"]:
+            if isinstance(issue, dict) and "id" in issue:
+                issue = dict(issue)
+                issues.setdefault(str(issue.pop("id")), []).append(issue)
+        return document.get("action", "create_issues"), issues
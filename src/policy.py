@@ -0,0 +1,481 @@
+"""Safety policy applied to commands and to the actions extracted from them.
+
+A policy is a JSON document (SAFETY_POLICY_FILE), e.g.
+
+    {
+      "keywords": ["delete*", "drop table", "password*"],
+      "patterns": ["\\brm\\s+-rf\\b"],
+      "allow_projects": [],
+      "deny_projects": ["PROD", "LIVE"]
+    }
+
+Keywords match whole words, case-insensitively: "drop" blocks "drop the
+index" but not "dropdown"; a trailing "*" matches any word starting with
+the prefix; several words match as a phrase. Patterns are regular
+expressions searched case-insensitively. An empty `allow_projects` allows
+every project not in `deny_projects`.
+
+Checks take time linear in the text. Keywords cost the same whatever
+their number: the text's distinct words are looked up in hash sets. All
+patterns are combined into one regex, which is searched in 1 KB windows
+overlapping by 256 characters, so a match up to 256 characters long is
+never missed. Python's regex engine backtracks, so a pattern can still
+cost more per window than a literal search. Patterns that could make that
+cost explode are rejected when the policy is loaded: nested or
+alternating repeats, backreferences, and more than one unbounded repeat
+that is not followed by a character it cannot match ("\\w+\\s*;" is
+refused, "\\bpassword\\s*=\\s*\\S+" is fine).
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from src.metrics import BLOCKED_COMMANDS
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEYWORDS = ("delete*", "drop", "admin", "admins", "administrator*", "password*", "token", "tokens")
+
+_WORD = re.compile(r"\w+")
+_REPEATS = ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+# Repeats allowing more matches than this are treated as unbounded
+_UNBOUNDED = 100
+# Patterns see the text in windows this long, overlapping by _PATTERN_OVERLAP
+_PATTERN_WINDOW = 1024
+_PATTERN_OVERLAP = 256
+
+
+def _found(regex, text: str, start: int, end: int) -> bool:
+    """regex.search(text, start, end), ignoring matches that end at a window
+    edge inside the text: the regex sees that edge as the end of the string,
+    so \\b or $ can match there (the next window rechecks those characters)"""
+    edge = end if end < len(text) else None
+    return any(match.end() != edge for match in regex.finditer(text, start, end))
+
+
+class PolicyViolation(ValueError):
+    """A command or action rejected by the safety policy; `rule` names the rule that matched"""
+
+    def __init__(self, message: str, rule: str):
+        super().__init__(message)
+        self.rule = rule
+
+
+def _distinct_words(text: str) -> set:
+    """set(_WORD.findall(text)), but splitting on whitespace first: str.split()
+    runs far faster than the regex, which is then needed only for the few
+    distinct chunks that still contain punctuation."""
+    words = set(text.split())
+    for chunk in [word for word in words if not word.isalnum()]:
+        words.discard(chunk)
+        words.update(_WORD.findall(chunk))
+    return words
+
+
+def _split_keyword(keyword: str) -> tuple:
+    words = tuple(word.lower() for word in _WORD.findall(keyword))
+    if not words:
+        raise ValueError(f"Empty safety keyword: {keyword!r}")
+    return words
+
+
+def _backtracking_risk(items, in_repeat: bool = False):
+    """Why a parsed pattern could backtrack exponentially, or None"""
+    for op, value in items:
+        name = str(op)
+        if name in _REPEATS:
+            low, high, body = value
+            repeated = high > 1
+            if repeated and in_repeat:
+                return "nested repeat"
+            if repeated and any(str(sub_op) == "BRANCH" for sub_op, _ in _flatten(body)):
+                return "alternation inside a repeat"
+            risk = _backtracking_risk(body, in_repeat or repeated)
+        elif name == "SUBPATTERN":
+            risk = _backtracking_risk(value[-1], in_repeat)
+        elif name == "BRANCH":
+            risk = next(filter(None, (_backtracking_risk(branch, in_repeat) for branch in value[1])), None)
+        elif name in ("ASSERT", "ASSERT_NOT"):
+            risk = _backtracking_risk(value[1], in_repeat)
+        elif name == "ATOMIC_GROUP":
+            risk = _backtracking_risk(value, in_repeat)
+        elif name in ("GROUPREF", "GROUPREF_EXISTS"):
+            risk = "backreference"
+        else:
+            risk = None
+        if risk:
+            return risk
+    return None
+
+
+def _flatten(items):
+    """Every (op, value) in a parsed pattern, including those inside groups"""
+    for op, value in items:
+        yield op, value
+        name = str(op)
+        if name in _REPEATS:
+            yield from _flatten(value[2])
+        elif name == "SUBPATTERN":
+            yield from _flatten(value[-1])
+        elif name == "BRANCH":
+            for branch in value[1]:
+                yield from _flatten(branch)
+        elif name in ("ASSERT", "ASSERT_NOT"):
+            yield from _flatten(value[1])
+        elif name == "ATOMIC_GROUP":
+            yield from _flatten(value)
+
+
+def _char_matches(item, char: str):
+    """Whether a one-character item ("x", "[a-z]", "\\s", ".") matches `char`;
+    None when the item is anything else"""
+    op, value = item
+    name = str(op)
+    if name == "LITERAL":
+        return value == ord(char)
+    if name == "NOT_LITERAL":
+        return value != ord(char)
+    if name == "ANY":
+        return char != "\n"
+    if name == "CATEGORY":
+        return _CATEGORIES[str(value)](char)
+    if name != "IN":
+        return None
+    negate = hit = False
+    for sub_op, sub_value in value:
+        sub_name = str(sub_op)
+        if sub_name == "NEGATE":
+            negate = True
+        elif sub_name == "LITERAL":
+            hit = hit or sub_value == ord(char)
+        elif sub_name == "RANGE":
+            hit = hit or sub_value[0] <= ord(char) <= sub_value[1]
+        elif sub_name == "CATEGORY":
+            hit = hit or _CATEGORIES[str(sub_value)](char)
+        else:
+            return None
+    return hit != negate
+
+
+_CATEGORIES = {
+    "CATEGORY_DIGIT": str.isdecimal,
+    "CATEGORY_NOT_DIGIT": lambda c: not c.isdecimal(),
+    "CATEGORY_SPACE": str.isspace,
+    "CATEGORY_NOT_SPACE": lambda c: not c.isspace(),
+    "CATEGORY_WORD": lambda c: c.isalnum() or c == "_",
+    "CATEGORY_NOT_WORD": lambda c: not (c.isalnum() or c == "_"),
+}
+
+
+def _literal_chars(item):
+    """The characters a literal or small, plain character class matches; None otherwise"""
+    op, value = item
+    name = str(op)
+    if name == "LITERAL":
+        return [chr(value)]
+    if name != "IN":
+        return None
+    chars = []
+    for sub_op, sub_value in value:
+        sub_name = str(sub_op)
+        if sub_name == "LITERAL":
+            chars.append(chr(sub_value))
+        elif sub_name == "RANGE" and sub_value[1] - sub_value[0] < 256:
+            chars.extend(map(chr, range(sub_value[0], sub_value[1] + 1)))
+        else:
+            return None
+    return chars
+
+
+def _stops_before(body, following) -> bool:
+    """True if a repeat of `body` cannot run into what follows it: nothing
+    follows, or the next item only matches characters the body never does"""
+    if not following:
+        return True
+    chars = _literal_chars(following[0])
+    if chars is None or len(body) != 1:
+        return False
+    return not any(
+        _char_matches(body[0], variant) for char in chars for variant in {char, char.lower(), char.upper()}
+    )
+
+
+def _open_repeats(items, after=()) -> int:
+    """Unbounded repeats in a parsed pattern that a failing search would backtrack through"""
+    items = list(items)
+    count = 0
+    for index, (op, value) in enumerate(items):
+        name = str(op)
+        following = items[index + 1:] + list(after)
+        if name in _REPEATS:
+            low, high, body = value
+            if high > _UNBOUNDED and not _stops_before(body, following):
+                count += 1
+            count += _open_repeats(body)
+        elif name == "SUBPATTERN":
+            count += _open_repeats(value[-1], following)
+        elif name == "BRANCH":
+            count += max(_open_repeats(branch, following) for branch in value[1])
+        elif name in ("ASSERT", "ASSERT_NOT"):
+            count += _open_repeats(value[1])
+        elif name == "ATOMIC_GROUP":
+            count += _open_repeats(value, following)
+    return count
+
+
+def _pattern_risk(parsed):
+    risk = _backtracking_risk(parsed)
+    if risk is None and _open_repeats(parsed) > 1:
+        risk = "several unbounded repeats that can backtrack into each other"
+    return risk
+
+
+def compile_pattern(pattern: str):
+    """Compile one policy regex, refusing ones that could backtrack catastrophically"""
+    try:
+        compiled = re.compile(pattern, re.IGNORECASE)
+        risk = _pattern_risk(_sre_parse.parse(pattern, re.IGNORECASE))
+    except re.error as e:
+        raise ValueError(f"Invalid safety pattern {pattern!r}: {str(e)}")
+    if risk:
+        raise ValueError(f"Safety pattern {pattern!r} is not allowed: {risk}")
+    return compiled
+
+
+def combine_patterns(patterns: tuple):
+    """One regex searching for any of `patterns`, or None when there are none"""
+    if not patterns:
+        return None
+    try:
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+    except re.error as e:
+        # Valid alone, but not side by side: a global flag such as "(?i)"
+        # that is not at the start, or a group name used twice
+        raise ValueError(f"Safety patterns cannot be combined: {str(e)}")
+
+
+class Policy:
+    """One compiled, immutable version of the safety rules"""
+
+    def __init__(self, keywords=DEFAULT_KEYWORDS, patterns=(), allow_projects=(), deny_projects=()):
+        self.keywords = tuple(keywords)
+        self.patterns = tuple(patterns)
+        self.allow_projects = frozenset(p.strip().upper() for p in allow_projects if p.strip())
+        self.deny_projects = frozenset(p.strip().upper() for p in deny_projects if p.strip())
+        self._words = set()       # single-word keywords
+        self._phrases = {}        # first word -> [remaining words, ...]
+        self._prefixes = {}       # prefix length -> {prefix, ...}
+        for keyword in self.keywords:
+            words = _split_keyword(keyword)
+            if keyword.rstrip().endswith("*") and len(words) == 1:
+                self._prefixes.setdefault(len(words[0]), set()).add(words[0])
+            elif len(words) == 1:
+                self._words.add(words[0])
+            else:
+                self._phrases.setdefault(words[0], []).append(words[1:])
+        self._phrase_heads = set(self._phrases)
+        self._compiled = [compile_pattern(pattern) for pattern in self.patterns]
+        self._combined = combine_patterns(self.patterns)
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        if not isinstance(data, dict):
+            raise ValueError("Safety policy must be a JSON object")
+        unknown = set(data) - {"keywords", "patterns", "allow_projects", "deny_projects"}
+        if unknown:
+            raise ValueError(f"Unknown safety policy settings: {', '.join(sorted(unknown))}")
+        return cls(
+            keywords=data.get("keywords", DEFAULT_KEYWORDS),
+            patterns=data.get("patterns", ()),
+            allow_projects=data.get("allow_projects", ()),
+            deny_projects=data.get("deny_projects", ())
+        )
+
+    def size(self) -> int:
+        return len(self.keywords) + len(self.patterns) + len(self.allow_projects) + len(self.deny_projects)
+
+    def match(self, text: str):
+        """The first rule `text` matches (e.g. "keyword 'drop'"), or None"""
+        lowered = text.lower()
+        distinct = _distinct_words(lowered)
+        hit = distinct & self._words
+        if hit:
+            return f"keyword {min(hit)!r}"
+        for length, prefixes in self._prefixes.items():
+            hit = {word[:length] for word in distinct} & prefixes
+            if hit:
+                return f"keyword {min(hit) + '*'!r}"
+        if distinct & self._phrase_heads:
+            rule = self._match_phrase(_WORD.findall(lowered))
+            if rule:
+                return rule
+        if self._combined is not None:
+            pattern = self._search(text)
+            if pattern:
+                return f"pattern {pattern!r}"
+        return None
+
+    def _search(self, text: str):
+        """The first pattern found in `text`, searched window by window so a
+        pattern that backtracks costs at most a bounded amount per window"""
+        step = _PATTERN_WINDOW - _PATTERN_OVERLAP
+        for start in range(0, max(len(text) - _PATTERN_OVERLAP, 1), step):
+            end = start + _PATTERN_WINDOW
+            if _found(self._combined, text, start, end):
+                return next(p.pattern for p in self._compiled if _found(p, text, start, end))
+        return None
+
+    def project_error(self, project: str):
+        if project in self.deny_projects:
+            return f"targets protected project {project}"
+        if self.allow_projects and project not in self.allow_projects:
+            return f"targets project {project}, which is not in the allowed list"
+        return None
+
+    def _match_phrase(self, words: list):
+        for index, word in enumerate(words):
+            for rest in self._phrases.get(word, ()):
+                if tuple(words[index + 1:index + 1 + len(rest)]) == rest:
+                    return f"keyword {' '.join((word,) + rest)!r}"
+        return None
+
+
+def _action_text(action: dict) -> str:
+    """Every string an action would write to Jira, joined for one match pass"""
+    parts = []
+
+    def collect(value):
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                parts.append(str(key))
+                collect(item)
+
+    for key, value in action.items():
+        if key not in ("action", "project"):
+            collect(value)
+    return "\n".join(parts)
+
+
+class PolicyEngine:
+    """Checks commands and extracted actions against the current Policy.
+
+    With a `path`, the policy file is re-read when it changes (checked at
+    most every `reload_interval` seconds, on the checking thread); a file
+    that fails to load is logged and the previous policy stays in force.
+    `allow_projects`/`deny_projects` are added to whatever the file says.
+    """
+
+    def __init__(self, policy: Policy = None, path: str = None, reload_interval: float = 5.0,
+                 allow_projects=(), deny_projects=()):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._allow_projects = tuple(allow_projects)
+        self._deny_projects = tuple(deny_projects)
+        self._reload_lock = threading.Lock()
+        self._file_state = None
+        self._checked_at = time.monotonic()
+        self.reloads = 0
+        self.reload_errors = 0
+        if path:
+            self.policy = self._load()
+        else:
+            policy = policy or Policy()
+            self.policy = self._with_env_projects(policy) if allow_projects or deny_projects else policy
+
+    @classmethod
+    def from_env(cls):
+        def names(value):
+            return [name.strip() for name in value.split(",") if name.strip()]
+        return cls(
+            path=os.getenv('SAFETY_POLICY_FILE') or None,
+            reload_interval=float(os.getenv('SAFETY_POLICY_RELOAD_INTERVAL', '5')),
+            allow_projects=names(os.getenv('SAFETY_ALLOW_PROJECTS', '')),
+            deny_projects=names(os.getenv('SAFETY_DENY_PROJECTS', ''))
+        )
+
+    def check_command(self, command: str):
+        rule = self._current().match(command)
+        if rule:
+            self._blocked(rule, command)
+            raise PolicyViolation("Command contains restricted keywords" if rule.startswith("keyword")
+                                  else "Command matches a restricted pattern", rule)
+
+    def check_actions(self, actions: list):
+        """Raise PolicyViolation for the first action the policy rejects"""
+        policy = self._current()
+        for action in actions:
+            summary = action.get("summary")
+            error = policy.project_error(action.get("project"))
+            if error:
+                self._blocked(error, summary)
+                raise PolicyViolation(f"Issue {summary!r} {error}", f"project {action.get('project')}")
+            rule = policy.match(_action_text(action))
+            if rule:
+                self._blocked(rule, summary)
+                raise PolicyViolation(f"Issue {summary!r} contains restricted content", rule)
+
+    def reload(self) -> bool:
+        """Re-read the policy file now; returns False (keeping the old policy) if it is invalid"""
+        with self._reload_lock:
+            try:
+                self.policy = self._load()
+            except (OSError, ValueError) as e:
+                self.reload_errors += 1
+                logger.error(f"Safety policy reload failed, keeping the previous policy: {str(e)}")
+                return False
+            self.reloads += 1
+            logger.info(f"Safety policy reloaded from {self.path} ({self.policy.size()} rules)")
+            return True
+
+    def stats(self) -> dict:
+        return {"rules": self.policy.size(), "reloads": self.reloads, "reload_errors": self.reload_errors}
+
+    def _current(self) -> Policy:
+        if self.path and time.monotonic() - self._checked_at >= self.reload_interval:
+            self._checked_at = time.monotonic()
+            if self._file_changed():
+                self.reload()
+        return self.policy
+
+    def _file_changed(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size) != self._file_state
+
+    def _load(self) -> Policy:
+        stat = os.stat(self.path)
+        # Recorded up front so a broken file is reported once, not every interval
+        self._file_state = (stat.st_mtime_ns, stat.st_size)
+        with open(self.path) as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid safety policy {self.path}: {str(e)}")
+        return self._with_env_projects(Policy.from_dict(data))
+
+    def _with_env_projects(self, policy: Policy) -> Policy:
+        return Policy(
+            keywords=policy.keywords,
+            patterns=policy.patterns,
+            allow_projects=tuple(policy.allow_projects) + self._allow_projects,
+            deny_projects=tuple(policy.deny_projects) + self._deny_projects
+        )
+
+    @staticmethod
+    def _blocked(rule: str, text: str):
+        BLOCKED_COMMANDS.inc()
+        logger.info(f"Blocked by safety {rule}: {text[:80]!r}" if text else f"Blocked by safety {rule}")
@@ -0,0 +1,103 @@
+import threading
+import time
+
+
+class ProjectCache:
+    """TTL-cached key -> project index backed by a `projects()` fetcher.
+
+    Stale entries are served while a background refresh runs; unknown keys
+    trigger a single-flight refresh shared by all concurrent callers.
+    """
+
+    def __init__(self, fetch, ttl: float = 300.0):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._projects = {}
+        self._loaded_at = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._background = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get(self, key: str):
+        """Return the project for `key`, or None if Jira does not know it"""
+        with self._lock:
+            generation = self._generation
+            project = self._projects.get(key)
+            stale = self._is_stale()
+            if project is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if project is not None:
+            if stale:
+                self._refresh_in_background()
+            return project
+        self._refresh(generation)
+        with self._lock:
+            return self._projects.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def refresh(self):
+        """Synchronously reload the project index"""
+        with self._lock:
+            generation = self._generation
+        self._refresh(generation)
+
+    def invalidate(self, key: str = None):
+        """Drop one project (or the whole index) so the next lookup refetches"""
+        with self._lock:
+            if key is None:
+                self._projects = {}
+                self._loaded_at = None
+            else:
+                self._projects.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._projects),
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "age": None if self._loaded_at is None else time.monotonic() - self._loaded_at,
+            }
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def _refresh(self, seen_generation: int):
+        # Single flight: whoever holds the refresh lock fetches, everyone who
+        # queued behind it reuses the result instead of fetching again.
+        with self._refresh_lock:
+            with self._lock:
+                if self._generation != seen_generation:
+                    return
+            projects = {p.key: p for p in self._fetch()}
+            with self._lock:
+                self._projects = projects
+                self._loaded_at = time.monotonic()
+                self._generation += 1
+                self.refreshes += 1
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._background is not None and self._background.is_alive():
+                return
+            generation = self._generation
+            self._background = threading.Thread(
+                target=self._background_refresh, args=(generation,), daemon=True
+            )
+            self._background.start()
+
+    def _background_refresh(self, generation: int):
+        try:
+            self._refresh(generation)
+        except Exception:
+            # Keep serving the stale index; the next miss retries synchronously
+            pass
@@ -0,0 +1,243 @@
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+from src.metrics import JIRA_THROTTLED
+
+# Only statuses that mean the write was not applied; a 502/504 may come
+# from a proxy after Jira already created the issue, so it is not retried
+TRANSIENT_STATUSES = (503,)
+
+
+class RateLimitedError(Exception):
+    """Jira kept throttling a write after every retry was spent"""
+
+    def __init__(self, retry_after: float, message: str = None):
+        self.retry_after = retry_after
+        super().__init__(message or f"Jira is rate limiting writes, retry in {retry_after:.0f}s")
+
+
+class TokenBucket:
+    """Token bucket that adapts its rate to the server's limit.
+
+    A throttled response pauses every caller for the server's Retry-After
+    and cuts the rate by `decrease`; each success adds back `increase` of
+    the configured rate. The bucket therefore settles just under the real
+    limit instead of bursting into it repeatedly. `rate=0` disables
+    pacing but still honours pauses.
+    """
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, rate: float, burst: float = None, decrease: float = 0.75,
+                 increase: float = 0.01, min_rate: float = None):
+        self.max_rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.decrease = decrease
+        self.increase = increase
+        self.min_rate = min_rate if min_rate is not None else rate * 0.1
+        self._lock = threading.Lock()
+        self._state = {"tokens": self.burst, "updated": self.clock(), "paused_until": 0.0, "rate": rate}
+
+    def acquire(self):
+        """Block until a write may be sent"""
+        while True:
+            wait = self._transact(self._take)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold all callers for `seconds` and back the rate off"""
+        def update(state, now):
+            state["paused_until"] = max(state["paused_until"], now + seconds)
+            if state["rate"]:
+                state["rate"] = max(self.min_rate, state["rate"] * self.decrease)
+        self._transact(update)
+
+    def succeeded(self):
+        def update(state, now):
+            if state["rate"]:
+                state["rate"] = min(self.max_rate, state["rate"] + self.max_rate * self.increase)
+        self._transact(update)
+
+    @property
+    def rate(self) -> float:
+        return self._transact(lambda state, now: state["rate"])
+
+    def _take(self, state: dict, now: float) -> float:
+        """Take a token; return 0, or how long to wait before trying again"""
+        if now < state["paused_until"]:
+            return state["paused_until"] - now
+        rate = state["rate"]
+        if not rate:
+            return 0.0
+        # max(): the wall clock used across processes can step backwards
+        tokens = min(self.burst, state["tokens"] + max(0.0, now - state["updated"]) * rate)
+        state["updated"] = now
+        if tokens >= 1:
+            state["tokens"] = tokens - 1
+            return 0.0
+        state["tokens"] = tokens
+        return (1 - tokens) / rate
+
+    def _transact(self, fn):
+        with self._lock:
+            return fn(self._state, self.clock())
+
+
+class SQLiteTokenBucket(TokenBucket):
+    """TokenBucket whose state lives in SQLite so worker processes share one budget"""
+
+    clock = staticmethod(time.time)
+
+    def __init__(self, path: str, rate: float, name: str = "jira_writes", **kwargs):
+        super().__init__(rate, **kwargs)
+        self.name = name
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits "
+            "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, "
+            "paused_until REAL NOT NULL, rate REAL NOT NULL)"
+        )
+        self._db.execute(
+            "INSERT OR IGNORE INTO rate_limits (name, tokens, updated, paused_until, rate) VALUES (?, ?, ?, 0, ?)",
+            (name, self.burst, self.clock(), rate)
+        )
+
+    def _transact(self, fn):
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, serialising processes
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT tokens, updated, paused_until, rate FROM rate_limits WHERE name = ?", (self.name,)
+                ).fetchone()
+                state = dict(zip(("tokens", "updated", "paused_until", "rate"), row))
+                result = fn(state, self.clock())
+                self._db.execute(
+                    "UPDATE rate_limits SET tokens = ?, updated = ?, paused_until = ?, rate = ? WHERE name = ?",
+                    (state["tokens"], state["updated"], state["paused_until"], state["rate"], self.name)
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return result
+
+
+def retry_after(error, default: float = None) -> float:
+    """Seconds from an HTTP error's Retry-After header (delta or HTTP date)"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("Retry-After")
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+def _capture(fn, item):
+    try:
+        return fn(item)
+    except Exception as e:
+        return e
+
+
+class WriteScheduler:
+    """Paces, bounds and retries Jira writes.
+
+    `call()` waits for a token, runs the write with at most
+    `max_concurrency` in flight, honours Retry-After on 429 and retries
+    503 with jittered exponential backoff. Failed connections are retried
+    by the Jira session's adapter before they get here. `map()` runs one
+    call per item on up to `max_concurrency` threads.
+    """
+
+    def __init__(self, limiter: TokenBucket = None, max_concurrency: int = 1, max_retries: int = 3,
+                 base_delay: float = 0.5, max_delay: float = 30.0):
+        self.limiter = limiter or TokenBucket(0)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.retries = 0
+        self.throttled = 0
+
+    def call(self, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            with self._slots:
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                    if attempt >= self.max_retries:
+                        if getattr(e, "status_code", None) == 429:
+                            raise RateLimitedError(delay) from e
+                        raise
+                else:
+                    self.limiter.succeeded()
+                    return result
+            # Sleep outside the slot so other writes can use it meanwhile
+            attempt += 1
+            self.retries += 1
+            time.sleep(delay)
+
+    def map(self, fn, items: list) -> list:
+        """Return fn(item) for every item in order, or the exception it raised,
+        so one failed write does not hide the others; fn is expected to write
+        through call()"""
+        if self.max_concurrency == 1 or len(items) < 2:
+            return [_capture(fn, item) for item in items]
+        futures = [self._executor().submit(_capture, fn, item) for item in items]
+        return [future.result() for future in futures]
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.limiter.rate,
+            "max_concurrency": self.max_concurrency,
+            "retries": self.retries,
+            "throttled": self.throttled,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="jira-write")
+        return self._pool
+
+    def _retry_delay(self, error, attempt: int):
+        """Delay before retrying `error`, or None if it should not be retried"""
+        status = getattr(error, "status_code", None)
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if status == 429:
+            self.throttled += 1
+            JIRA_THROTTLED.inc()
+            delay = retry_after(error, default=backoff)
+            # Pausing the shared bucket stops every other writer too
+            self.limiter.pause(delay)
+            return delay
+        if status in TRANSIENT_STATUSES:
+            return backoff
+        return None
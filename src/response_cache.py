@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_command(command: str) -> str:
+    """Case- and whitespace-insensitive form of a user command"""
+    return " ".join(command.lower().split())
+
+
+class ResponseCache:
+    """Two-tier cache of validated LLM replies.
+
+    The memory tier is an LRU bounded by `max_size` entries; the optional
+    SQLite tier at `path` survives restarts and is shared between worker
+    processes. Both tiers expire entries after `ttl` seconds; expired rows
+    are deleted when read and swept from the table once per `ttl`. The
+    cache is an optimization, so SQLite errors (e.g. "database is locked"
+    after `timeout` seconds) are logged and treated as misses.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 3600.0, path: str = None, timeout: float = 5.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._purged = time.time()
+        if path:
+            # Short busy timeout: a cache lookup must not stall a command for long
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=timeout)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses "
+                "(key TEXT PRIMARY KEY, content TEXT NOT NULL, created REAL NOT NULL)"
+            )
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(command: str, provider: str, model: str, system_prompt: str) -> str:
+        prompt_hash = hashlib.sha256(system_prompt.encode()).hexdigest()
+        raw = "\0".join([normalize_command(command), provider, model or "", prompt_hash])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str):
+        """Return the cached response dict for `key`, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                content, created = entry
+                if now - created < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return self._response(content)
+                del self._entries[key]
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT content, created FROM llm_responses WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and now - row[1] >= self.ttl:
+                        self._db.execute("DELETE FROM llm_responses WHERE key = ? AND created = ?", (key, row[1]))
+                        row = None
+                except sqlite3.Error as e:
+                    logger.warning(f"Response cache lookup failed: {str(e)}")
+                    row = None
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return self._response(row[0])
+            self.misses += 1
+            return None
+
+    def put(self, key: str, response: dict):
+        """Store a response that has already parsed and validated"""
+        content = response['message']['content']
+        created = time.time()
+        with self._lock:
+            self._remember(key, content, created)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, content, created) VALUES (?, ?, ?)",
+                    (key, content, created)
+                )
+                if created - self._purged >= self.ttl:
+                    self._db.execute("DELETE FROM llm_responses WHERE created < ?", (created - self.ttl,))
+                    self._purged = created
+            except sqlite3.Error as e:
+                # The command itself succeeded; only later repeats miss the cache
+                logger.warning(f"Could not store response in the cache: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_responses")
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+    def _remember(self, key: str, content: str, created: float):
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (content, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _response(content: str) -> dict:
+        return {'message': {'content': content}}
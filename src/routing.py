@@ -0,0 +1,288 @@
+import asyncio
+import threading
+import time
+from functools import partial
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from src.llm import BaseLLMProvider
+
+
+def _start_thread(fn, *args) -> Future:
+    """Run `fn(*args)` on a thread of its own and return its Future.
+
+    Hedged requests do not share a bounded pool: one would cap LLM
+    concurrency for the whole process, time spent queued for a worker
+    would count towards the hedge delay, and losers still running would
+    hold workers other callers need. A losing request holds only its thread.
+    """
+    future = Future()
+
+    def run():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    threading.Thread(target=run, name="llm-hedge", daemon=True).start()
+    return future
+
+
+class BackendProfile:
+    """Moving latency and error profile for one provider.
+
+    Latency and error rate are exponentially weighted moving averages.
+    `failure_threshold` consecutive errors take the backend out of rotation
+    for `cooldown` seconds, after which it gets one request to prove itself.
+    """
+
+    def __init__(self, provider: BaseLLMProvider, alpha: float = 0.2,
+                 failure_threshold: int = 3, cooldown: float = 30.0):
+        self.provider = provider
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.latency = None
+        self.error_rate = 0.0
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def observe(self, elapsed: float, ok: bool):
+        with self._lock:
+            self.requests += 1
+            self.latency = elapsed if self.latency is None else (
+                self.alpha * elapsed + (1 - self.alpha) * self.latency
+            )
+            self.error_rate = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * self.error_rate
+            if ok:
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self.down_until = time.monotonic() + self.cooldown
+
+    def score(self) -> float:
+        """Expected cost of a request; untried backends score 0 so they get sampled"""
+        if self.latency is None:
+            return 0.0
+        # A backend that fails half the time costs roughly a retry on top
+        return self.latency * (1 + self.error_rate)
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.provider.name,
+            "model": self.provider.model_name,
+            "latency": self.latency,
+            "error_rate": self.error_rate,
+            "healthy": self.healthy,
+            "requests": self.requests,
+            **self.provider.stats(),
+        }
+
+
+class RoutingProvider(BaseLLMProvider):
+    """Sends each request to the fastest healthy backend, failing over on errors.
+
+    With `hedge_delay` set, a request that has not answered within that many
+    seconds is also sent to the next-best backend; the first reply wins and
+    the other request is cancelled. `hedge_budget` caps hedged requests as a
+    fraction of all requests so a slow period cannot double the spend.
+    """
+
+    name = "router"
+
+    def __init__(self, providers: list, hedge_delay: float = None, hedge_budget: float = 0.1, **profile_options):
+        if not providers:
+            raise ValueError("RoutingProvider needs at least one backend")
+        self.backends = [BackendProfile(p, **profile_options) for p in providers]
+        self.model_name = ",".join(f"{p.name}:{p.model_name}" for p in providers)
+        self.hedge_delay = hedge_delay
+        self.hedge_budget = hedge_budget
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def ranked(self) -> list:
+        """Healthy backends fastest first, then the rest by when they come back"""
+        healthy = sorted((b for b in self.backends if b.healthy), key=BackendProfile.score)
+        down = sorted((b for b in self.backends if not b.healthy), key=lambda b: b.down_until)
+        return healthy + down
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "backends": [b.stats() for b in self.backends],
+        }
+
+    def warmup(self):
+        """Warm every backend in parallel; fails only if none of them could be warmed"""
+        with ThreadPoolExecutor(max_workers=len(self.backends), thread_name_prefix="llm-warmup") as pool:
+            futures = [pool.submit(b.provider.warmup) for b in self.backends]
+        errors = [f.exception() for f in futures]
+        if all(errors):
+            raise errors[0]
+
+    def chat(self, messages: list, max_tokens: int = None) -> dict:
+        backends = self._start_request()
+        options = {} if max_tokens is None else {"max_tokens": max_tokens}
+        if self._may_hedge(backends):
+            return self._hedged_chat(backends, messages, options)
+        return self._chat_in_order(backends, messages, options)
+
+    async def achat(self, messages: list, max_tokens: int = None) -> dict:
+        backends = self._start_request()
+        options = {} if max_tokens is None else {"max_tokens": max_tokens}
+        if self._may_hedge(backends):
+            return await self._hedged_achat(backends, messages, options)
+        return await self._achat_in_order(backends, messages, options)
+
+    def stream(self, messages: list):
+        # Once tokens have been yielded the reply cannot switch backend, so
+        # fail over only if the stream breaks before its first chunk
+        last_error = None
+        for backend in self._start_request():
+            start = time.perf_counter()
+            started = False
+            try:
+                for chunk in backend.provider.stream(list(messages)):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                backend.observe(time.perf_counter() - start, ok=False)
+                if started:
+                    raise
+                last_error = e
+                continue
+            backend.observe(time.perf_counter() - start, ok=True)
+            return
+        raise last_error
+
+    async def astream(self, messages: list):
+        last_error = None
+        for backend in self._start_request():
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in backend.provider.astream(list(messages)):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                backend.observe(time.perf_counter() - start, ok=False)
+                if started:
+                    raise
+                last_error = e
+                continue
+            backend.observe(time.perf_counter() - start, ok=True)
+            return
+        raise last_error
+
+    def _start_request(self) -> list:
+        with self._lock:
+            self.requests += 1
+        return self.ranked()
+
+    def _may_hedge(self, backends: list) -> bool:
+        if self.hedge_delay is None or len(backends) < 2 or not backends[1].healthy:
+            return False
+        with self._lock:
+            return self.hedges < self.hedge_budget * self.requests
+
+    def _count_hedge(self):
+        with self._lock:
+            self.hedges += 1
+
+    @staticmethod
+    def _timed(backend: BackendProfile, fn, messages: list):
+        start = time.perf_counter()
+        try:
+            # Providers may modify the list (OpenAIProvider inserts its prompt)
+            result = fn(list(messages))
+        except Exception:
+            backend.observe(time.perf_counter() - start, ok=False)
+            raise
+        backend.observe(time.perf_counter() - start, ok=True)
+        return result
+
+    @staticmethod
+    async def _atimed(backend: BackendProfile, fn, messages: list):
+        start = time.perf_counter()
+        try:
+            result = await fn(list(messages))
+        except asyncio.CancelledError:
+            # The loser of a hedge: it took at least this long
+            backend.observe(time.perf_counter() - start, ok=True)
+            raise
+        except Exception:
+            backend.observe(time.perf_counter() - start, ok=False)
+            raise
+        backend.observe(time.perf_counter() - start, ok=True)
+        return result
+
+    def _chat_in_order(self, backends: list, messages: list, options: dict, last_error: Exception = None) -> dict:
+        for backend in backends:
+            try:
+                return self._timed(backend, partial(backend.provider.chat, **options), messages)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    async def _achat_in_order(self, backends: list, messages: list, options: dict,
+                              last_error: Exception = None) -> dict:
+        for backend in backends:
+            try:
+                return await self._atimed(backend, partial(backend.provider.achat, **options), messages)
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    def _hedged_chat(self, backends: list, messages: list, options: dict) -> dict:
+        primary, secondary = backends[0], backends[1]
+        first = _start_thread(self._timed, primary, partial(primary.provider.chat, **options), messages)
+        done, _ = wait([first], timeout=self.hedge_delay)
+        if done:
+            if first.exception() is None:
+                return first.result()
+            return self._chat_in_order(backends[1:], messages, options, first.exception())
+        self._count_hedge()
+        futures = [first, _start_thread(self._timed, secondary, partial(secondary.provider.chat, **options), messages)]
+        last_error = None
+        while futures:
+            done, pending = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # Threads cannot be interrupted; the loser's reply is discarded
+                    return future.result()
+                last_error = future.exception()
+            futures = list(pending)
+        return self._chat_in_order(backends[2:], messages, options, last_error)
+
+    async def _hedged_achat(self, backends: list, messages: list, options: dict) -> dict:
+        primary, secondary = backends[0], backends[1]
+        first = asyncio.ensure_future(self._atimed(primary, partial(primary.provider.achat, **options), messages))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_delay)
+        if done:
+            if first.exception() is None:
+                return first.result()
+            return await self._achat_in_order(backends[1:], messages, options, first.exception())
+        self._count_hedge()
+        second = asyncio.ensure_future(self._atimed(secondary, partial(secondary.provider.achat, **options), messages))
+        tasks = {first, second}
+        last_error = None
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+        finally:
+            # Cancel the loser so it stops consuming the backend
+            for task in tasks:
+                task.cancel()
+        return await self._achat_in_order(backends[2:], messages, options, last_error)
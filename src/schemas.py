@@ -1,10 +1,11 @@
-from jsonschema import validate, ValidationError
+import re
+import threading
 
 ACTION_SCHEMA = {
     "type": "object",
     "properties": {
         "action": {
-            "type": "string", 
+            "type": "string",
             "enum": ["create_issue"]
         },
         "project": {
@@ -12,24 +13,179 @@ ACTION_SCHEMA = {
             "pattern": "^[A-Z]{2,10}$"
         },
         "summary": {
-            "type": "string", 
+            "type": "string",
             "minLength": 5,
             "maxLength": 255
         },
         "description": {
             "type": "string",
             "maxLength": 2000
+        },
+        # Optional fields; allowed values are checked per project against
+        # Jira's create metadata (src/createmeta.py)
+        "issuetype": {
+            "type": "string",
+            "minLength": 1,
+            "maxLength": 60
+        },
+        "priority": {
+            "type": "string",
+            "minLength": 1,
+            "maxLength": 60
+        },
+        "assignee": {
+            "type": "string",
+            "minLength": 1,
+            "maxLength": 128
+        },
+        "labels": {
+            "type": "array",
+            "maxItems": 20,
+            "items": {"type": "string", "pattern": "^\\S{1,255}$"}
+        },
+        "components": {
+            "type": "array",
+            "maxItems": 20,
+            "items": {"type": "string", "minLength": 1, "maxLength": 255}
+        },
+        # Other fields by id ("customfield_10010") or name ("Story Points")
+        "fields": {
+            "type": "object",
+            "maxProperties": 20
         }
     },
     "required": ["action", "project", "summary"],
     "additionalProperties": True
 }
 
+_ISSUE_PROPERTIES = ("project", "summary", "description", "issuetype", "priority", "assignee", "labels", "components", "fields")
+
+# Shape of the LLM reply; handed to providers that can constrain generation to a schema
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {
+            "type": "string",
+            "enum": ["create_issues"]
+        },
+        "issues": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "properties": {
+                    **{name: ACTION_SCHEMA["properties"][name] for name in _ISSUE_PROPERTIES},
+                    # Command id in micro-batched requests (src/micro_batch.py)
+                    "id": {"type": "string"}
+                },
+                "required": ["project", "summary"]
+            }
+        }
+    },
+    "required": ["action", "issues"]
+}
+
+_validator = None
+_validator_lock = threading.Lock()
+
+def action_validator():
+    """Full ACTION_SCHEMA validator, checked and compiled once on first use.
+
+    jsonschema.validate() redoes both on every call; jsonschema itself is
+    only imported when an action misses the fast path below.
+    """
+    global _validator
+    if _validator is None:
+        with _validator_lock:
+            if _validator is None:
+                from jsonschema.validators import validator_for
+                validator_class = validator_for(ACTION_SCHEMA)
+                validator_class.check_schema(ACTION_SCHEMA)
+                _validator = validator_class(ACTION_SCHEMA)
+    return _validator
+
+_PROPERTIES = ACTION_SCHEMA["properties"]
+_PROJECT_PATTERN = re.compile(_PROPERTIES["project"]["pattern"])
+_SUMMARY_MIN = _PROPERTIES["summary"]["minLength"]
+_SUMMARY_MAX = _PROPERTIES["summary"]["maxLength"]
+_DESCRIPTION_MAX = _PROPERTIES["description"]["maxLength"]
+_NAME_FIELDS = tuple((name, _PROPERTIES[name]["maxLength"]) for name in ("issuetype", "priority", "assignee"))
+_LIST_FIELDS = tuple((name, _PROPERTIES[name]["maxItems"]) for name in ("labels", "components"))
+_LIST_ITEM_MAX = 255
+_FIELDS_MAX = _PROPERTIES["fields"]["maxProperties"]
+_EXTRAS = frozenset(name for name, _ in _NAME_FIELDS + _LIST_FIELDS) | {"fields"}
+
+def _has_valid_extras(action: dict) -> bool:
+    """Fast check of the optional fields; plain actions skip it after one set test"""
+    for name, max_length in _NAME_FIELDS:
+        if name in action:
+            value = action[name]
+            if type(value) is not str or not 1 <= len(value) <= max_length:
+                return False
+    for name, max_items in _LIST_FIELDS:
+        if name in action:
+            items = action[name]
+            if type(items) is not list or len(items) > max_items:
+                return False
+            for item in items:
+                if type(item) is not str or not 1 <= len(item) <= _LIST_ITEM_MAX:
+                    return False
+                if name == "labels" and item.split() != [item]:
+                    return False
+    if "fields" in action:
+        fields = action["fields"]
+        if type(fields) is not dict or len(fields) > _FIELDS_MAX:
+            return False
+    return True
+
+def _is_valid_create_issue(action) -> bool:
+    """Fast path for the common create_issue shape; False means "ask the full validator" """
+    if type(action) is not dict or action.get("action") != "create_issue":
+        return False
+    project = action.get("project")
+    summary = action.get("summary")
+    if type(project) is not str or not _PROJECT_PATTERN.search(project):
+        return False
+    if type(summary) is not str or not _SUMMARY_MIN <= len(summary) <= _SUMMARY_MAX:
+        return False
+    if "description" in action:
+        description = action["description"]
+        if type(description) is not str or len(description) > _DESCRIPTION_MAX:
+            return False
+    if not _EXTRAS.isdisjoint(action):
+        return _has_valid_extras(action)
+    return True
+
+def _error_message(error) -> str:
+    error_path = ".".join(str(v) for v in error.absolute_path)
+    return f"Validation failed for field '{error_path}': {error.message}"
+
+def _action_error(action):
+    if _is_valid_create_issue(action):
+        return None
+    from jsonschema.exceptions import best_match
+    return best_match(action_validator().iter_errors(action))
+
 def validate_action(action: dict):
-    try:
-        validate(instance=action, schema=ACTION_SCHEMA)
-    except ValidationError as e:
+    error = _action_error(action)
+    if error is not None:
         # Add detailed error message
-        error_path = ".".join(str(v) for v in e.absolute_path)
-        error_msg = f"Validation failed for field '{error_path}': {e.message}"
-        raise ValueError(error_msg) from None
\ No newline at end of file
+        raise ValueError(_error_message(error)) from None
+
+def action_errors(actions: list) -> list:
+    """Return (index, message) for every invalid action instead of stopping at the first"""
+    errors = []
+    for index, action in enumerate(actions):
+        error = _action_error(action)
+        if error is not None:
+            errors.append((index, _error_message(error)))
+    return errors
+
+def validate_actions(actions: list):
+    """Validate a batch of actions, reporting all failures in one ValueError"""
+    errors = action_errors(actions)
+    if not errors:
+        return
+    if len(actions) == 1:
+        raise ValueError(errors[0][1])
+    raise ValueError("; ".join(f"Issue {index + 1}: {message}" for index, message in errors))
@@ -0,0 +1,141 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+_CREATED = re.compile(r"^Issue created: ([A-Z][A-Z0-9]*) - (.*) -> (.*)$")
+_KEY = re.compile(r"\bIssue ([A-Z][A-Z0-9]*-\d+) created\b")
+# Words by which a command points at earlier turns ("the same for OPS", "assign it to me")
+_REFERS_BACK = re.compile(
+    r"\b(?:it|its|them|they|those|these|same|again|also|too|another|one more|as well|instead|"
+    r"previous(?:ly)?|above|earlier|before|last|(?:this|that|first|second|third) (?:one|issue|ticket|task|bug)s?)\b",
+    re.IGNORECASE
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token, plus message overhead)"""
+    return len(text) // 4 + 4
+
+
+def refers_back(command: str) -> bool:
+    """True if `command` looks like it depends on earlier turns of its session.
+
+    Only such commands are sent with history: a command with history gets
+    a response-cache key of its own and cannot be micro-batched.
+    """
+    return _REFERS_BACK.search(command) is not None
+
+
+def created_issues(result: str) -> list:
+    """Issues listed as created in a command result, as {"key", "project", "summary"} dicts"""
+    issues = []
+    for line in result.split("\n"):
+        match = _CREATED.match(line)
+        if match:
+            key = _KEY.search(match.group(3))
+            issues.append({"key": key.group(1) if key else None, "project": match.group(1), "summary": match.group(2)})
+    return issues
+
+
+class Conversation:
+    """Recent turns of one session, kept within a token budget.
+
+    Each turn stores the command and a compact reply: the issues it created
+    in the LLM's own reply format, or the start of the error. When there are
+    more than `max_turns` turns or they exceed `token_budget`, the oldest
+    are dropped and the issues they created move into a short summary
+    (the last `max_summary_issues` of them).
+    """
+
+    def __init__(self, token_budget: int = 1000, max_turns: int = 6, max_summary_issues: int = 20):
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self._turns = deque()
+        self._tokens = 0
+        self._summary = deque(maxlen=max_summary_issues)
+        self._lock = threading.Lock()
+        self.last_active = time.monotonic()
+
+    def history(self) -> list:
+        """Messages to place between the system prompt and the new command"""
+        with self._lock:
+            messages = []
+            if self._summary:
+                messages.append({
+                    "role": "system",
+                    "content": "Issues already created in this session: " + json.dumps(list(self._summary))
+                })
+            for user, assistant, _, _ in self._turns:
+                messages.append({"role": "user", "content": user})
+                messages.append({"role": "assistant", "content": assistant})
+            return messages
+
+    def record(self, command: str, result: str):
+        issues = created_issues(result)
+        if issues:
+            reply = json.dumps({"action": "create_issues", "issues": issues})
+        else:
+            reply = result[:200]
+        tokens = estimate_tokens(command) + estimate_tokens(reply)
+        with self._lock:
+            self.last_active = time.monotonic()
+            self._turns.append((command, reply, issues, tokens))
+            self._tokens += tokens
+            # Always keep the latest turn, even if it alone is over budget
+            while len(self._turns) > 1 and (len(self._turns) > self.max_turns or self._tokens > self.token_budget):
+                _, _, old_issues, old_tokens = self._turns.popleft()
+                self._tokens -= old_tokens
+                self._summary.extend(issue for issue in old_issues if issue["key"])
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+
+class SessionStore:
+    """Conversations by session id: at most `max_sessions`, least recently used
+    evicted first, and dropped after `idle_ttl` seconds without use.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 1800.0, **conversation_options):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._conversation_options = conversation_options
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: str) -> Conversation:
+        """Return the session's conversation, starting a new one if it is unknown or expired"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            conversation = self._sessions.get(session_id)
+            if conversation is None:
+                conversation = self._sessions[session_id] = Conversation(**self._conversation_options)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._sessions.move_to_end(session_id)
+            conversation.touch()
+            return conversation
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _expire(self, now: float):
+        # Least recently used first, so stop at the first session still in use
+        while self._sessions:
+            session_id, conversation = next(iter(self._sessions.items()))
+            if now - conversation.last_active < self.idle_ttl:
+                return
+            del self._sessions[session_id]
+            self.expirations += 1
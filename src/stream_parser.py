@@ -0,0 +1,189 @@
+import json
+import re
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+_THINK_OPEN = "<think>"
+_THINK_CLOSE = "</think>"
+
+
+class IssueStreamParser:
+    """Incrementally extracts issue objects from a streamed LLM reply.
+
+    Text inside <think> sections is skipped. The first top-level JSON object
+    that decodes becomes `document`; each element of its "issues" array is
+    returned from `feed()` as soon as its closing brace arrives. Issues are
+    held back until the top-level "action" is known (or the reply ends) so
+    callers can apply it exactly as `_extract_actions` does.
+    """
+
+    def __init__(self):
+        self.action = None
+        self.document = None
+        self.invalid = False
+        self._buf = ""
+        self._held = []
+        self._done = False
+        self._in_think = False
+        self._reset_document()
+
+    def feed(self, chunk: str) -> list:
+        """Consume the next piece of the reply and return newly completed issues"""
+        ready = []
+        if self._done:
+            return ready
+        if self._text is None:
+            self._buf += chunk
+        else:
+            self._text += chunk
+        self._scan(ready)
+        return ready
+
+    def close(self) -> list:
+        """Signal end of stream and return any issues still held back"""
+        self._done = True
+        held, self._held = self._held, []
+        return held
+
+    def _reset_document(self):
+        self._text = None
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = None
+        self._key = None
+        self._expect_key = False
+        self._issues_depth = None
+        self._issue_start = None
+
+    def _scan(self, ready: list):
+        while not self._done:
+            if self._text is None:
+                if not self._scan_outside():
+                    return
+            elif not self._scan_document(ready):
+                return
+
+    def _scan_outside(self) -> bool:
+        """Skip prose and <think> sections; return True once a document starts"""
+        buf = self._buf
+        i = 0
+        while True:
+            if self._in_think:
+                end = buf.find(_THINK_CLOSE, i)
+                if end == -1:
+                    # Keep enough tail to recognise a closing tag split across chunks
+                    self._buf = buf[max(i, len(buf) - len(_THINK_CLOSE) + 1):]
+                    return False
+                i = end + len(_THINK_CLOSE)
+                self._in_think = False
+                continue
+            brace = buf.find("{", i)
+            think = buf.find(_THINK_OPEN, i)
+            if think != -1 and (brace == -1 or think < brace):
+                i = think + len(_THINK_OPEN)
+                self._in_think = True
+                continue
+            if brace == -1:
+                partial = buf.rfind("<", max(i, len(buf) - len(_THINK_OPEN) + 1))
+                self._buf = buf[partial:] if partial != -1 else ""
+                return False
+            self._buf = ""
+            self._text = buf[brace:]
+            self._pos = 1
+            self._depth = 1
+            self._expect_key = True
+            return True
+
+    def _scan_document(self, ready: list) -> bool:
+        """Advance through the current document; return True if scanning should continue"""
+        text = self._text
+        n = len(text)
+        i = self._pos
+        while i < n:
+            if self._in_string:
+                match = _STRING_SPECIAL.search(text, i)
+                if match is None:
+                    i = n
+                    break
+                j = match.start()
+                if text[j] == "\\":
+                    if j + 1 >= n:
+                        i = j
+                        break
+                    i = j + 2
+                    continue
+                i = j + 1
+                self._in_string = False
+                self._string_done(text[self._string_start:i], ready)
+                continue
+
+            match = _STRUCTURAL.search(text, i)
+            if match is None:
+                i = n
+                break
+            j = match.start()
+            char = text[j]
+            i = j + 1
+            if char == '"':
+                self._in_string = True
+                self._string_start = j
+            elif char == "{" or char == "[":
+                if char == "[" and self._depth == 1 and not self._expect_key and self._key == "issues":
+                    self._issues_depth = 2
+                elif char == "{" and self._issues_depth is not None and self._depth == self._issues_depth:
+                    self._issue_start = j
+                self._depth += 1
+            elif char == "}" or char == "]":
+                self._depth -= 1
+                if char == "}" and self._issue_start is not None and self._depth == self._issues_depth:
+                    self._emit_issue(text[self._issue_start:i], ready)
+                    self._issue_start = None
+                elif char == "]" and self._issues_depth is not None and self._depth < self._issues_depth:
+                    self._issues_depth = None
+                if self._depth == 0:
+                    return self._finish_document(text[:i], text[i:], ready)
+            elif self._depth == 1:
+                self._expect_key = char == ","
+        self._pos = i
+        return False
+
+    def _string_done(self, raw: str, ready: list):
+        if self._depth != 1:
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        if self._expect_key:
+            self._key = value
+        elif self._key == "action":
+            self.action = value
+            ready.extend(self._held)
+            self._held = []
+
+    def _emit_issue(self, raw: str, ready: list):
+        try:
+            issue = json.loads(raw)
+        except json.JSONDecodeError:
+            raise ValueError("Invalid JSON structure in LLM response")
+        if self.action is None:
+            self._held.append(issue)
+        else:
+            ready.append(issue)
+
+    def _finish_document(self, raw: str, rest: str, ready: list) -> bool:
+        try:
+            self.document = json.loads(raw)
+        except json.JSONDecodeError:
+            # Not the reply object (e.g. braces in prose); keep looking after it
+            self.invalid = True
+            self._held = []
+            self.action = None
+            self._reset_document()
+            self._buf = rest
+            return True
+        self._done = True
+        ready.extend(self._held)
+        self._held = []
+        return False
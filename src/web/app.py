@@ -1,28 +1,158 @@
 import os
-from fastapi import FastAPI, Request, Form
+import json
+import uuid
+import asyncio
+from contextlib import aclosing, asynccontextmanager
+from fastapi import FastAPI, Request, Response, Form
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from src.jobs import create_queue
 from src.main import JiraAgent
+from src.metrics import REGISTRY
+from src.web.executor import BoundedExecutor, QueueFullError
+from src.web.jobs import JobWorkers
+
+# Convert DRY_RUN env to boolean
+dry_run_env = os.getenv("DRY_RUN", "false").strip().lower() == "true"
+# Cheap to construct; Jira and the LLM connect in the background on startup
+agent = JiraAgent(dry_run=dry_run_env)
+
+# Each browser gets its own conversation (see src/sessions.py)
+SESSION_COOKIE = "jira_agent_session"
+
+# Use the asyncio pipeline (native async LLM clients) instead of worker threads
+async_commands = os.getenv("COMMAND_ASYNC", "false").strip().lower() == "true"
+
+# Commands block on the LLM and Jira, so run them in a bounded worker pool
+# and keep the event loop free for other requests
+executor = BoundedExecutor(
+    max_workers=int(os.getenv("COMMAND_WORKERS", "4")),
+    queue_limit=int(os.getenv("COMMAND_QUEUE_LIMIT", "16")),
+    retry_after=int(os.getenv("COMMAND_RETRY_AFTER", "5"))
+)
+
+# Job mode: POST /command enqueues and returns a job id to poll at /jobs/{id}.
+# Every process pointed at the same JOB_QUEUE shares the work; JOB_WORKERS=0
+# makes this process only accept jobs.
+job_queue = None
+job_workers = None
+if os.getenv("COMMAND_JOBS", "false").strip().lower() == "true":
+    job_queue = create_queue(os.getenv("JOB_QUEUE", "sqlite:///jobs.db"))
+    job_workers = JobWorkers(
+        job_queue, agent,
+        workers=int(os.getenv("JOB_WORKERS", "2")),
+        poll_interval=float(os.getenv("JOB_POLL_INTERVAL", "0.5")),
+        lease=float(os.getenv("JOB_LEASE", "60"))
+    )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    agent.start_warmup()
+    if job_workers is not None:
+        job_workers.start()
+    yield
+    if job_workers is not None:
+        await job_workers.stop()
+    executor.shutdown()
 
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Configure static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
-# Convert DRY_RUN env to boolean
-dry_run_env = os.getenv("DRY_RUN", "false").strip().lower() == "true"
-agent = JiraAgent(dry_run=dry_run_env)
-
 @app.get("/")
 async def root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once Jira and the LLM are connected, 503 until then"""
+    readiness = agent.readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint: stage latencies and error counters"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/command")
-async def handle_command(command: str = Form(...)):
+async def handle_command(request: Request, response: Response, command: str = Form(...)):
+    if job_queue is not None:
+        return await enqueue_job(command)
+    session_id = session_cookie(request, response)
     try:
-        result = agent.process_command(command)
+        if async_commands:
+            result = await executor.arun(agent.aprocess_command, command, session_id)
+        else:
+            result = await executor.run(agent.process_command, command, session_id)
         return {"success": True, "result": result}
+    except QueueFullError as e:
+        return busy_response(e.retry_after)
     except Exception as e:
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        return {"success": False, "error": str(e)}
+
+@app.post("/command/stream")
+async def stream_command(request: Request, command: str = Form(...)):
+    """Server-sent events: LLM tokens, then one event per validated and created issue"""
+    if executor.saturated:
+        return busy_response(executor.retry_after)
+
+    session_id = request.cookies.get(SESSION_COOKIE) or uuid.uuid4().hex
+
+    async def events():
+        try:
+            async with executor.slot():
+                # aclosing() stops the LLM stream as soon as the client goes away
+                async with aclosing(agent.astream_command(command, session_id=session_id)) as stream:
+                    async for event, data in stream:
+                        if await request.is_disconnected():
+                            break
+                        yield sse_event(event, data)
+        except QueueFullError:
+            yield sse_event("error", "Server busy, please retry shortly")
+
+    response = StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+    return response
+
+async def enqueue_job(command: str) -> JSONResponse:
+    job_id = await asyncio.to_thread(job_queue.enqueue, command)
+    if job_workers is not None:
+        job_workers.notify()
+    return JSONResponse(
+        status_code=202,
+        content={"success": True, "job_id": job_id, "status_url": f"/jobs/{job_id}"}
+    )
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, issues created so far, final result and per-stage timings (ms) of a job"""
+    job = await asyncio.to_thread(job_queue.get, job_id) if job_queue is not None else None
+    if job is None:
+        return JSONResponse(status_code=404, content={"success": False, "error": "Job not found"})
+    return job
+
+def session_cookie(request: Request, response: Response) -> str:
+    """Conversation id for this browser, set as a cookie on first use"""
+    session_id = request.cookies.get(SESSION_COOKIE)
+    if not session_id:
+        session_id = uuid.uuid4().hex
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+    return session_id
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def busy_response(retry_after: int) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"success": False, "error": "Server busy, please retry shortly"},
+        headers={"Retry-After": str(retry_after)}
+    )
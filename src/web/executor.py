@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when the executor is at capacity and cannot accept more work"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Command queue is full")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """Runs blocking callables off the event loop with a hard cap on queued work.
+
+    At most `max_workers` calls run at once and at most `queue_limit` more
+    wait for a worker; anything beyond that is rejected immediately.
+    Coroutines passed to `arun` get the same limits without a thread each.
+    """
+
+    def __init__(self, max_workers: int = 4, queue_limit: int = 16, retry_after: int = 5):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="command")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._semaphore = None
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_limit
+
+    @property
+    def saturated(self) -> bool:
+        with self._lock:
+            return self._in_flight >= self.capacity
+
+    async def run(self, fn, *args):
+        """Run `fn(*args)` in the pool, or raise QueueFullError if saturated"""
+        self._acquire()
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        # Release the slot when the worker finishes, not when the caller stops
+        # waiting, so disconnected clients cannot overcommit the pool.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def arun(self, coro_fn, *args):
+        """Await `coro_fn(*args)` on the event loop under the same limits"""
+        async with self.slot():
+            return await coro_fn(*args)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one unit of capacity for work running on the event loop"""
+        self._acquire()
+        try:
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.max_workers)
+            async with self._semaphore:
+                yield
+        finally:
+            self._release()
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise QueueFullError(self.retry_after)
+            self._in_flight += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_workers),
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,83 @@
+import asyncio
+import os
+import socket
+from contextlib import aclosing
+from src.jobs import DONE, ERROR, JobQueue
+
+
+class JobWorkers:
+    """Background tasks that drain a JobQueue through `agent.astream_command`.
+
+    Each finished issue is appended to the job's partial results as it is
+    created. Every process sharing the queue can run its own workers; a
+    reaper marks jobs whose worker stopped heartbeating as interrupted.
+    """
+
+    def __init__(self, queue: JobQueue, agent, workers: int = 2, poll_interval: float = 0.5, lease: float = 60.0):
+        self.queue = queue
+        self.agent = agent
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks = []
+        self._wakeup = None
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._work(f"{self._prefix}:{i}")) for i in range(self.workers)]
+        self._tasks.append(asyncio.ensure_future(self._reap()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers after a local enqueue instead of waiting for the next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self, worker: str):
+        while True:
+            job = await asyncio.to_thread(self.queue.claim, worker)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: dict):
+        timer = self.agent.command_timer()
+        beat = asyncio.ensure_future(self._heartbeat(job["id"]))
+        status, result = ERROR, "Job ended without a result"
+        try:
+            async with aclosing(self.agent.astream_command(job["command"], timer=timer)) as stream:
+                async for event, data in stream:
+                    if event == "issue":
+                        await asyncio.to_thread(self.queue.append_partial, job["id"], data)
+                    elif event == "done":
+                        status, result = DONE, data
+                    elif event == "error":
+                        status, result = ERROR, data
+        except Exception as e:
+            result = f"System Error: {str(e)}"
+        finally:
+            beat.cancel()
+        timings = {name: round(seconds * 1000, 2) for name, seconds in timer.timings.items()}
+        await asyncio.to_thread(self.queue.finish, job["id"], status, result, timings)
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            await asyncio.to_thread(self.queue.heartbeat, job_id)
+
+    async def _reap(self):
+        while True:
+            await asyncio.to_thread(self.queue.recover, self.lease)
+            await asyncio.sleep(self.lease / 2)
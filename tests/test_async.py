@@ -0,0 +1,72 @@
+import asyncio
+from unittest.mock import patch, Mock, AsyncMock
+
+GOOD_RESPONSE = {
+    "message": {
+        "content": """<think>Creating test issue</think>
+<answer>{"action": "create_issues", "issues": [{"project": "TEST", "summary": "Async Test"}]}</answer>"""
+    }
+}
+
+
+def test_aprocess_command_uses_async_client(monkeypatch):
+    """aprocess_command awaits the native async Ollama client"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    with patch("src.llm.ollama.Client") as mock_ollama, \
+         patch("src.llm.ollama.AsyncClient") as mock_async_ollama, \
+         patch("src.main.JIRA") as mock_jira:
+        mock_project = Mock()
+        mock_project.key = "TEST"
+        mock_jira.return_value.projects.return_value = [mock_project]
+        mock_jira.return_value.create_issue.return_value = Mock(key="TEST-42")
+        mock_ollama.return_value.list.return_value = {"models": [{"model": "deepseek-r1:14b"}]}
+        mock_async_ollama.return_value.chat = AsyncMock(return_value=GOOD_RESPONSE)
+
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        result = asyncio.run(agent.aprocess_command("Create async issue"))
+
+        assert "TEST-42" in result
+        mock_async_ollama.return_value.chat.assert_awaited_once()
+        mock_ollama.return_value.chat.assert_not_called()
+
+
+def test_aprocess_command_blocks_dangerous_command(monkeypatch):
+    """The async pipeline applies the same keyword block"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    with patch("src.llm.ollama.Client") as mock_ollama, patch("src.main.JIRA"):
+        mock_ollama.return_value.list.return_value = {"models": [{"model": "deepseek-r1:14b"}]}
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        assert "Blocked" in asyncio.run(agent.aprocess_command("Delete all projects"))
+
+
+def test_concurrent_commands_share_event_loop(monkeypatch):
+    """Many in-flight commands overlap their LLM waits on one loop"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+
+    async def slow_chat(**kwargs):
+        await asyncio.sleep(0.1)
+        return GOOD_RESPONSE
+
+    with patch("src.llm.ollama.Client") as mock_ollama, \
+         patch("src.llm.ollama.AsyncClient") as mock_async_ollama, \
+         patch("src.main.JIRA") as mock_jira:
+        mock_project = Mock()
+        mock_project.key = "TEST"
+        mock_jira.return_value.projects.return_value = [mock_project]
+        mock_ollama.return_value.list.return_value = {"models": [{"model": "deepseek-r1:14b"}]}
+        mock_async_ollama.return_value.chat = AsyncMock(side_effect=slow_chat)
+
+        from src.main import JiraAgent
+        agent = JiraAgent(dry_run=True)
+
+        async def run_all():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await asyncio.gather(*(agent.aprocess_command("Create issue") for _ in range(10)))
+            return results, loop.time() - start
+
+        results, elapsed = asyncio.run(run_all())
+        assert all("[DRY RUN]" in r for r in results)
+        assert elapsed < 0.5
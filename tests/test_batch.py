@@ -0,0 +1,96 @@
+import io
+import json
+import threading
+import time
+from src.batch import BatchRunner, Checkpoint
+from src.metrics import CommandTimer
+
+
+class FakeAgent:
+    def __init__(self, gate: threading.Event = None):
+        self.gate = gate
+        self.commands = []
+        self._lock = threading.Lock()
+
+    def process_command_with_timings(self, command):
+        if self.gate is not None:
+            self.gate.wait(5)
+        with self._lock:
+            self.commands.append(command)
+        timer = CommandTimer(lambda: ("fake", "fake"))
+        timer.timings = {"llm": 0.25}
+        return f"done: {command}", timer
+
+
+def lines(*commands):
+    return [json.dumps(c) + "\n" for c in commands]
+
+
+def records(output: io.StringIO) -> list:
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_processes_jsonl_and_reports_timings():
+    agent, output = FakeAgent(), io.StringIO()
+    counts = BatchRunner(agent, output, workers=3).run(
+        lines({"id": "a", "command": "first"}, "second") + ["\n", "{not json\n"]
+    )
+    by_line = {r["line"]: r for r in records(output)}
+    assert by_line[1]["id"] == "a" and by_line[1]["result"] == "done: first"
+    assert by_line[1]["stages_ms"] == {"llm": 250.0}
+    assert by_line[2]["outcome"] == "ok"
+    assert by_line[4]["outcome"] == "invalid"
+    assert 3 not in by_line
+    assert counts == {"ok": 2, "invalid": 1}
+
+
+def test_checkpoint_watermark(tmp_path):
+    path = str(tmp_path / "run.ckpt")
+    checkpoint = Checkpoint(path)
+    for line in (1, 3, 4):
+        checkpoint.start(line)
+        checkpoint.finish(line)
+    checkpoint.start(2)
+    state = json.load(open(path))
+    assert state == {"done_below": 2, "done": [3, 4], "in_flight": [2]}
+    checkpoint.finish(2)
+    assert json.load(open(path)) == {"done_below": 5, "done": [], "in_flight": []}
+
+
+def test_resume_skips_done_and_reports_interrupted(tmp_path):
+    path = tmp_path / "run.ckpt"
+    path.write_text(json.dumps({"done_below": 3, "done": [4], "in_flight": [5]}))
+    agent, output = FakeAgent(), io.StringIO()
+    BatchRunner(agent, output, checkpoint=Checkpoint(str(path))).run(lines(*"abcdef"))
+    assert sorted(agent.commands) == ["c", "f"]
+    interrupted = [r for r in records(output) if r["outcome"] == "interrupted"]
+    assert [r["line"] for r in interrupted] == [5]
+    assert json.loads(path.read_text())["done_below"] == 7
+
+
+def test_retry_interrupted_reruns_them(tmp_path):
+    path = tmp_path / "run.ckpt"
+    path.write_text(json.dumps({"done_below": 1, "done": [], "in_flight": [2]}))
+    agent = FakeAgent()
+    BatchRunner(agent, io.StringIO(), checkpoint=Checkpoint(str(path)), retry_interrupted=True).run(lines("a", "b"))
+    assert sorted(agent.commands) == ["a", "b"]
+
+
+def test_read_ahead_is_bounded():
+    gate = threading.Event()
+    consumed = []
+
+    def source():
+        for i in range(1000):
+            consumed.append(i)
+            yield json.dumps(f"command {i}") + "\n"
+
+    runner = BatchRunner(FakeAgent(gate), io.StringIO(), workers=2)
+    thread = threading.Thread(target=runner.run, args=(source(),))
+    thread.start()
+    time.sleep(0.1)
+    # 2 running + 2 queued, plus the line waiting for a slot
+    assert len(consumed) <= 2 * 2 + 1
+    gate.set()
+    thread.join(5)
+    assert runner.counts == {"ok": 1000}
@@ -0,0 +1,119 @@
+import pytest
+import requests
+from unittest.mock import patch, Mock
+from jira import JIRAError
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+
+def make_issue(key):
+    issue = Mock()
+    issue.key = key
+    return issue
+
+
+@pytest.fixture
+def bulk_agent(monkeypatch):
+    """JiraAgent with bulk creation enabled and mocked Jira/Ollama clients"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    monkeypatch.setenv("JIRA_BULK_CHUNK_SIZE", "2")
+    with patch("src.main.JIRA") as mock_jira, \
+         patch("src.llm.ollama.Client") as mock_ollama:
+        project = Mock()
+        project.key = "TEST"
+        project.id = "10000"
+        mock_jira.return_value.projects.return_value = [project]
+        mock_ollama.return_value.list.return_value = {"models": [{"model": "deepseek-r1:14b"}]}
+        from src.main import JiraAgent
+        yield JiraAgent(bulk_create=True), mock_jira.return_value
+
+
+def actions(*pairs):
+    return [{"action": "create_issue", "project": p, "summary": s} for p, s in pairs]
+
+
+def test_bulk_create_chunks_requests(bulk_agent):
+    """Actions are sent in chunks of JIRA_BULK_CHUNK_SIZE"""
+    agent, jira = bulk_agent
+    jira.create_issues.side_effect = [
+        [{"status": "Success", "issue": make_issue("TEST-1"), "error": None},
+         {"status": "Success", "issue": make_issue("TEST-2"), "error": None}],
+        [{"status": "Success", "issue": make_issue("TEST-3"), "error": None}],
+    ]
+    result = agent._execute_actions(actions(("TEST", "First task"), ("TEST", "Second task"), ("TEST", "Third task")))
+    assert jira.create_issues.call_count == 2
+    assert [line.split()[-3] for line in result.splitlines()] == ["TEST-1", "TEST-2", "TEST-3"]
+    jira.create_issue.assert_not_called()
+
+
+def test_bulk_create_reports_failures_per_item(bulk_agent):
+    """One rejected row does not sink the rest of the batch"""
+    agent, jira = bulk_agent
+    jira.create_issues.return_value = [
+        {"status": "Error", "issue": None, "error": {"summary": "too long"}},
+        {"status": "Success", "issue": make_issue("TEST-7"), "error": None},
+    ]
+    result = agent._execute_actions(actions(("TEST", "Rejected task"), ("TEST", "Accepted task")))
+    lines = result.splitlines()
+    assert lines[0].startswith("Issue failed") and "too long" in lines[0]
+    assert "TEST-7" in lines[1]
+
+
+def test_bulk_create_unknown_project_not_sent(bulk_agent):
+    """Rows for unknown projects fail locally and never reach Jira"""
+    agent, jira = bulk_agent
+    jira.create_issues.return_value = [
+        {"status": "Success", "issue": make_issue("TEST-8"), "error": None},
+    ]
+    result = agent._execute_actions(actions(("NOPE", "Unknown project"), ("TEST", "Known project")))
+    assert "Project NOPE not found" in result
+    assert len(jira.create_issues.call_args.kwargs["field_list"]) == 1
+
+
+def test_bulk_create_falls_back_to_single_creates(bulk_agent):
+    """When the bulk endpoint does not exist, the chunk is sent issue by issue"""
+    agent, jira = bulk_agent
+    jira.create_issues.side_effect = JIRAError("Not Found", status_code=404)
+    jira.create_issue.side_effect = [make_issue("TEST-9"), make_issue("TEST-10")]
+    result = agent._execute_actions(actions(("TEST", "Fallback one"), ("TEST", "Fallback two")))
+    assert "TEST-9" in result and "TEST-10" in result
+    assert jira.create_issue.call_count == 2
+
+
+def test_bulk_create_falls_back_when_jira_is_unreachable(bulk_agent):
+    agent, jira = bulk_agent
+    refused = NewConnectionError(None, "Connection refused")
+    jira.create_issues.side_effect = requests.ConnectionError(MaxRetryError(None, "/rest/api/2/issue/bulk", refused))
+    jira.create_issue.side_effect = [make_issue("TEST-9"), make_issue("TEST-10")]
+    result = agent._execute_actions(actions(("TEST", "Fallback one"), ("TEST", "Fallback two")))
+    assert "TEST-9" in result and "TEST-10" in result
+
+
+@pytest.mark.parametrize("error", [requests.ReadTimeout("read timed out"), JIRAError("Bad Gateway", status_code=502)])
+def test_bulk_create_with_unknown_outcome_is_not_resent(bulk_agent, error):
+    """A chunk that may already exist in Jira is reported, not created again"""
+    agent, jira = bulk_agent
+    jira.create_issues.side_effect = error
+    result = agent._execute_actions(actions(("TEST", "Maybe created"), ("TEST", "Maybe created too")))
+    assert result.count("outcome unknown, check Jira before retrying") == 2
+    jira.create_issue.assert_not_called()
+    assert jira.create_issues.call_count == 1
+
+
+@pytest.mark.parametrize("error", [requests.ReadTimeout("read timed out"), JIRAError("Bad Gateway", status_code=502)])
+def test_single_create_with_unknown_outcome_is_not_resent(bulk_agent, error):
+    agent, jira = bulk_agent
+    agent.bulk_create = False
+    jira.create_issue.side_effect = error
+    result = agent._execute_actions(actions(("TEST", "Maybe created")))
+    assert "outcome unknown, check Jira before retrying" in result
+    assert jira.create_issue.call_count == 1
+
+
+def test_single_creates_report_each_failure(bulk_agent):
+    """One failed create does not hide the results of the others"""
+    agent, jira = bulk_agent
+    agent.bulk_create = False
+    jira.create_issue.side_effect = [make_issue("TEST-11"), JIRAError("Bad Request", status_code=400)]
+    result = agent._execute_actions(actions(("TEST", "Works"), ("TEST", "Rejected")))
+    assert "Works -> Issue TEST-11 created successfully" in result
+    assert "Issue failed: TEST - Rejected" in result
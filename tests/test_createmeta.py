@@ -0,0 +1,131 @@
+import threading
+import pytest
+from unittest.mock import Mock
+from src.createmeta import CreateMetaCache, FieldRules, fetch_createmeta, plain_fields
+from src.jira_backend import InMemoryJira, default_createmeta
+
+ACTION = {"action": "create_issue", "project": "TEST", "summary": "Fix login redirect"}
+
+
+def rules_with_custom_fields():
+    meta = default_createmeta()
+    meta["Bug"] = dict(meta["Bug"], **{
+        "customfield_10010": {
+            "name": "Severity", "required": True, "schema": {"type": "option", "custom": "select"},
+            "allowedValues": [{"id": "1", "value": "Critical"}, {"id": "2", "value": "Minor"}]
+        },
+        "components": {
+            "name": "Components", "required": False, "schema": {"type": "array", "items": "component"},
+            "allowedValues": [{"id": "1", "name": "Backend"}, {"id": "2", "name": "Web UI"}]
+        },
+        "customfield_10020": {"name": "Story Points", "required": False, "schema": {"type": "number"}},
+    })
+    return FieldRules("TEST", meta)
+
+
+def test_build_resolves_names_and_wraps_values():
+    fields = rules_with_custom_fields().build(dict(
+        ACTION, issuetype="bug", priority="high", assignee="jdoe", labels=["auth"],
+        components=["web ui"], fields={"severity": "critical", "Story Points": 3}
+    ))
+    assert fields == {
+        "issuetype": {"name": "Bug"},
+        "priority": {"name": "High"},
+        "assignee": {"name": "jdoe"},
+        "labels": ["auth"],
+        "components": [{"name": "Web UI"}],
+        "customfield_10010": {"value": "Critical"},
+        "customfield_10020": 3,
+    }
+
+
+def test_build_reports_every_problem():
+    rules = rules_with_custom_fields()
+    with pytest.raises(ValueError) as error:
+        rules.build(dict(ACTION, issuetype="Bug", priority="Urgent", components=["Mobile"], fields={"Sprint": "12"}))
+    message = str(error.value)
+    assert "Priority 'Urgent' is not one of: High, Highest, Low, Lowest, Medium" in message
+    assert "Components 'Mobile'" in message
+    assert "unknown field 'Sprint'" in message
+    assert "missing required field 'Severity'" in message
+    with pytest.raises(ValueError, match="issue type 'Epic' is not available in TEST"):
+        rules.build(dict(ACTION, issuetype="Epic"))
+    with pytest.raises(ValueError, match="components cannot be set on Task issues"):
+        rules.build(dict(ACTION, components=["Backend"]))
+
+
+def test_plain_fields_without_metadata():
+    assert plain_fields(dict(ACTION, priority="High", labels=["ops"], fields={"customfield_1": "x"}), "Story") == {
+        "issuetype": {"name": "Story"},
+        "priority": {"name": "High"},
+        "labels": ["ops"],
+        "customfield_1": "x",
+    }
+
+
+def test_fetch_uses_project_endpoints_then_legacy_createmeta():
+    jira = Mock()
+    jira.project_issue_types.return_value = [Mock(id="1")]
+    jira.project_issue_types.return_value[0].name = "Task"
+    jira.project_issue_fields.return_value = [Mock(raw={"fieldId": "summary", "name": "Summary", "required": True})]
+    assert fetch_createmeta(jira, "TEST") == {"Task": {"summary": {"fieldId": "summary", "name": "Summary", "required": True}}}
+    jira.createmeta.assert_not_called()
+
+    memory = InMemoryJira(projects=("TEST", "OPS"))
+    assert set(fetch_createmeta(memory, "OPS")) == {"Task", "Bug", "Story"}
+    with pytest.raises(ValueError, match="No create metadata"):
+        fetch_createmeta(memory, "NOPE")
+
+
+def test_cache_fetches_once_per_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.createmeta.time.monotonic", lambda: now[0])
+    fetch = Mock(return_value=default_createmeta())
+    cache = CreateMetaCache(fetch, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("TEST"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fetch.call_count == 1 and len({id(r) for r in results}) == 1
+    now[0] += 61
+    cache.get("TEST")
+    assert fetch.call_count == 2
+
+
+def test_failed_fetch_keeps_old_rules_then_retries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.createmeta.time.monotonic", lambda: now[0])
+    fetch = Mock(side_effect=[ConnectionError("down"), default_createmeta(), ConnectionError("down")])
+    cache = CreateMetaCache(fetch, ttl=60, retry_after=10)
+    assert cache.get("TEST") is None
+    assert cache.get("TEST") is None and fetch.call_count == 1
+    now[0] += 11
+    rules = cache.get("TEST")
+    assert rules is not None
+    now[0] += 61
+    assert cache.get("TEST") is rules
+    assert cache.stats()["errors"] == 2
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_agent_rejects_bad_fields_before_writing(monkeypatch, bulk):
+    monkeypatch.setenv("JIRA_BACKEND", "memory")
+    from src.main import JiraAgent
+    agent = JiraAgent(bulk_create=bulk)
+    jira = agent.jira
+    agent.projects.refresh()
+    actions = [
+        dict(ACTION, issuetype="bug", priority="high", labels=["auth"]),
+        dict(ACTION, summary="Tidy the logs", priority="Urgent"),
+    ]
+    calls = jira.calls
+    created, failed = agent._execute_actions(actions).split("\n")
+    assert created.endswith("Issue TEST-1 created successfully")
+    assert failed.startswith("Issue failed: TEST - Tidy the logs -> Priority 'Urgent' is not one of")
+    # One createmeta fetch and one create; the bad row never reached Jira
+    assert jira.calls - calls == 2
+    [issue] = jira.snapshot()
+    assert issue["fields"]["issuetype"] == {"name": "Bug"}
+    assert issue["fields"]["priority"] == {"name": "High"}
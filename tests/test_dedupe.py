@@ -0,0 +1,201 @@
+import threading
+import time
+import pytest
+from unittest.mock import patch, Mock
+from src.dedupe import DuplicateIndex, normalize_summary
+
+
+def make_issue(key, summary=None):
+    issue = Mock()
+    issue.key = key
+    issue.fields.summary = summary
+    return issue
+
+
+def test_normalize_summary():
+    assert normalize_summary("  Renew the TLS-cert, ASAP! ") == "renew the tls cert asap"
+
+
+def test_finds_exact_and_near_duplicates():
+    index = DuplicateIndex()
+    index.add("OPS", "OPS-1", "Renew the TLS certificate for the API gateway")
+    index.add("OPS", "OPS-2", "Rotate database credentials")
+    assert index.find("OPS", "renew the TLS certificate for the API gateway!") == ("OPS-1", 1.0)
+    key, similarity = index.find("OPS", "Renew the TLS certificate for the API gateways")
+    assert key == "OPS-1" and similarity >= 0.8
+    assert index.find("OPS", "Write the onboarding guide") is None
+    # Indexes are per project
+    assert index.find("WEB", "Rotate database credentials") is None
+    assert index.stats()["duplicates"] == 2
+
+
+def test_index_is_bounded_per_project():
+    index = DuplicateIndex(max_per_project=2)
+    for number, summary in enumerate(["Patch kernel", "Build hosts", "Update base images"]):
+        index.add("OPS", f"OPS-{number}", summary)
+    assert index.stats()["entries"] == 2
+    assert index.find("OPS", "Patch kernel") is None
+    assert index.find("OPS", "Update base images") == ("OPS-2", 1.0)
+
+
+def test_readding_a_key_replaces_its_summary():
+    index = DuplicateIndex()
+    index.add("OPS", "OPS-1", "Patch kernel")
+    index.add("OPS", "OPS-1", "Upgrade the monitoring stack")
+    assert index.find("OPS", "Patch kernel") is None
+    assert index.stats()["entries"] == 1
+
+
+def test_sync_pulls_updates_since_last_sync():
+    calls = []
+
+    def search(project, since):
+        calls.append(since)
+        if since is None:
+            return [("OPS-1", "Patch kernel on build hosts")]
+        return [("OPS-2", "Upgrade the monitoring stack")]
+
+    index = DuplicateIndex(search=search)
+    index.sync("OPS")
+    index.sync("OPS")
+    assert calls[0] is None and calls[1] <= time.time()
+    assert index.find("OPS", "Upgrade the monitoring stack") == ("OPS-2", 1.0)
+
+
+def test_find_triggers_background_sync():
+    index = DuplicateIndex(search=lambda project, since: [("OPS-1", "Patch kernel on build hosts")])
+    index.find("OPS", "Patch kernel on build hosts")
+    for _ in range(100):
+        if index.stats()["entries"]:
+            break
+        time.sleep(0.01)
+    assert index.find("OPS", "Patch kernel on build hosts") == ("OPS-1", 1.0)
+
+
+def test_first_check_waits_for_initial_sync():
+    def search(project, since):
+        time.sleep(0.05)
+        return [("OPS-1", "Patch kernel on build hosts")]
+
+    index = DuplicateIndex(search=search)
+    assert index.find("OPS", "Patch kernel on build hosts") == ("OPS-1", 1.0)
+
+
+def test_reservations_block_concurrent_duplicates():
+    index = DuplicateIndex()
+    assert index.reserve("OPS", "Rotate database credentials") == (None, "pending:1")
+    assert index.reserve("OPS", "Rotate database credentials!") == (("an issue being created", 1.0), None)
+    index.add("OPS", "OPS-7", "Rotate database credentials", "pending:1")
+    assert index.find("OPS", "Rotate database credentials") == ("OPS-7", 1.0)
+    assert index.stats()["entries"] == 1
+
+    _, reservation = index.reserve("OPS", "Patch kernel")
+    index.release("OPS", reservation)
+    assert index.find("OPS", "Patch kernel") is None
+
+
+@pytest.fixture
+def dedupe_agent(monkeypatch):
+    """JiraAgent factory with mocked Jira; the existing TEST-1 issue is returned by search"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+
+    def make(mode, bulk_create=False):
+        monkeypatch.setenv("DUPLICATE_MODE", mode)
+        with patch("src.main.JIRA") as mock_jira:
+            project = Mock()
+            project.key = "TEST"
+            project.id = "10000"
+            jira = mock_jira.return_value
+            jira.projects.return_value = [project]
+            jira.search_issues.return_value = [make_issue("TEST-1", "Renew the TLS certificate")]
+            jira.create_issue.return_value = make_issue("TEST-2")
+            from src.main import JiraAgent
+            agent = JiraAgent(bulk_create=bulk_create)
+            agent.duplicates.sync("TEST")
+            return agent, jira
+    return make
+
+
+def action(summary):
+    return {"action": "create_issue", "project": "TEST", "summary": summary}
+
+
+def test_skip_mode_does_not_create(dedupe_agent):
+    agent, jira = dedupe_agent("skip")
+    result = agent._execute_action(action("Renew the TLS certificate"))
+    assert result == "Issue skipped: TEST - Renew the TLS certificate -> duplicate of TEST-1 (similarity 1.00)"
+    jira.create_issue.assert_not_called()
+    assert 'project = "TEST"' in jira.search_issues.call_args[0][0]
+
+
+def test_warn_mode_creates_and_annotates(dedupe_agent):
+    agent, jira = dedupe_agent("warn")
+    result = agent._execute_action(action("Renew the TLS certificate"))
+    assert result.endswith("Issue TEST-2 created successfully (possible duplicate of TEST-1)")
+    jira.create_issue.assert_called_once()
+
+
+def test_created_issues_are_indexed(dedupe_agent):
+    agent, jira = dedupe_agent("skip")
+    agent._execute_action(action("Upgrade the monitoring stack"))
+    assert agent._execute_action(action("Upgrade the monitoring stack")).startswith("Issue skipped")
+    assert jira.create_issue.call_count == 1
+
+
+def test_bulk_skips_duplicates(dedupe_agent):
+    agent, jira = dedupe_agent("skip", bulk_create=True)
+    jira.create_issues.return_value = [{"status": "Success", "issue": make_issue("TEST-3"), "error": None}]
+    result = agent._execute_actions([action("Renew the TLS certificate"), action("Write the onboarding guide")])
+    lines = result.split("\n")
+    assert lines[0].startswith("Issue skipped")
+    assert lines[1].endswith("Issue TEST-3 created successfully")
+    assert len(jira.create_issues.call_args.kwargs["field_list"]) == 1
+
+
+def test_concurrent_identical_commands_create_once(dedupe_agent):
+    agent, jira = dedupe_agent("skip")
+    started = threading.Barrier(4)
+
+    def create_issue(**fields):
+        time.sleep(0.05)
+        return make_issue("TEST-2")
+
+    jira.create_issue.side_effect = create_issue
+    results = []
+
+    def submit():
+        started.wait()
+        results.append(agent._execute_action(action("Upgrade the monitoring stack")))
+
+    threads = [threading.Thread(target=submit) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert jira.create_issue.call_count == 1
+    assert sum(result.startswith("Issue skipped") for result in results) == 3
+
+
+def test_failed_create_releases_its_reservation(dedupe_agent):
+    agent, jira = dedupe_agent("skip")
+    jira.create_issue.side_effect = [Exception("Jira is down"), make_issue("TEST-3")]
+    with pytest.raises(Exception):
+        agent._execute_action(action("Upgrade the monitoring stack"))
+    assert agent._execute_action(action("Upgrade the monitoring stack")).endswith("TEST-3 created successfully")
+
+
+def test_resync_searches_a_relative_window(dedupe_agent):
+    agent, jira = dedupe_agent("skip")
+    list(agent._search_recent("TEST", time.time() - 600))
+    assert 'updated >= "-12m"' in jira.search_issues.call_args[0][0]
+    list(agent._search_recent("TEST"))
+    assert 'updated >= "-30d"' in jira.search_issues.call_args[0][0]
+
+
+def test_off_mode_has_no_index(monkeypatch):
+    monkeypatch.setenv("DUPLICATE_MODE", "off")
+    from src.main import JiraAgent
+    assert JiraAgent().duplicates is None
+    monkeypatch.setenv("DUPLICATE_MODE", "maybe")
+    with pytest.raises(ValueError):
+        JiraAgent()
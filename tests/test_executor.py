@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import pytest
+from src.web.executor import BoundedExecutor, QueueFullError
+
+
+def test_runs_callable_off_event_loop():
+    """Blocking work runs in a worker thread and returns its result"""
+    executor = BoundedExecutor(max_workers=1, queue_limit=0)
+    loop_thread = threading.get_ident()
+    result = asyncio.run(executor.run(threading.get_ident))
+    assert result != loop_thread
+    executor.shutdown()
+
+
+def test_rejects_when_queue_full():
+    """Work beyond workers + queue_limit is rejected without waiting"""
+    executor = BoundedExecutor(max_workers=1, queue_limit=1, retry_after=7)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(QueueFullError) as exc:
+            await executor.run(release.wait)
+        assert exc.value.retry_after == 7
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(scenario())
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["in_flight"] == 0
+    executor.shutdown()
+
+
+def test_event_loop_stays_responsive():
+    """Other coroutines keep running while a command blocks a worker"""
+    executor = BoundedExecutor(max_workers=1, queue_limit=0)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.01)
+        ticks = 0
+        for _ in range(5):
+            await asyncio.sleep(0)
+            ticks += 1
+        release.set()
+        await blocked
+        return ticks
+
+    assert asyncio.run(scenario()) == 5
+    executor.shutdown()
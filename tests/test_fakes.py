@@ -0,0 +1,29 @@
+from benchmarks.fakes import FakeJiraServer, FakeLLMServer
+
+
+def test_agent_against_local_stand_ins(monkeypatch):
+    """The agent runs end to end over HTTP against the benchmark fakes"""
+    with FakeJiraServer(projects=("TEST",)) as jira, FakeLLMServer() as llm:
+        monkeypatch.setenv("JIRA_SERVER", jira.url)
+        monkeypatch.setenv("JIRA_USER", "bench")
+        monkeypatch.setenv("JIRA_TOKEN", "bench")
+        monkeypatch.setenv("OLLAMA_HOST", llm.url)
+        monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        assert agent.warmup()["ready"]
+        result = agent.process_command("Create a benchmark issue")
+        assert "TEST-1 created successfully" in result
+        assert "TEST-1" in jira.issues
+
+
+def test_error_injection(monkeypatch):
+    """Injected LLM failures surface as command errors"""
+    with FakeJiraServer() as jira, FakeLLMServer(error_rate=1.0) as llm:
+        monkeypatch.setenv("JIRA_SERVER", jira.url)
+        monkeypatch.setenv("OLLAMA_HOST", llm.url)
+        monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+        from src.main import JiraAgent
+        result = JiraAgent().process_command("Create a benchmark issue")
+        assert "Error" in result
+        assert llm.stats()["errors"] >= 1
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch, Mock
+from src.fast_path import FastPathParser
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("create task in OPS: renew TLS cert", [("OPS", "renew TLS cert")]),
+    ("Create a new issue for project OPS - Rotate API keys", [("OPS", "Rotate API keys")]),
+    ("please add a ticket under WEB project — Fix login redirect", [("WEB", "Fix login redirect")]),
+    ("create tasks in OPS:\n- Renew TLS cert\n* Rotate API keys\n\n3. Patch kernel", [
+        ("OPS", "Renew TLS cert"), ("OPS", "Rotate API keys"), ("OPS", "Patch kernel")]),
+    ("OPS:\n• Renew TLS cert\n2) Rotate API keys", [("OPS", "Renew TLS cert"), ("OPS", "Rotate API keys")]),
+])
+def test_grammar_matches(command, expected):
+    actions = FastPathParser().parse(command)
+    assert [(a["project"], a["summary"]) for a in actions] == expected
+    assert all(a["action"] == "create_issue" for a in actions)
+
+
+def test_description_clause():
+    actions = FastPathParser().parse("create task in OPS: Renew TLS cert; description: expires Friday")
+    assert actions == [{"project": "OPS", "summary": "Renew TLS cert",
+                        "description": "expires Friday", "action": "create_issue"}]
+
+
+@pytest.mark.parametrize("command", [
+    "Create a task in TEST",
+    "create a task in TEST to rotate certs",
+    "create task in OPS: fix",                      # summary too short for ACTION_SCHEMA
+    "create task in the OPS project: Renew cert",
+    "OPS:\n- Renew TLS cert\nand also page the on-call",
+    "Ops:\n- Renew TLS cert",                       # project keys must be upper case
+    "create a task for me: renew the TLS cert",
+    "Create a new issue for project ops - Rotate API keys",
+    "open a ticket on Monday - patch the kernel",
+    "summarize the open tasks in OPS: all of them",
+])
+def test_falls_through(command):
+    assert FastPathParser().parse(command) is None
+
+
+def test_same_actions_as_llm_path():
+    """Fast-path output equals what _extract_actions makes of the equivalent LLM reply"""
+    from src.main import JiraAgent
+    reply = {"action": "create_issues", "issues": [
+        {"project": "ops", "summary": "Renew TLS cert"}, {"project": "OPS", "summary": "Rotate API keys"}]}
+    llm_actions = JiraAgent(dry_run=True)._extract_actions(json.loads(json.dumps(reply)))
+    assert FastPathParser().parse("create issues in OPS:\n- Renew TLS cert\n- Rotate API keys") == llm_actions
+
+
+def test_hit_rate():
+    parser = FastPathParser()
+    parser.parse("create task in OPS: renew TLS cert")
+    parser.parse("Could you look into the flaky build?")
+    assert parser.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_SIZE", "0")
+    with patch("src.main.JIRA") as mock_jira:
+        project = Mock()
+        project.key = "OPS"
+        mock_jira.return_value.projects.return_value = [project]
+        mock_jira.return_value.create_issue.return_value = Mock(key="OPS-1")
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        agent.llm = Mock(name="llm", model_name="test-model")
+        agent.llm.name = "test"
+        agent.llm.chat.return_value = {"message": {"content": '{"action": "create_issues", "issues": [{"project": "OPS", "summary": "From the LLM"}]}'}}
+        yield agent
+
+
+def test_agent_skips_llm_on_hit(agent):
+    result = agent.process_command("create task in OPS: renew TLS cert")
+    assert result == "Issue created: OPS - renew TLS cert -> Issue OPS-1 created successfully"
+    agent.llm.chat.assert_not_called()
+
+
+def test_agent_falls_back_to_llm(agent):
+    assert "From the LLM" in agent.process_command("Make a ticket for the expiring cert in OPS")
+    agent.llm.chat.assert_called_once()
+
+
+def test_unknown_project_goes_to_llm(agent):
+    """A key Jira does not have is more likely a word the parser misread"""
+    assert "From the LLM" in agent.process_command("create task for JIRA: renew TLS cert")
+    agent.llm.chat.assert_called_once()
+
+
+def test_fast_path_can_be_disabled(agent):
+    agent.fast_path = None
+    assert "From the LLM" in agent.process_command("create task in OPS: renew TLS cert")
+
+
+def test_stream_events_on_hit(agent):
+    async def collect():
+        return [event async for event in agent.astream_command("create task in OPS: renew TLS cert")]
+
+    events = asyncio.run(collect())
+    assert [name for name, _ in events] == ["validated", "issue", "done"]
+    agent.llm.astream.assert_not_called()
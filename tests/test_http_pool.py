@@ -0,0 +1,81 @@
+import asyncio
+import httpx
+import requests
+from benchmarks.fakes import FakeJiraServer, FakeLLMServer
+from src.http_pool import HTTPPools, PoolSettings
+
+
+def test_clients_share_one_pool():
+    """Separate clients for the same backend reuse each other's connections"""
+    pools = HTTPPools(PoolSettings(pool_size=4, http2="false"))
+    with FakeLLMServer() as llm:
+        clients = [httpx.Client(base_url=llm.url, **pools.client_options("ollama")) for _ in range(3)]
+        for _ in range(3):
+            for client in clients:
+                assert client.get("/api/tags").status_code == 200
+    stats = pools.stats()["ollama"]
+    assert stats == {"requests": 9, "new_connections": 1, "reused": 8, "tls_handshakes": 0}
+
+
+def test_async_clients_share_a_pool_per_loop():
+    pools = HTTPPools(PoolSettings(http2="false"))
+
+    async def scenario(url):
+        for _ in range(2):
+            async with httpx.AsyncClient(base_url=url, **pools.async_client_options("openai")) as client:
+                await client.get("/api/tags")
+
+    with FakeLLMServer() as llm:
+        asyncio.run(scenario(llm.url))
+        asyncio.run(scenario(llm.url))
+    # One connection per event loop, reused across clients within it
+    assert pools.stats()["openai"]["new_connections"] == 2
+    assert pools.stats()["openai"]["requests"] == 4
+
+
+def test_jira_sessions_share_adapter():
+    pools = HTTPPools(PoolSettings(pool_size=2))
+    with FakeLLMServer() as server:
+        sessions = [pools.mount(requests.Session()) for _ in range(2)]
+        for session in sessions:
+            session.get(f"{server.url}/api/tags")
+        # A client closing its session leaves the shared pool usable
+        sessions[0].close()
+        sessions[1].get(f"{server.url}/api/tags")
+    assert sessions[0].get_adapter("http://x") is sessions[1].get_adapter("http://x")
+    assert pools.stats()["jira"] == {"requests": 3, "new_connections": 1, "reused": 2}
+
+
+class FlakyJiraServer(FakeJiraServer):
+    """Answers 503 to the first `failures` requests"""
+
+    def __init__(self, failures: int):
+        super().__init__(error_status=503)
+        self.failures = failures
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            return self.requests <= self.failures
+
+
+def test_jira_pool_retries_reads_but_not_writes():
+    pools = HTTPPools(PoolSettings(jira_read_retries=2))
+    with FlakyJiraServer(failures=1) as server:
+        session = pools.mount(requests.Session())
+        assert session.get(f"{server.url}/rest/api/2/project").status_code == 200
+        assert server.requests == 2
+        server.failures = 3
+        response = session.post(f"{server.url}/rest/api/2/issue", json={"fields": {}})
+        assert response.status_code == 503 and server.requests == 3
+
+
+def test_settings_from_env(monkeypatch):
+    monkeypatch.setenv("HTTP_POOL_SIZE", "8")
+    monkeypatch.setenv("HTTP_CONNECT_TIMEOUT", "2")
+    monkeypatch.setenv("HTTP_READ_TIMEOUT", "30")
+    monkeypatch.setenv("HTTP2", "false")
+    pools = HTTPPools()
+    assert pools.settings.pool_size == 8 and pools.settings.http2 is False
+    timeout = pools.timeout()
+    assert (timeout.connect, timeout.read) == (2.0, 30.0)
@@ -0,0 +1,106 @@
+import json
+import time
+import pytest
+from unittest.mock import Mock
+from src.jira_backend import InMemoryJira, MemoryJiraError, create_backend
+from src.rate_limit import TokenBucket, WriteScheduler
+
+
+def test_creates_issues_with_generated_keys():
+    jira = InMemoryJira(projects=("TEST", "OPS"))
+    first = jira.create_issue(project="TEST", summary="Renew TLS cert", issuetype={"name": "Task"})
+    second = jira.create_issue(fields={"project": {"key": "TEST"}, "summary": "Rotate keys"})
+    ops = jira.create_issue(project={"id": "10001"}, summary="Patch kernel")
+    assert [first.key, second.key, ops.key] == ["TEST-1", "TEST-2", "OPS-1"]
+    assert jira.issue("TEST-2").fields.summary == "Rotate keys"
+    with pytest.raises(MemoryJiraError) as error:
+        jira.create_issue(project="NOPE", summary="Unknown project")
+    assert error.value.status_code == 400
+
+
+def test_bulk_create_reports_rows():
+    jira = InMemoryJira()
+    results = jira.create_issues([{"project": {"id": "10000"}, "summary": "One"}, {"project": "NOPE", "summary": "Two"}])
+    assert [r["status"] for r in results] == ["Success", "Error"]
+    assert results[0]["issue"].key == "TEST-1"
+    assert jira.calls == 1
+
+
+def test_search_filters_project_and_updated():
+    jira = InMemoryJira(projects=("TEST", "OPS"))
+    jira.create_issue(project="TEST", summary="Old task")
+    jira._issues["TEST-1"].updated = time.time() - 3 * 86400
+    jira.create_issue(project="TEST", summary="New task")
+    jira.create_issue(project="OPS", summary="Other project")
+    assert [i.key for i in jira.search_issues('project = "TEST"')] == ["TEST-2", "TEST-1"]
+    assert [i.key for i in jira.search_issues('project = "TEST" AND updated >= "-1d" ORDER BY updated DESC')] == ["TEST-2"]
+    assert [i.key for i in jira.search_issues("project = TEST", startAt=1, maxResults=1)] == ["TEST-1"]
+
+
+def test_snapshot_and_export(tmp_path):
+    jira = InMemoryJira()
+    jira.create_issue(project="TEST", summary="Exported task", description="Details")
+    path = tmp_path / "issues.json"
+    jira.export(str(path))
+    [issue] = json.loads(path.read_text())
+    assert issue["key"] == "TEST-1"
+    assert issue["fields"]["project"] == "TEST"
+    assert issue["fields"]["description"] == "Details"
+    jira.reset()
+    assert jira.snapshot() == []
+    assert jira.create_issue(project="TEST", summary="After reset").key == "TEST-1"
+
+
+def test_failure_injection_drives_retries(monkeypatch):
+    monkeypatch.setattr("src.rate_limit.time.sleep", Mock())
+    jira = InMemoryJira()
+    jira.fail_next(2, status=503)
+    scheduler = WriteScheduler(TokenBucket(0), max_retries=3)
+    issue = scheduler.call(jira.create_issue, project="TEST", summary="Eventually created")
+    assert issue.key == "TEST-1"
+    assert jira.calls == 3
+
+    always = InMemoryJira(failure_rate=1.0, failure_status=500, seed=1)
+    with pytest.raises(MemoryJiraError):
+        always.projects()
+
+
+def test_latency_is_simulated():
+    jira = InMemoryJira(latency=0.05)
+    start = time.perf_counter()
+    jira.projects()
+    assert time.perf_counter() - start >= 0.05
+
+
+def test_create_backend_specs(monkeypatch):
+    monkeypatch.setenv("JIRA_MEMORY_PROJECTS", "test, ops")
+    assert [p.key for p in create_backend("memory").projects()] == ["TEST", "OPS"]
+    assert isinstance(create_backend("src.jira_backend:InMemoryJira"), InMemoryJira)
+    with pytest.raises(ValueError):
+        create_backend("sqlite")
+
+
+def test_agent_runs_offline_on_memory_backend(monkeypatch):
+    monkeypatch.setenv("JIRA_BACKEND", "memory")
+    monkeypatch.setenv("JIRA_SERVER", "http://127.0.0.1:9")
+    from src.main import JiraAgent
+    agent = JiraAgent()
+    assert agent.process_command("create task in TEST: Renew TLS certificate") == \
+        "Issue created: TEST - Renew TLS certificate -> Issue TEST-1 created successfully"
+    assert agent.jira.snapshot()[0]["fields"]["summary"] == "Renew TLS certificate"
+
+    dry = JiraAgent(dry_run=True)
+    assert "[DRY RUN]" in dry.process_command("create task in TEST: Renew TLS certificate")
+    assert dry.jira.snapshot() == []
+
+
+def test_creates_are_checked_against_createmeta():
+    jira = InMemoryJira()
+    jira.create_issue(project="TEST", summary="Urgent fix", issuetype={"name": "Bug"}, priority={"name": "High"})
+    for fields in ({"issuetype": {"name": "Epic"}}, {"priority": {"name": "Urgent"}}, {"customfield_1": "x"}):
+        with pytest.raises(MemoryJiraError) as error:
+            jira.create_issue(project="TEST", summary="Rejected", **fields)
+        assert error.value.status_code == 400
+    [project] = jira.createmeta(projectKeys="TEST", expand="projects.issuetypes.fields")["projects"]
+    assert [t["name"] for t in project["issuetypes"]] == ["Task", "Bug", "Story"]
+    assert "priority" in project["issuetypes"][0]["fields"]
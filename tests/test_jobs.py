@@ -0,0 +1,127 @@
+import asyncio
+import importlib
+import time
+import pytest
+from unittest.mock import Mock
+from src.jobs import JobQueue, SQLiteJobQueue, create_queue
+from src.metrics import CommandTimer
+from src.web.jobs import JobWorkers
+
+
+class FakeAgent:
+    """Streams one issue line per word of the command"""
+
+    def command_timer(self):
+        return CommandTimer(lambda: ("fake", "fake"))
+
+    async def astream_command(self, command, timer=None):
+        with timer.stage("llm"):
+            await asyncio.sleep(0.01)
+        if command == "fail":
+            yield "error", "Validation Error: bad command"
+            return
+        lines = [f"Issue created: {word}" for word in command.split()]
+        for line in lines:
+            yield "issue", line
+        yield "done", "\n".join(lines)
+
+
+def test_queue_claims_in_order_and_persists(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queue = SQLiteJobQueue(path)
+    first, second = queue.enqueue("first"), queue.enqueue("second")
+    assert queue.claim("w1")["id"] == first
+    queue.append_partial(first, "Issue created: A")
+    queue.finish(first, "done", "Issue created: A", {"llm": 12.5})
+
+    reopened = SQLiteJobQueue(path)
+    job = reopened.get(first)
+    assert job["status"] == "done"
+    assert job["partial"] == ["Issue created: A"]
+    assert job["timings"] == {"llm": 12.5}
+    assert reopened.get(second)["status"] == "queued"
+
+
+def test_processes_sharing_a_queue_never_claim_the_same_job(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queues = [SQLiteJobQueue(path), SQLiteJobQueue(path)]
+    ids = {queues[0].enqueue(f"job {i}") for i in range(10)}
+    claimed = []
+    while True:
+        jobs = [q.claim(f"w{i}") for i, q in enumerate(queues)]
+        if not any(jobs):
+            break
+        claimed.extend(job["id"] for job in jobs if job)
+    assert sorted(claimed) == sorted(ids)
+
+
+def test_recover_marks_stale_jobs_interrupted(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    stale, fresh = queue.enqueue("stale"), queue.enqueue("fresh")
+    queue.claim("w1")
+    queue.claim("w2")
+    queue._db.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time() - 120, stale))
+    assert queue.recover(lease=60) == 1
+    assert queue.get(stale)["status"] == "interrupted"
+    assert queue.get(fresh)["status"] == "running"
+
+
+def test_create_queue_specs(tmp_path):
+    assert isinstance(create_queue(f"sqlite:///{tmp_path / 'jobs.db'}"), SQLiteJobQueue)
+    assert type(create_queue("src.jobs:JobQueue")) is JobQueue  # any importable factory
+    with pytest.raises(ValueError):
+        create_queue("redis")
+
+
+def test_workers_drain_queue():
+    queue = SQLiteJobQueue(":memory:")
+
+    async def scenario():
+        workers = JobWorkers(queue, FakeAgent(), workers=2, poll_interval=0.01)
+        workers.start()
+        ids = [queue.enqueue("alpha beta"), queue.enqueue("fail")]
+        workers.notify()
+        for _ in range(200):
+            if all(queue.get(i)["status"] in ("done", "error") for i in ids):
+                break
+            await asyncio.sleep(0.01)
+        await workers.stop()
+        return [queue.get(i) for i in ids]
+
+    ok, failed = asyncio.run(scenario())
+    assert ok["status"] == "done"
+    assert ok["partial"] == ["Issue created: alpha", "Issue created: beta"]
+    assert ok["timings"]["llm"] > 0
+    assert failed["status"] == "error"
+    assert failed["result"] == "Validation Error: bad command"
+
+
+@pytest.fixture
+def job_app(monkeypatch):
+    monkeypatch.setenv("COMMAND_JOBS", "true")
+    monkeypatch.setenv("JOB_QUEUE", ":memory:")
+    monkeypatch.setenv("JOB_POLL_INTERVAL", "0.01")
+    # The app's startup warms the agent up; keep it off real Jira and Ollama
+    monkeypatch.setenv("JIRA_BACKEND", "memory")
+    import src.web.app as web_app
+    importlib.reload(web_app)
+    monkeypatch.setattr(web_app.agent, "start_warmup", Mock())
+    web_app.job_workers.agent = FakeAgent()
+    yield web_app
+    monkeypatch.delenv("COMMAND_JOBS")
+    importlib.reload(web_app)
+
+
+def test_command_endpoint_returns_job_id(job_app):
+    from fastapi.testclient import TestClient
+    with TestClient(job_app.app) as client:
+        response = client.post("/command", data={"command": "alpha"})
+        assert response.status_code == 202
+        status_url = response.json()["status_url"]
+        for _ in range(200):
+            job = client.get(status_url).json()
+            if job["status"] == "done":
+                break
+            time.sleep(0.01)
+        assert job["result"] == "Issue created: alpha"
+        assert client.get("/jobs/missing").status_code == 404
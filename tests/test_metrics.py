@@ -0,0 +1,120 @@
+import asyncio
+import json
+import logging
+import pytest
+from unittest.mock import patch, Mock
+from src.metrics import (
+    BLOCKED_COMMANDS, JIRA_ERRORS, PARSE_FAILURES, STAGE_SECONDS, COMMAND_SECONDS,
+    Counter, Histogram, Registry
+)
+
+REPLY = {"message": {"content": '<answer>{"action": "create_issues", "issues": [{"project": "TEST", "summary": "Metrics task"}]}</answer>'}}
+LABELS = ("ollama", "deepseek-r1:14b")
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    monkeypatch.setenv("LLM_CACHE_SIZE", "0")
+    # Only the timing logger should write records here
+    monkeypatch.setenv("JIRA_FIELD_VALIDATION", "false")
+    with patch("src.main.JIRA") as mock_jira, patch("src.llm.ollama.Client") as mock_ollama:
+        project = Mock()
+        project.key = "TEST"
+        mock_jira.return_value.projects.return_value = [project]
+        mock_ollama.return_value.list.return_value = {"models": [{"model": "deepseek-r1:14b"}]}
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        agent.llm.chat = Mock(return_value=REPLY)
+        yield agent, mock_jira.return_value
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    counter = registry.register(Counter("demo_total", "Demo counter", ("kind",)))
+    histogram = registry.register(Histogram("demo_seconds", "Demo histogram", buckets=(0.1, 1.0)))
+    counter.inc(('a"b',))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    text = registry.render()
+    assert "# TYPE demo_total counter" in text
+    assert 'demo_total{kind="a\\"b"} 1' in text
+    assert 'demo_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{le="+Inf"} 2' in text
+    assert "demo_seconds_count 2" in text
+
+
+def test_stages_recorded_per_command(agent):
+    agent, jira = agent
+    before = {stage: STAGE_SECONDS.count((stage, *LABELS, "ok")) for stage in ("llm", "parse", "validate", "jira")}
+    commands = COMMAND_SECONDS.count((*LABELS, "ok"))
+    assert "Issue created" in agent.process_command("Create a metrics task in TEST")
+    for stage, count in before.items():
+        assert STAGE_SECONDS.count((stage, *LABELS, "ok")) == count + 1
+    assert COMMAND_SECONDS.count((*LABELS, "ok")) == commands + 1
+
+
+def test_error_counters(agent):
+    agent, jira = agent
+    blocked, parse, jira_errors = BLOCKED_COMMANDS.value(), PARSE_FAILURES.value(), JIRA_ERRORS.value()
+    errors = COMMAND_SECONDS.count((*LABELS, "error"))
+
+    agent.process_command("Drop the database")
+    agent.llm.chat.return_value = {"message": {"content": "no json here"}}
+    agent.process_command("Create a task in TEST")
+    agent.llm.chat.return_value = REPLY
+    jira.create_issue.side_effect = Exception("Jira unavailable")
+    agent.process_command("Create a task in TEST")
+
+    assert BLOCKED_COMMANDS.value() == blocked + 1
+    assert PARSE_FAILURES.value() == parse + 1
+    assert JIRA_ERRORS.value() == jira_errors + 1
+    assert COMMAND_SECONDS.count((*LABELS, "error")) == errors + 2
+
+
+def test_blocked_commands_are_timed_on_every_path(agent):
+    agent, _ = agent
+    blocked = COMMAND_SECONDS.count((*LABELS, "blocked"))
+
+    async def stream():
+        return [event async for event in agent.astream_command("Drop the database")]
+
+    _, timer = agent.process_command_with_timings("Drop the database")
+    asyncio.run(agent.aprocess_command("Drop the database"))
+    asyncio.run(stream())
+    assert timer.outcome == "blocked"
+    assert COMMAND_SECONDS.count((*LABELS, "blocked")) == blocked + 3
+
+
+@pytest.mark.parametrize("stream_pipeline", [False, True])
+def test_malformed_issue_counts_one_parse_failure(agent, stream_pipeline):
+    agent, _ = agent
+    agent.stream_pipeline = stream_pipeline
+    content = '{"action": "create_issues", "issues": [{"project": "TEST", "summary": "Broken",}]}'
+    agent.llm.chat.return_value = {"message": {"content": content}}
+    agent.llm.stream = Mock(return_value=iter([content[:30], content[30:]]))
+    parse = PARSE_FAILURES.value()
+    assert "Invalid JSON structure" in agent.process_command("Create a task in TEST")
+    assert PARSE_FAILURES.value() == parse + 1
+
+
+def test_timing_lines_are_opt_in(agent, caplog):
+    agent, _ = agent
+    with caplog.at_level(logging.INFO, logger="src.metrics.timings"):
+        agent.process_command("Create a metrics task in TEST")
+        assert not caplog.records
+        agent.log_timings = True
+        agent.process_command("Create a metrics task in TEST")
+    line = json.loads(caplog.records[-1].getMessage())
+    assert line["outcome"] == "ok"
+    assert set(line["stages_ms"]) == {"llm", "parse", "validate", "jira"}
+
+
+def test_metrics_endpoint():
+    from fastapi.testclient import TestClient
+    from src.web.app import app
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "jira_agent_stage_seconds" in response.text
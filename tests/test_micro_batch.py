@@ -0,0 +1,175 @@
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import patch, Mock
+import pytest
+from src.micro_batch import BATCH_SYSTEM_PROMPT, CommandBatcher
+
+
+def single(messages):
+    return {"message": {"content": json.dumps({
+        "action": "create_issues",
+        "issues": [{"project": "TEST", "summary": f"Alone: {messages[-1]['content']}"}]
+    })}}
+
+
+class FakeLLM:
+    """Answers batched prompts with one issue per command id, except ids in `skip`"""
+
+    def __init__(self, skip=()):
+        self.calls = []
+        self.max_tokens = []
+        self.skip = set(skip)
+        self._lock = threading.Lock()
+
+    def chat(self, messages, max_tokens=None):
+        with self._lock:
+            self.calls.append(messages)
+            self.max_tokens.append(max_tokens)
+        if messages[0]["content"] != BATCH_SYSTEM_PROMPT:
+            return single(messages)
+        commands = json.loads(messages[-1]["content"])
+        issues = [{"id": c["id"], "project": "TEST", "summary": f"Batched: {c['command']}"}
+                  for c in commands if c["id"] not in self.skip]
+        return {"message": {"content": f"<think>...</think><answer>{json.dumps({'action': 'create_issues', 'issues': issues})}</answer>"}}
+
+
+def build_messages(command):
+    return [{"role": "system", "content": "single"}, {"role": "user", "content": command}]
+
+
+def submit_all(batcher, commands, domains=None):
+    """Queue every command before the batcher looks at any, like a burst of callers"""
+    with batcher._cond:
+        futures = [batcher._enqueue(c, domains[i] if domains else None) for i, c in enumerate(commands)]
+    return [json.loads(future.result(5)["message"]["content"]) for future in futures]
+
+
+def test_concurrent_commands_share_one_call():
+    llm = FakeLLM()
+    batcher = CommandBatcher(llm.chat, build_messages, window=0.2, max_size=4)
+    results = submit_all(batcher, ["one", "two", "three", "four"])
+    assert len(llm.calls) == 1
+    assert [r["issues"] for r in results] == [
+        [{"project": "TEST", "summary": f"Batched: {c}"}] for c in ("one", "two", "three", "four")
+    ]
+    assert batcher.stats()["batches"] == 1
+
+
+def test_size_cap_splits_batches():
+    llm = FakeLLM()
+    batcher = CommandBatcher(llm.chat, build_messages, window=0.2, max_size=2)
+    submit_all(batcher, ["a", "b", "c", "d"])
+    assert len(llm.calls) == 2
+    assert all(len(json.loads(call[-1]["content"])) == 2 for call in llm.calls)
+
+
+def test_only_commands_of_one_domain_share_a_request():
+    llm = FakeLLM()
+    batcher = CommandBatcher(llm.chat, build_messages, window=0.2, max_size=4)
+    results = submit_all(batcher, ["a1", "b1", "a2", "b2"], domains=["alice", "bob", "alice", "bob"])
+    assert len(llm.calls) == 2
+    assert sorted(sorted(c["command"] for c in json.loads(call[-1]["content"])) for call in llm.calls) == [
+        ["a1", "a2"], ["b1", "b2"]
+    ]
+    assert [r["issues"][0]["summary"] for r in results] == ["Batched: a1", "Batched: b1", "Batched: a2", "Batched: b2"]
+
+
+def test_batched_request_scales_max_tokens():
+    llm = FakeLLM()
+    batcher = CommandBatcher(llm.chat, build_messages, window=0.2, max_size=3, max_tokens=500)
+    submit_all(batcher, ["a", "b", "c"])
+    batcher.submit("alone")
+    assert llm.max_tokens == [1500, None]
+
+
+def test_lone_command_is_sent_without_waiting():
+    llm = FakeLLM()
+    batcher = CommandBatcher(llm.chat, build_messages, window=5)
+    start = time.monotonic()
+    batcher.submit("solo")
+    assert time.monotonic() - start < 1
+    assert batcher.stats()["batches"] == 1
+
+
+def test_commands_behind_one_in_flight_wait_for_the_window():
+    """While a command of the session is being answered, later ones are batched"""
+    llm = FakeLLM()
+    started, release = threading.Event(), threading.Event()
+
+    def chat(messages, max_tokens=None):
+        if messages[-1]["content"] == "first":
+            started.set()
+            release.wait(5)
+        return llm.chat(messages, max_tokens)
+
+    batcher = CommandBatcher(chat, build_messages, window=0.2, max_size=3)
+    first = batcher._enqueue("first", "alice")
+    assert started.wait(5)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.asubmit(c, domain="alice") for c in ("x", "y")))
+
+    results = asyncio.run(scenario())
+    release.set()
+    first.result(5)
+    assert [json.loads(r["message"]["content"])["issues"][0]["summary"] for r in results] == ["Batched: x", "Batched: y"]
+    assert len(llm.calls) == 2
+
+
+def test_lone_command_uses_normal_prompt():
+    llm = FakeLLM()
+    batcher = CommandBatcher(llm.chat, build_messages, window=0.01)
+    result = batcher.submit("solo")
+    assert llm.calls == [build_messages("solo")]
+    assert json.loads(result["message"]["content"])["issues"][0]["summary"] == "Alone: solo"
+
+
+def test_missing_results_fall_back_to_single_requests():
+    llm = FakeLLM(skip={"2"})
+    batcher = CommandBatcher(llm.chat, build_messages, window=0.2, max_size=2)
+    first, second = submit_all(batcher, ["kept", "dropped"])
+    assert first["issues"][0]["summary"] == "Batched: kept"
+    assert second["issues"][0]["summary"] == "Alone: dropped"
+    assert batcher.stats()["fallbacks"] == 1
+
+
+def test_failed_call_reaches_every_caller():
+    batcher = CommandBatcher(Mock(side_effect=ConnectionError("ollama down")), build_messages, window=0.01)
+    with pytest.raises(ConnectionError):
+        batcher.submit("anything")
+
+
+def test_agent_routes_batched_results(monkeypatch):
+    monkeypatch.setenv("LLM_BATCH_WINDOW", "0.2")
+    monkeypatch.setenv("LLM_BATCH_SIZE", "2")
+    monkeypatch.setenv("FAST_PATH_PARSER", "false")
+    monkeypatch.setenv("LLM_CACHE_SIZE", "0")
+    monkeypatch.setenv("LLM_CACHE_PATH", "")
+    with patch("src.main.JIRA") as mock_jira:
+        project = Mock()
+        project.key = "TEST"
+        mock_jira.return_value.projects.return_value = [project]
+        from src.main import JiraAgent
+        agent = JiraAgent(dry_run=True)
+        llm = FakeLLM()
+        agent.llm = Mock(chat=llm.chat, model_name="fake")
+        agent.llm.name = "ollama"
+        # As if another command of this caller were in flight, so neither is sent alone
+        agent.batcher._outstanding[None] = 1
+        results = [None, None]
+
+        def run(i, command):
+            results[i] = agent.process_command(command)
+
+        threads = [threading.Thread(target=run, args=(i, c)) for i, c in enumerate(["Fix login", "Fix logout"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+    assert len(llm.calls) == 1 and llm.max_tokens == [4096]
+    assert results == [
+        "Issue created: TEST - Batched: Fix login -> [DRY RUN] Would create issue: TEST-???",
+        "Issue created: TEST - Batched: Fix logout -> [DRY RUN] Would create issue: TEST-???",
+    ]
@@ -0,0 +1,116 @@
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+from src.llm import GenerationOptions, OllamaProvider
+from src.metrics import LLM_PHASE_SECONDS, LLM_TOKENS
+
+MODELS = {"models": [{"model": "deepseek-r1:14b"}]}
+
+
+def reply(content, load=0.01, prompt_eval=0.2, evaluation=1.5):
+    return {
+        "message": {"role": "assistant", "content": content},
+        "done": True,
+        "load_duration": int(load * 1e9),
+        "prompt_eval_duration": int(prompt_eval * 1e9),
+        "eval_duration": int(evaluation * 1e9),
+        "prompt_eval_count": 40,
+        "eval_count": 12,
+    }
+
+
+def test_requests_send_keep_alive(monkeypatch):
+    monkeypatch.setenv("OLLAMA_KEEP_ALIVE", "1h")
+    with patch("src.llm.ollama.Client") as mock_ollama:
+        mock_ollama.return_value.list.return_value = MODELS
+        mock_ollama.return_value.chat.return_value = reply("hi")
+        provider = OllamaProvider("deepseek-r1:14b")
+        provider.chat([{"role": "user", "content": "hello"}])
+        assert mock_ollama.return_value.chat.call_args.kwargs["keep_alive"] == "1h"
+
+
+def test_warmup_loads_model_with_one_token():
+    with patch("src.llm.ollama.Client") as mock_ollama:
+        mock_ollama.return_value.list.return_value = MODELS
+        mock_ollama.return_value.chat.return_value = reply("o", load=4.0)
+        provider = OllamaProvider("deepseek-r1:14b")
+        provider.warmup()
+        assert mock_ollama.return_value.chat.call_args.kwargs["options"] == {"num_predict": 1}
+        assert provider.stats()["cold_starts"] == 1
+
+
+def test_stats_separate_cold_and_warm_requests():
+    with patch("src.llm.ollama.Client") as mock_ollama:
+        mock_ollama.return_value.list.return_value = MODELS
+        mock_ollama.return_value.chat.side_effect = [reply("a", load=3.0), reply("b")]
+        provider = OllamaProvider("deepseek-r1:14b")
+        before = LLM_PHASE_SECONDS.count(("load", "deepseek-r1:14b"))
+        provider.chat([])
+        assert provider.stats()["last"]["cold"] is True
+        provider.chat([])
+        stats = provider.stats()
+        assert stats["last"] == {
+            "load_seconds": 0.01, "prompt_eval_seconds": 0.2, "eval_seconds": 1.5,
+            "prompt_tokens": 40, "eval_tokens": 12, "cold": False,
+        }
+        assert stats["requests"] == 2 and stats["cold_starts"] == 1
+        assert abs(stats["eval_seconds"] - 3.0) < 1e-9
+        assert LLM_PHASE_SECONDS.count(("load", "deepseek-r1:14b")) == before + 2
+
+
+def test_stream_records_final_chunk():
+    async def chunks():
+        yield {"message": {"content": "par"}, "done": False}
+        yield {**reply("t"), "message": {"content": "t"}}
+
+    with patch("src.llm.ollama.Client") as mock_ollama, patch("src.llm.ollama.AsyncClient") as mock_async:
+        mock_ollama.return_value.list.return_value = MODELS
+        mock_async.return_value.chat = AsyncMock(return_value=chunks())
+        provider = OllamaProvider("deepseek-r1:14b")
+
+        async def collect():
+            return [text async for text in provider.astream([])]
+
+        assert asyncio.run(collect()) == ["par", "t"]
+        assert provider.stats()["requests"] == 1
+
+
+def test_agent_warmup_preloads_model(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    with patch("src.main.JIRA"), patch("src.llm.ollama.Client") as mock_ollama:
+        mock_ollama.return_value.list.return_value = MODELS
+        mock_ollama.return_value.chat.side_effect = Exception("out of memory")
+        from src.main import JiraAgent
+        readiness = JiraAgent().warmup()
+        mock_ollama.return_value.chat.assert_called_once()
+        # A failed preload still leaves the provider usable
+        assert readiness["llm"] == "ready"
+
+
+def test_requests_constrain_output(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_TOKENS", "512")
+    with patch("src.llm.ollama.Client") as mock_ollama:
+        mock_ollama.return_value.list.return_value = MODELS
+        mock_ollama.return_value.chat.return_value = reply("{}")
+        OllamaProvider("deepseek-r1:14b").chat([])
+        kwargs = mock_ollama.return_value.chat.call_args.kwargs
+        assert kwargs["format"]["properties"]["action"]["enum"] == ["create_issues"]
+        assert kwargs["options"] == {"stop": ["</answer>"], "num_predict": 512}
+
+
+def test_structured_output_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("LLM_STRUCTURED_OUTPUT", "off")
+    monkeypatch.setenv("LLM_MAX_TOKENS", "0")
+    assert GenerationOptions.from_env().ollama() == {"options": {"stop": ["</answer>"]}}
+    monkeypatch.setenv("LLM_STRUCTURED_OUTPUT", "yaml")
+    with pytest.raises(ValueError):
+        GenerationOptions.from_env()
+
+
+def test_token_counts_are_exported():
+    with patch("src.llm.ollama.Client") as mock_ollama:
+        mock_ollama.return_value.list.return_value = MODELS
+        mock_ollama.return_value.chat.return_value = reply("{}")
+        before = LLM_TOKENS.value(("ollama", "deepseek-r1:14b", "completion"))
+        OllamaProvider("deepseek-r1:14b").chat([])
+        assert LLM_TOKENS.value(("ollama", "deepseek-r1:14b", "completion")) == before + 12
@@ -1,6 +1,7 @@
 import os
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from src.llm import OpenAIProvider
 import json
 
@@ -42,3 +43,76 @@ def test_openai_no_api_key(monkeypatch):
     monkeypatch.delenv("OPENAI_API_KEY", raising=False)
     with pytest.raises(ValueError, match="OPENAI_API_KEY must be set for OpenAI API"):
         OpenAIProvider()
+
+def test_openai_achat_success(mock_llm_responses):
+    """Test async OpenAI chat goes through AsyncOpenAI and wraps the answer"""
+    with patch("src.llm.OpenAI"), patch("src.llm.AsyncOpenAI") as mock_async_class:
+        dummy_instance = MagicMock()
+        dummy_instance.chat.completions.create = AsyncMock(return_value=mock_llm_responses["openai"])
+        mock_async_class.return_value = dummy_instance
+
+        provider = OpenAIProvider()
+        result = asyncio.run(provider.achat([{"role": "user", "content": "Test command"}]))
+
+        dummy_instance.chat.completions.create.assert_awaited_once()
+        assert result['message']['content'].startswith("<answer>")
+
+def test_openai_keeps_callers_system_prompt():
+    """The agent's system prompt is not sent a second time, and the caller's list is untouched"""
+    with patch("src.llm.OpenAI") as mock_openai_class:
+        provider = OpenAIProvider()
+        messages = [{"role": "system", "content": "Agent prompt"}, {"role": "user", "content": "Test"}]
+        request = provider._request(messages)
+        assert [m["role"] for m in request["messages"]] == ["system", "user"]
+        assert len(messages) == 2
+        assert provider._request([{"role": "user", "content": "Test"}])["messages"][0]["role"] == "system"
+
+def test_openai_generation_controls(monkeypatch):
+    monkeypatch.setenv("LLM_MAX_TOKENS", "300")
+    with patch("src.llm.OpenAI"):
+        request = OpenAIProvider()._request([{"role": "user", "content": "Test"}])
+        assert request["max_tokens"] == 300
+        assert request["stop"] == ["</answer>"]
+        assert request["response_format"] == {"type": "json_object"}
+        assert OpenAIProvider()._request([], max_tokens=900)["max_tokens"] == 900
+    monkeypatch.setenv("OPENAI_STRUCTURED_OUTPUT", "schema")
+    with patch("src.llm.OpenAI"):
+        request = OpenAIProvider()._request([])
+        assert request["response_format"]["json_schema"]["schema"]["required"] == ["action", "issues"]
+
+@pytest.mark.parametrize("model, expected", [
+    ("gpt-4", None), ("gpt-4-0613", None), ("gpt-3.5-turbo-0613", None), ("o1-mini", None),
+    ("gpt-3.5-turbo", {"type": "json_object"}), ("gpt-4-turbo", {"type": "json_object"}),
+    ("gpt-4o-mini", {"type": "json_object"}),
+])
+def test_openai_default_output_mode_follows_model(monkeypatch, model, expected):
+    """Models without JSON mode reject response_format with a 400, so they get none"""
+    monkeypatch.setenv("OPENAI_MODEL", model)
+    monkeypatch.setenv("OLLAMA_STRUCTURED_OUTPUT", "schema")
+    with patch("src.llm.OpenAI"):
+        assert OpenAIProvider()._request([]).get("response_format") == expected
+
+def test_openai_records_token_usage(mock_llm_responses):
+    with patch("src.llm.OpenAI") as mock_openai_class:
+        response = mock_llm_responses["openai"]
+        response.usage = MagicMock(prompt_tokens=120, completion_tokens=30)
+        mock_openai_class.return_value.chat.completions.create.return_value = response
+        provider = OpenAIProvider()
+        provider.chat([{"role": "user", "content": "Test"}])
+        provider.chat([{"role": "user", "content": "Test"}])
+        assert provider.stats() == {
+            "requests": 2, "prompt_tokens": 240, "completion_tokens": 60,
+            "last": {"prompt_tokens": 120, "completion_tokens": 30},
+        }
+
+def test_openai_stream_requests_usage():
+    usage_chunk = MagicMock(choices=[], usage=MagicMock(prompt_tokens=50, completion_tokens=8))
+    text_chunk = MagicMock(usage=None)
+    text_chunk.choices[0].delta.content = '{"action": "create_issues"}'
+    with patch("src.llm.OpenAI") as mock_openai_class:
+        create = mock_openai_class.return_value.chat.completions.create
+        create.return_value = iter([text_chunk, usage_chunk])
+        provider = OpenAIProvider()
+        assert "".join(provider.stream([])) == '<answer>{"action": "create_issues"}</answer>'
+        assert create.call_args.kwargs["stream_options"] == {"include_usage": True}
+        assert provider.stats()["completion_tokens"] == 8
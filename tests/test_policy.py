@@ -0,0 +1,149 @@
+import json
+import os
+import time
+import pytest
+from unittest.mock import patch, Mock
+from src.policy import Policy, PolicyEngine, PolicyViolation, compile_pattern
+
+ACTION = {"action": "create_issue", "project": "TEST", "summary": "Rotate the API keys"}
+
+
+def test_keywords_match_whole_words():
+    policy = Policy()
+    assert policy.match("Delete all projects") == "keyword 'delete*'"
+    assert policy.match("Reset the admin PASSWORD") == "keyword 'admin'"
+    assert policy.match("Drop the staging index") == "keyword 'drop'"
+    assert policy.match("Fix the passwordless login") == "keyword 'password*'"
+    assert policy.match("Tokenize the search input") is None
+    assert policy.match("Administrative review of the dropdown") is None
+
+
+def test_phrases_and_patterns():
+    policy = Policy(keywords=["drop table", "truncate"], patterns=[r"\brm\s+-rf\b"])
+    assert policy.match("please DROP   TABLE users") == "keyword 'drop table'"
+    assert policy.match("drop the table") is None
+    assert policy.match("cleanup: rm -rf /var/tmp") == "pattern '\\\\brm\\\\s+-rf\\\\b'"
+    assert policy.match("Document the rm command") is None
+
+
+@pytest.mark.parametrize("pattern", [
+    r"(a+)+$", r"(?:x|xy)*z", r"(\w)\1", "[unclosed", r"\w+\s*=\s*\w+\s*;", r".*.*=x"
+])
+def test_risky_or_invalid_patterns_are_refused(pattern):
+    with pytest.raises(ValueError):
+        compile_pattern(pattern)
+
+
+def test_patterns_that_cannot_be_combined_are_refused():
+    with pytest.raises(ValueError, match="cannot be combined"):
+        Policy(patterns=["(?i)secret", "x"])
+
+
+def test_patterns_are_found_across_window_boundaries():
+    policy = Policy(keywords=(), patterns=[r"\brm\s+-rf\b"])
+    for offset in (1000, 1020, 1790):
+        assert policy.match("x" * offset + " rm  -rf /tmp " + "y" * 3000) is not None
+    assert policy.match("x " * 5000) is None
+
+
+@pytest.mark.parametrize("text", ["a" * 1019 + " dropdown menu", "a" * 1020 + "drop" + "s"],
+                         ids=["word-cut-by-edge", "suffix-past-edge"])
+def test_window_edges_are_not_word_boundaries(text):
+    """A word cut by a window edge does not match \\b or $ at the cut"""
+    assert Policy(keywords=(), patterns=[r"\bdrop\b", r"drop$"]).match(text) is None
+
+
+def test_patterns_still_match_at_the_end_of_the_text():
+    assert Policy(keywords=(), patterns=[r"\bdrop$"]).match("a" * 1019 + " drop") is not None
+
+
+def test_backtracking_pattern_stays_bounded_on_hostile_input():
+    policy = Policy(keywords=(), patterns=[r"[a-z]+;"])
+    # Searched whole, this takes tens of seconds; windows keep it linear
+    assert _timed(policy.match, "a" * 32768) < 3
+    assert policy.match("a" * 5000 + ";") == "pattern '[a-z]+;'"
+
+
+def test_actions_are_checked_for_projects_and_content():
+    engine = PolicyEngine(Policy(), deny_projects=["PROD", "LIVE"])
+    engine.check_actions([ACTION, dict(ACTION, labels=["security"])])
+    with pytest.raises(PolicyViolation, match="targets protected project PROD"):
+        engine.check_actions([ACTION, dict(ACTION, project="PROD")])
+    with pytest.raises(PolicyViolation, match="contains restricted content") as error:
+        engine.check_actions([dict(ACTION, description="Then drop the old database")])
+    assert error.value.rule == "keyword 'drop'"
+
+    allow_only = PolicyEngine(Policy(allow_projects=["TEST"]))
+    with pytest.raises(PolicyViolation, match="not in the allowed list"):
+        allow_only.check_actions([dict(ACTION, project="OPS")])
+
+
+def test_policy_file_is_hot_reloaded(tmp_path):
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps({"keywords": ["shutdown"]}))
+    engine = PolicyEngine(path=str(path), reload_interval=0)
+    engine.check_command("Delete the old branch")
+    with pytest.raises(PolicyViolation):
+        engine.check_command("Schedule a shutdown")
+
+    path.write_text(json.dumps({"keywords": ["reboot"], "deny_projects": ["PROD"]}))
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    engine.check_command("Schedule a shutdown")
+    with pytest.raises(PolicyViolation):
+        engine.check_command("Reboot the build hosts")
+
+    # A broken edit keeps the last good policy in force
+    path.write_text('{"patterns": ["(a+)+"]}')
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 2 * 10**9))
+    with pytest.raises(PolicyViolation):
+        engine.check_command("Reboot the build hosts")
+    assert engine.stats()["reloads"] == 1 and engine.stats()["reload_errors"] == 1
+
+    path.write_text(json.dumps({"patterns": ["(?i)secret", "x"]}))
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 3 * 10**9))
+    engine.check_command("Schedule a shutdown")
+    engine.check_command("Schedule a shutdown")
+    assert engine.stats()["reload_errors"] == 2
+
+
+def test_large_input_scales_linearly():
+    policy = Policy(keywords=[f"forbidden{i}" for i in range(5000)], patterns=[r"\bsecret-[0-9a-f]{8}\b"])
+    small = "create a ticket for the flaky login test " * 25
+    large = small * 40
+
+    def best(text):
+        return min(_timed(policy.match, text) for _ in range(5))
+
+    assert policy.match(large) is None
+    # 40x the input should cost roughly 40x, not 1600x (quadratic)
+    assert best(large) < best(small) * 40 * 4
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def test_agent_blocks_actions_from_llm_reply(monkeypatch):
+    monkeypatch.setenv("SAFETY_DENY_PROJECTS", "PROD,LIVE")
+    monkeypatch.setenv("FAST_PATH_PARSER", "false")
+    monkeypatch.setenv("LLM_CACHE_SIZE", "0")
+    monkeypatch.setenv("LLM_CACHE_PATH", "")
+    with patch("src.main.JIRA") as mock_jira:
+        projects = [Mock(), Mock()]
+        projects[0].key, projects[1].key = "TEST", "PROD"
+        jira = mock_jira.return_value
+        jira.projects.return_value = projects
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        agent.llm = Mock(model_name="fake")
+        agent.llm.name = "ollama"
+        agent.llm.chat.return_value = {"message": {"content": json.dumps({"action": "create_issues", "issues": [
+            {"project": "TEST", "summary": "Update the runbook"},
+            {"project": "PROD", "summary": "Update the runbook too"},
+        ]})}}
+        result, timer = agent.process_command_with_timings("Update the runbooks everywhere")
+    assert result == "Blocked: Issue 'Update the runbook too' targets protected project PROD"
+    assert timer.outcome == "blocked"
+    jira.create_issue.assert_not_called()
@@ -0,0 +1,66 @@
+import threading
+import time
+from unittest.mock import Mock
+from src.projects import ProjectCache
+
+
+def make_project(key):
+    project = Mock()
+    project.key = key
+    return project
+
+
+def test_lookup_served_from_cache():
+    """Repeated lookups hit the cache instead of Jira"""
+    fetch = Mock(return_value=[make_project("TEST"), make_project("OPS")])
+    cache = ProjectCache(fetch, ttl=60)
+    cache.refresh()
+    for _ in range(20):
+        assert "TEST" in cache
+    assert fetch.call_count == 1
+    assert cache.stats()["hits"] == 20
+
+
+def test_unknown_project_refreshes_once():
+    """A miss refetches the index, then reports the project as missing"""
+    fetch = Mock(return_value=[make_project("TEST")])
+    cache = ProjectCache(fetch, ttl=60)
+    cache.refresh()
+    assert cache.get("NOPE") is None
+    assert fetch.call_count == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_concurrent_misses_single_flight():
+    """Concurrent misses share one refresh"""
+    def slow_fetch():
+        time.sleep(0.05)
+        return [make_project("NEW")]
+    fetch = Mock(side_effect=slow_fetch)
+    cache = ProjectCache(fetch, ttl=60)
+    threads = [threading.Thread(target=cache.get, args=("NEW",)) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert fetch.call_count == 1
+
+
+def test_invalidate_forces_refetch():
+    """Invalidating the index makes the next lookup hit Jira"""
+    fetch = Mock(return_value=[make_project("TEST")])
+    cache = ProjectCache(fetch, ttl=60)
+    cache.refresh()
+    cache.invalidate()
+    assert "TEST" in cache
+    assert fetch.call_count == 2
+
+
+def test_stale_entry_refreshed_in_background():
+    """Stale hits are served immediately and refreshed off the caller's thread"""
+    fetch = Mock(return_value=[make_project("TEST")])
+    cache = ProjectCache(fetch, ttl=0)
+    cache.refresh()
+    assert "TEST" in cache
+    cache._background.join(timeout=1)
+    assert fetch.call_count == 2
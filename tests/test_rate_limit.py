@@ -0,0 +1,160 @@
+import pytest
+from unittest.mock import patch, Mock
+from jira.exceptions import JIRAError
+from src.rate_limit import RateLimitedError, SQLiteTokenBucket, TokenBucket, WriteScheduler, retry_after
+
+
+def jira_error(status, headers=None):
+    response = Mock()
+    response.headers = headers or {}
+    return JIRAError("failed", status_code=status, response=response)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    fake = FakeClock()
+    with patch("src.rate_limit.time.sleep", side_effect=fake.sleep):
+        yield fake
+
+
+def bucket(clock, rate=0, **kwargs):
+    limiter = TokenBucket(rate, **kwargs)
+    limiter.clock = clock
+    limiter._state["updated"] = clock()
+    return limiter
+
+
+def test_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=10, burst=2)
+    now = bucket._state["updated"]
+    assert bucket._take(bucket._state, now) == 0
+    assert bucket._take(bucket._state, now) == 0
+    assert bucket._take(bucket._state, now) == pytest.approx(0.1)
+    assert bucket._take(bucket._state, now + 0.11) == 0
+
+
+def test_bucket_backs_off_and_recovers():
+    bucket = TokenBucket(rate=10, decrease=0.5, increase=0.1)
+    bucket.pause(0)
+    assert bucket.rate == 5
+    for _ in range(10):
+        bucket.succeeded()
+    assert bucket.rate == 10
+
+
+def test_retry_after_header_is_honoured(clock):
+    fn = Mock(side_effect=[jira_error(429, {"Retry-After": "7"}), "ok"])
+    scheduler = WriteScheduler(bucket(clock))
+    assert scheduler.call(fn) == "ok"
+    assert clock.sleeps == [7]
+    assert scheduler.stats()["throttled"] == 1
+
+
+def test_transient_errors_back_off_with_jitter(clock):
+    fn = Mock(side_effect=[jira_error(503), jira_error(503), "ok"])
+    scheduler = WriteScheduler(bucket(clock), base_delay=1.0)
+    assert scheduler.call(fn) == "ok"
+    assert 0 <= clock.sleeps[0] <= 1.0 and 0 <= clock.sleeps[1] <= 2.0
+
+
+@pytest.mark.parametrize("status", [502, 504])
+def test_gateway_errors_are_not_retried(clock, status):
+    """The write may have been applied behind the gateway; resending could duplicate it"""
+    fn = Mock(side_effect=jira_error(status))
+    with pytest.raises(JIRAError):
+        WriteScheduler(bucket(clock)).call(fn)
+    assert fn.call_count == 1
+
+
+def test_client_errors_are_not_retried(clock):
+    fn = Mock(side_effect=jira_error(400))
+    with pytest.raises(JIRAError):
+        WriteScheduler(bucket(clock)).call(fn)
+    assert fn.call_count == 1
+    assert not clock.sleeps
+
+
+def test_persistent_throttling_raises_rate_limited(clock):
+    fn = Mock(side_effect=jira_error(429, {"Retry-After": "3"}))
+    with pytest.raises(RateLimitedError) as excinfo:
+        WriteScheduler(bucket(clock), max_retries=2).call(fn)
+    assert fn.call_count == 3
+    assert excinfo.value.retry_after == 3
+
+
+def test_retry_after_parses_http_dates():
+    assert retry_after(jira_error(429, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0
+    assert retry_after(jira_error(429), default=1.5) == 1.5
+
+
+def test_sqlite_bucket_is_shared(tmp_path):
+    path = str(tmp_path / "limits.db")
+    first = SQLiteTokenBucket(path, rate=1, burst=1)
+    second = SQLiteTokenBucket(path, rate=1, burst=1)
+    assert first._transact(first._take) == 0
+    # The other "process" sees the token already spent
+    assert second._transact(second._take) > 0
+    first.pause(60)
+    assert second._transact(second._take) > 50
+
+
+def test_map_keeps_order_with_concurrency():
+    scheduler = WriteScheduler(TokenBucket(0), max_concurrency=4)
+    try:
+        assert scheduler.map(lambda x: x * 2, list(range(20))) == [x * 2 for x in range(20)]
+    finally:
+        scheduler.shutdown()
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_map_returns_every_failure_alongside_the_results(concurrency):
+    def write(x):
+        if x % 3 == 0:
+            raise ValueError(f"bad {x}")
+        return x
+
+    scheduler = WriteScheduler(TokenBucket(0), max_concurrency=concurrency)
+    try:
+        results = scheduler.map(write, list(range(7)))
+    finally:
+        scheduler.shutdown()
+    assert [str(r) for r in results if isinstance(r, ValueError)] == ["bad 0", "bad 3", "bad 6"]
+    assert [r for r in results if not isinstance(r, Exception)] == [1, 2, 4, 5]
+
+
+def test_paced_writes_settle_at_the_configured_rate(clock):
+    scheduler = WriteScheduler(bucket(clock, rate=5, burst=1))
+    for _ in range(11):
+        scheduler.call(lambda: None)
+    assert clock.now - 1000.0 == pytest.approx(2.0)
+
+
+def test_agent_reports_rate_limit(monkeypatch, clock):
+    monkeypatch.setenv("JIRA_WRITE_RETRIES", "1")
+    with patch("src.main.JIRA") as mock_jira:
+        project = Mock()
+        project.key = "TEST"
+        mock_jira.return_value.projects.return_value = [project]
+        mock_jira.return_value.create_issue.side_effect = jira_error(429, {"Retry-After": "2"})
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        agent.writes.limiter.clock = clock
+        agent.llm = Mock(name="llm", model_name="test-model")
+        agent.llm.name = "test"
+        agent.llm.chat.return_value = {"message": {"content": '{"action": "create_issues", "issues": [{"project": "TEST", "summary": "Throttled task"}]}'}}
+        result = agent.process_command("Create a task in TEST")
+    assert result.startswith("Rate Limited:")
+    assert mock_jira.return_value.create_issue.call_count == 2
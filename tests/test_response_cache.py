@@ -0,0 +1,105 @@
+import sqlite3
+import time
+from unittest.mock import patch, Mock
+from src.response_cache import ResponseCache
+
+GOOD_RESPONSE = {"message": {"content": """<answer>{"action": "create_issues", "issues": [{"project": "TEST", "summary": "Rotate certs"}]}</answer>"""}}
+BAD_RESPONSE = {"message": {"content": "<think>no answer</think>"}}
+
+
+def make_agent(mock_jira, mock_ollama):
+    mock_project = Mock()
+    mock_project.key = "TEST"
+    mock_jira.return_value.projects.return_value = [mock_project]
+    mock_ollama.return_value.list.return_value = {"models": [{"model": "deepseek-r1:14b"}]}
+    from src.main import JiraAgent
+    return JiraAgent(dry_run=True)
+
+
+def test_key_normalizes_command():
+    """Case and whitespace differences map to the same key"""
+    a = ResponseCache.make_key("Create a task  in OPS", "ollama", "deepseek-r1:14b", "prompt")
+    b = ResponseCache.make_key(" create a TASK in ops ", "ollama", "deepseek-r1:14b", "prompt")
+    assert a == b
+    assert a != ResponseCache.make_key("create a task in ops", "openai", "gpt-4", "prompt")
+    assert a != ResponseCache.make_key("create a task in ops", "ollama", "deepseek-r1:14b", "other prompt")
+
+
+def test_lru_eviction_and_ttl():
+    """The memory tier is bounded by size and expires entries"""
+    cache = ResponseCache(max_size=2, ttl=60)
+    cache.put("a", GOOD_RESPONSE)
+    cache.put("b", GOOD_RESPONSE)
+    cache.get("a")
+    cache.put("c", GOOD_RESPONSE)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    expired = ResponseCache(max_size=2, ttl=0)
+    expired.put("a", GOOD_RESPONSE)
+    assert expired.get("a") is None
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    """Entries written to disk are visible to a fresh cache instance"""
+    path = str(tmp_path / "llm_cache.db")
+    ResponseCache(path=path).put("key", GOOD_RESPONSE)
+    cache = ResponseCache(path=path)
+    assert cache.get("key") == GOOD_RESPONSE
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_expired_rows_are_deleted(tmp_path, monkeypatch):
+    path = str(tmp_path / "llm_cache.db")
+    cache = ResponseCache(ttl=60, path=path)
+    cache.put("read", GOOD_RESPONSE)
+    cache.put("unread", GOOD_RESPONSE)
+    later = time.time() + 120
+    monkeypatch.setattr("src.response_cache.time.time", lambda: later)
+    assert ResponseCache(ttl=60, path=path).get("read") is None
+    assert rows(path) == ["unread"]
+    cache.put("fresh", GOOD_RESPONSE)
+    assert rows(path) == ["fresh"]
+
+
+def test_locked_database_does_not_fail_the_command(tmp_path, caplog):
+    path = str(tmp_path / "llm_cache.db")
+    cache = ResponseCache(path=path, timeout=0.05)
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN EXCLUSIVE")
+    try:
+        cache.put("key", GOOD_RESPONSE)
+        assert cache.get("other") is None
+    finally:
+        writer.execute("ROLLBACK")
+    assert "database is locked" in caplog.text
+    # Still served from memory
+    assert cache.get("key") == GOOD_RESPONSE
+
+
+def rows(path):
+    return [key for (key,) in sqlite3.connect(path).execute("SELECT key FROM llm_responses ORDER BY key")]
+
+
+def test_repeated_command_skips_llm(monkeypatch):
+    """A near-identical command is answered from the cache"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    with patch("src.main.JIRA") as mock_jira, patch("src.llm.ollama.Client") as mock_ollama:
+        agent = make_agent(mock_jira, mock_ollama)
+        mock_ollama.return_value.chat.return_value = GOOD_RESPONSE
+        first = agent.process_command("create a task in TEST to rotate certs")
+        second = agent.process_command("Create a task in TEST  to rotate certs")
+        assert first == second
+        assert mock_ollama.return_value.chat.call_count == 1
+        assert agent.response_cache.stats()["hit_rate"] == 0.5
+
+
+def test_invalid_reply_not_cached(monkeypatch):
+    """Replies that fail to parse are never served from the cache"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    with patch("src.main.JIRA") as mock_jira, patch("src.llm.ollama.Client") as mock_ollama:
+        agent = make_agent(mock_jira, mock_ollama)
+        mock_ollama.return_value.chat.return_value = BAD_RESPONSE
+        agent.process_command("create something")
+        agent.process_command("create something")
+        assert mock_ollama.return_value.chat.call_count == 2
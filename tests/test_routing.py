@@ -0,0 +1,123 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from unittest.mock import patch
+from src.llm import BaseLLMProvider
+from src.routing import RoutingProvider
+
+
+class StubProvider(BaseLLMProvider):
+    def __init__(self, name, delay=0.0, error=None):
+        self.name = name
+        self.model_name = f"{name}-model"
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    def reply(self):
+        return {"message": {"content": f"<answer>{self.name}</answer>"}}
+
+    def chat(self, messages):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.reply()
+
+    async def achat(self, messages):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return self.reply()
+
+
+def winner(response):
+    return response["message"]["content"][len("<answer>"):-len("</answer>")]
+
+
+def test_routes_to_fastest_backend():
+    slow, fast = StubProvider("slow", delay=0.05), StubProvider("fast", delay=0.0)
+    router = RoutingProvider([slow, fast])
+    router.chat([])
+    router.chat([])
+    # Both untried backends are sampled once, then the fast one takes over
+    assert [winner(router.chat([])) for _ in range(5)] == ["fast"] * 5
+    assert slow.calls == 1
+
+
+def test_fails_over_and_marks_backend_down():
+    broken, backup = StubProvider("broken", error=RuntimeError("down")), StubProvider("backup", delay=0.01)
+    router = RoutingProvider([broken, backup], failure_threshold=2)
+    assert [winner(router.chat([])) for _ in range(4)] == ["backup"] * 4
+    assert broken.calls == 2
+    assert not router.backends[0].healthy
+
+
+def test_all_backends_failing_raises_last_error():
+    router = RoutingProvider([StubProvider("a", error=RuntimeError("a")), StubProvider("b", error=RuntimeError("b"))])
+    with pytest.raises(RuntimeError):
+        router.chat([])
+
+
+def test_async_hedge_cancels_loser():
+    slow, fast = StubProvider("slow", delay=1.0), StubProvider("fast", delay=0.01)
+    router = RoutingProvider([slow, fast], hedge_delay=0.02, hedge_budget=1.0)
+
+    async def run():
+        start = time.perf_counter()
+        response = await router.achat([])
+        return response, time.perf_counter() - start
+
+    response, elapsed = asyncio.run(run())
+    assert winner(response) == "fast"
+    assert elapsed < 0.5
+    assert slow.cancelled == 1
+    assert router.hedges == 1
+
+
+def test_sync_hedge_returns_first_reply():
+    slow, fast = StubProvider("slow", delay=0.5), StubProvider("fast", delay=0.01)
+    router = RoutingProvider([slow, fast], hedge_delay=0.02, hedge_budget=1.0)
+    start = time.perf_counter()
+    assert winner(router.chat([])) == "fast"
+    assert time.perf_counter() - start < 0.3
+
+
+def test_hedged_requests_do_not_queue_behind_each_other():
+    """Concurrent callers are not limited by a shared pool, and no hedge is
+    sent because a request was waiting for a worker"""
+    first, second = StubProvider("a", delay=0.1), StubProvider("b", delay=0.1)
+    router = RoutingProvider([first, second], hedge_delay=0.15, hedge_budget=1.0)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(lambda _: router.chat([]), range(16)))
+    assert time.perf_counter() - start < 0.14
+    assert router.hedges == 0
+
+
+def test_hedge_budget_limits_extra_requests():
+    slow, other = StubProvider("slow", delay=0.03), StubProvider("other", delay=0.03)
+    router = RoutingProvider([slow, other], hedge_delay=0.0, hedge_budget=0.25)
+    for _ in range(8):
+        router.chat([])
+    assert router.hedges == 2
+    assert slow.calls + other.calls == 10
+
+
+def test_agent_builds_router_from_provider_list(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek,openai")
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "2.5")
+    with patch("src.llm.ollama.Client") as mock_ollama, patch("src.llm.OpenAI"):
+        mock_ollama.return_value.list.side_effect = Exception("Ollama down")
+        from src.main import JiraAgent
+        llm = JiraAgent().llm
+    assert isinstance(llm, RoutingProvider)
+    assert [b.provider.name for b in llm.backends] == ["openai"]
+    assert llm.hedge_delay == 2.5
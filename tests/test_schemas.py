@@ -0,0 +1,74 @@
+import pytest
+from src.schemas import (
+    ACTION_SCHEMA, action_validator, _is_valid_create_issue,
+    validate_action, validate_actions, action_errors
+)
+
+VALID = {"action": "create_issue", "project": "TEST", "summary": "Valid summary"}
+
+CASES = [
+    VALID,
+    dict(VALID, description="Some description"),
+    dict(VALID, labels=["extra", "fields"]),
+    dict(VALID, summary="x" * 5),
+    dict(VALID, summary="x" * 255),
+    dict(VALID, project="ABCDEFGHIJ"),
+    dict(VALID, description="d" * 2000),
+    dict(VALID, issuetype="Bug", priority="High", assignee="jdoe"),
+    dict(VALID, labels=["ops"], components=["Backend API"], fields={"Story Points": 3}),
+    dict(VALID, labels=["two words"]),
+    dict(VALID, labels="ops"),
+    dict(VALID, components=[""]),
+    dict(VALID, priority=""),
+    dict(VALID, assignee=7),
+    dict(VALID, fields=["customfield_10010"]),
+    dict(VALID, summary="x" * 4),
+    dict(VALID, summary="x" * 256),
+    dict(VALID, project="test"),
+    dict(VALID, project="T"),
+    dict(VALID, project="ABCDEFGHIJK"),
+    dict(VALID, project="TEST\n"),
+    dict(VALID, project=123),
+    dict(VALID, summary=None),
+    dict(VALID, description="d" * 2001),
+    dict(VALID, description=42),
+    dict(VALID, action="delete_issue"),
+    {"project": "TEST", "summary": "No action here"},
+    {"action": "create_issue", "summary": "No project"},
+    {"action": "create_issue", "project": "TEST"},
+    [],
+    "not an object",
+]
+
+
+@pytest.mark.parametrize("action", CASES)
+def test_fast_path_agrees_with_full_schema(action):
+    """The fast path never accepts anything the full schema rejects"""
+    full_valid = action_validator().is_valid(action)
+    if _is_valid_create_issue(action):
+        assert full_valid
+    if full_valid:
+        validate_action(action)
+    else:
+        with pytest.raises(ValueError, match="Validation failed"):
+            validate_action(action)
+
+
+def test_validator_is_compiled_once():
+    assert action_validator() is action_validator()
+    assert action_validator().schema is ACTION_SCHEMA
+
+
+def test_error_message_format():
+    with pytest.raises(ValueError, match="Validation failed for field 'summary'"):
+        validate_action(dict(VALID, summary="Bad"))
+
+
+def test_batch_reports_every_error():
+    """validate_actions gathers all failures in one pass"""
+    actions = [VALID, dict(VALID, summary="Bad"), VALID, dict(VALID, project="x")]
+    assert [index for index, _ in action_errors(actions)] == [1, 3]
+    with pytest.raises(ValueError) as exc:
+        validate_actions(actions)
+    assert "Issue 2:" in str(exc.value) and "Issue 4:" in str(exc.value)
+    validate_actions([VALID] * 3)
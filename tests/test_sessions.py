@@ -0,0 +1,127 @@
+import json
+from unittest.mock import patch, Mock
+import pytest
+from src.sessions import Conversation, SessionStore, created_issues, refers_back
+
+
+def created(key, project, summary):
+    return f"Issue created: {project} - {summary} -> Issue {key} created successfully"
+
+
+def test_created_issues_parses_result_lines():
+    result = "\n".join([
+        created("TEST-1", "TEST", "Deploy to prod -> staging"),
+        "Issue failed: TEST - Broken -> summary too long",
+        "Issue created: OPS - Dry task -> [DRY RUN] Would create issue: OPS-???",
+    ])
+    assert created_issues(result) == [
+        {"key": "TEST-1", "project": "TEST", "summary": "Deploy to prod -> staging"},
+        {"key": None, "project": "OPS", "summary": "Dry task"},
+    ]
+
+
+def test_history_replays_turns_in_reply_format():
+    conversation = Conversation()
+    conversation.record("Add a deploy task to TEST", created("TEST-1", "TEST", "Deploy to production"))
+    conversation.record("And one for OPS", "Validation Error: bad project")
+    user, reply, retry, error = conversation.history()
+    assert user == {"role": "user", "content": "Add a deploy task to TEST"}
+    assert json.loads(reply["content"])["issues"] == [{"key": "TEST-1", "project": "TEST", "summary": "Deploy to production"}]
+    assert error == {"role": "assistant", "content": "Validation Error: bad project"}
+
+
+def test_old_turns_collapse_into_summary():
+    conversation = Conversation(max_turns=2)
+    for number in range(1, 5):
+        conversation.record(f"command {number}", created(f"TEST-{number}", "TEST", f"Task number {number}"))
+    history = conversation.history()
+    summary = history[0]
+    assert summary["role"] == "system"
+    assert [i["key"] for i in json.loads(summary["content"].split(": ", 1)[1])] == ["TEST-1", "TEST-2"]
+    assert [m["content"] for m in history[1:] if m["role"] == "user"] == ["command 3", "command 4"]
+
+
+def test_token_budget_bounds_history():
+    conversation = Conversation(token_budget=100, max_turns=50, max_summary_issues=3)
+    for number in range(40):
+        conversation.record("x" * 100, created(f"TEST-{number}", "TEST", "A fairly long summary " * 3))
+    history = conversation.history()
+    assert sum(m["role"] == "user" for m in history) == 1
+    assert len(json.loads(history[0]["content"].split(": ", 1)[1])) == 3
+
+
+def test_store_evicts_least_recently_used():
+    store = SessionStore(max_sessions=2)
+    first = store.get("a")
+    store.get("b")
+    assert store.get("a") is first
+    store.get("c")
+    assert len(store) == 2 and store.evictions == 1
+    assert store.get("a") is first
+    assert store.get("b") is not None and store.evictions == 2
+
+
+def test_store_expires_idle_sessions(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.sessions.time.monotonic", lambda: now[0])
+    store = SessionStore(idle_ttl=60)
+    first = store.get("a")
+    first.record("command", "Error: nope")
+    now[0] += 61
+    assert store.get("a") is not first
+    assert store.get("a").history() == []
+    assert store.expirations == 1
+
+
+def test_agent_sends_session_history(monkeypatch):
+    monkeypatch.setenv("FAST_PATH_PARSER", "false")
+    monkeypatch.setenv("LLM_CACHE_SIZE", "0")
+    monkeypatch.setenv("LLM_CACHE_PATH", "")
+    with patch("src.main.JIRA") as mock_jira:
+        project = Mock()
+        project.key = "TEST"
+        jira = mock_jira.return_value
+        jira.projects.return_value = [project]
+        jira.create_issue.side_effect = [Mock(key="TEST-1"), Mock(key="TEST-2"), Mock(key="TEST-3")]
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        agent.llm = Mock(model_name="fake")
+        agent.llm.name = "ollama"
+        agent.llm.chat.return_value = {"message": {"content": json.dumps({
+            "action": "create_issues", "issues": [{"project": "TEST", "summary": "Deploy to production"}]
+        })}}
+        agent.process_command("Add a deploy task to TEST", session_id="s1")
+        agent.process_command("Also add one for staging", session_id="s1")
+        agent.process_command("Unrelated command", session_id="s2")
+        agent.process_command("Create a task in TEST for the release notes", session_id="s1")
+
+    first, follow_up, other, standalone = (call.args[0] for call in agent.llm.chat.call_args_list)
+    assert len(first) == 2 and len(other) == 2
+    assert [m["role"] for m in follow_up] == ["system", "user", "assistant", "user"]
+    assert "TEST-1" in follow_up[2]["content"]
+    # A command that does not refer back is sent alone, so it stays cacheable and batchable
+    assert len(standalone) == 2
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("Do the same for OPS", True),
+    ("Assign it to jdoe", True),
+    ("Also add one for staging", True),
+    ("Close the first one", True),
+    ("Create a task in TEST for the release notes", False),
+    ("Fix the login redirect in WEB", False),
+])
+def test_refers_back(command, expected):
+    assert refers_back(command) is expected
+
+
+def test_web_command_keeps_session_cookie():
+    from fastapi.testclient import TestClient
+    from src.web import app as web_app
+    with patch.object(web_app.agent, "process_command", return_value="ok") as process:
+        client = TestClient(web_app.app)
+        client.post("/command", data={"command": "first"})
+        session_id = client.cookies.get(web_app.SESSION_COOKIE)
+        client.post("/command", data={"command": "second"})
+    assert session_id
+    assert [call.args for call in process.call_args_list] == [("first", session_id), ("second", session_id)]
@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import patch, Mock
+
+
+def test_import_defers_client_libraries():
+    """Importing the agent does not load jira, openai, ollama or jsonschema"""
+    code = (
+        "import sys, src.main; "
+        "print([m for m in ('jira', 'openai', 'ollama', 'jsonschema') if m in sys.modules])"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root)
+    assert out.stdout.strip() == "[]"
+
+
+def test_construction_does_not_connect(monkeypatch):
+    """Creating an agent makes no Jira or Ollama calls"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    with patch("src.main.JIRA") as mock_jira, patch("src.llm.ollama.Client") as mock_ollama:
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        mock_jira.assert_not_called()
+        mock_ollama.assert_not_called()
+        assert agent.readiness() == {"ready": False, "jira": "pending", "llm": "pending"}
+        assert "Blocked" in agent.process_command("Delete all projects")
+        mock_jira.assert_not_called()
+
+
+def test_warmup_connects_concurrently(monkeypatch):
+    """Jira and the LLM are checked in parallel, not one after the other"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+
+    def slow_projects():
+        time.sleep(0.2)
+        project = Mock()
+        project.key = "TEST"
+        return [project]
+
+    def slow_list():
+        time.sleep(0.2)
+        return {"models": [{"model": "deepseek-r1:14b"}]}
+
+    with patch("src.main.JIRA") as mock_jira, patch("src.llm.ollama.Client") as mock_ollama:
+        mock_jira.return_value.projects.side_effect = slow_projects
+        mock_ollama.return_value.list.side_effect = slow_list
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        start = time.perf_counter()
+        readiness = agent.warmup()
+        assert time.perf_counter() - start < 0.35
+        assert readiness == {"ready": True, "jira": "ready", "llm": "ready"}
+        assert "TEST" in agent.projects
+
+
+def test_warmup_reports_failures(monkeypatch):
+    """A failed connectivity check is reported instead of raised"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    with patch("src.main.JIRA") as mock_jira, patch("src.llm.ollama.Client") as mock_ollama:
+        mock_jira.side_effect = Exception("connection refused")
+        mock_ollama.return_value.list.return_value = {"models": [{"model": "deepseek-r1:14b"}]}
+        from src.main import JiraAgent
+        readiness = JiraAgent().warmup()
+        assert readiness["ready"] is False
+        assert "connection refused" in readiness["jira"]
+        assert readiness["llm"] == "ready"
+
+
+def test_background_warmup_retries_until_ready(monkeypatch):
+    """A component that fails warmup is retried with backoff instead of staying failed"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    sleeps = []
+    monkeypatch.setattr("src.main.time.sleep", sleeps.append)
+    with patch("src.main.JIRA") as mock_jira, patch("src.llm.ollama.Client") as mock_ollama:
+        project = Mock()
+        project.key = "TEST"
+        mock_jira.return_value.projects.side_effect = [Exception("503"), Exception("503"), [project]]
+        mock_ollama.return_value.list.return_value = {"models": [{"model": "deepseek-r1:14b"}]}
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        agent._warmup_until_ready()
+        assert agent.readiness()["ready"] is True
+        assert sleeps == [1.0, 2.0]
+        assert mock_ollama.return_value.list.call_count == 1
+
+
+def test_project_refresh_clears_a_failed_warmup(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    with patch("src.main.JIRA") as mock_jira, patch("src.llm.ollama.Client"):
+        project = Mock()
+        project.key = "TEST"
+        mock_jira.return_value.projects.side_effect = [Exception("timed out"), [project]]
+        from src.main import JiraAgent
+        agent = JiraAgent()
+        agent.warmup(("jira",))
+        assert agent.status["jira"].startswith("error")
+        agent.projects.refresh()
+        assert agent.status["jira"] == "ready"
@@ -0,0 +1,90 @@
+import time
+import pytest
+from unittest.mock import patch, Mock
+from src.stream_parser import IssueStreamParser
+
+REPLY = (
+    '<think>Plan: {"issues": [{"project": "NOPE"}]} is just a draft</think>\n'
+    '<answer>{"action": "create_issues", "issues": ['
+    '{"project": "TEST", "summary": "Escaped \\"quote\\" and {braces}"},'
+    '{"project": "OPS", "summary": "Second issue", "labels": ["a", "b"]}'
+    ']}</answer>'
+)
+
+
+def feed_in_chunks(text, size):
+    parser = IssueStreamParser()
+    issues = []
+    for i in range(0, len(text), size):
+        issues.extend(parser.feed(text[i:i + size]))
+    issues.extend(parser.close())
+    return parser, issues
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64, len(REPLY)])
+def test_chunking_does_not_change_result(size):
+    """Any split of the stream yields the same issues and document"""
+    parser, issues = feed_in_chunks(REPLY, size)
+    assert [i["project"] for i in issues] == ["TEST", "OPS"]
+    assert issues[0]["summary"] == 'Escaped "quote" and {braces}'
+    assert parser.document["issues"] == issues
+    assert parser.action == "create_issues"
+
+
+def test_issue_emitted_when_its_brace_closes():
+    """An issue is returned before the rest of the reply has arrived"""
+    parser = IssueStreamParser()
+    assert parser.feed('{"action": "create_issues", "issues": [{"project": "TEST", ') == []
+    assert parser.feed('"summary": "First issue"}, {"proj') == [{"project": "TEST", "summary": "First issue"}]
+
+
+def test_issues_held_until_action_known():
+    """Issues before the top-level action are released once it is seen"""
+    parser = IssueStreamParser()
+    assert parser.feed('{"issues": [{"project": "TEST", "summary": "Held issue"}], ') == []
+    assert len(parser.feed('"action": "create_issues"}')) == 1
+
+
+def test_prose_braces_are_skipped():
+    """Brace-delimited prose before the reply object is ignored"""
+    parser, issues = feed_in_chunks('Sure {thing}! {"action": "create_issues", "issues": []}', 5)
+    assert parser.document == {"action": "create_issues", "issues": []}
+    assert parser.invalid
+
+
+def test_think_only_reply_has_no_document():
+    parser, issues = feed_in_chunks("<think>Missing tags</think>", 4)
+    assert parser.document is None and issues == []
+
+
+def test_sync_stream_pipeline_writes_before_generation_ends(monkeypatch):
+    """With LLM_STREAM_PIPELINE the first issue is created while tokens are still arriving"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    monkeypatch.setenv("LLM_STREAM_PIPELINE", "true")
+    order = []
+
+    def stream(**kwargs):
+        for i in range(0, len(REPLY), 8):
+            order.append("token")
+            time.sleep(0.005)
+            yield {"message": {"content": REPLY[i:i + 8]}}
+        order.append("end")
+
+    def create_issue(**kwargs):
+        order.append("create")
+        return Mock(key=f"{kwargs['project']}-1")
+
+    with patch("src.main.JIRA") as mock_jira, patch("src.llm.ollama.Client") as mock_ollama:
+        projects = [Mock(key="TEST"), Mock(key="OPS")]
+        for project, key in zip(projects, ["TEST", "OPS"]):
+            project.key = key
+        mock_jira.return_value.projects.return_value = projects
+        mock_jira.return_value.create_issue.side_effect = create_issue
+        mock_ollama.return_value.list.return_value = {"models": [{"model": "deepseek-r1:14b"}]}
+        mock_ollama.return_value.chat.side_effect = stream
+
+        from src.main import JiraAgent
+        result = JiraAgent().process_command("Create two issues")
+
+    assert "TEST-1" in result and "OPS-1" in result
+    assert order.index("create") < order.index("end")
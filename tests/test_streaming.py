@@ -0,0 +1,70 @@
+import asyncio
+from unittest.mock import patch, Mock, AsyncMock
+
+TOKENS = [
+    "<think>Creating issues</think><answer>",
+    '{"action": "create_issues", "issues": [',
+    '{"project": "TEST", "summary": "Streamed issue 1"},',
+    '{"project": "TEST", "summary": "Streamed issue 2"}',
+    "]}</answer>",
+]
+
+
+async def fake_stream():
+    for token in TOKENS:
+        yield {"message": {"content": token}}
+
+
+def collect(agent, command):
+    async def run():
+        return [event async for event in agent.astream_command(command)]
+    return asyncio.run(run())
+
+
+def make_agent(mock_jira, mock_ollama):
+    mock_project = Mock()
+    mock_project.key = "TEST"
+    mock_jira.return_value.projects.return_value = [mock_project]
+    mock_ollama.return_value.list.return_value = {"models": [{"model": "deepseek-r1:14b"}]}
+    from src.main import JiraAgent
+    return JiraAgent()
+
+
+def test_stream_emits_tokens_then_issue_progress(monkeypatch):
+    """Tokens are forwarded as produced, followed by per-issue events"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    with patch("src.main.JIRA") as mock_jira, \
+         patch("src.llm.ollama.Client") as mock_ollama, \
+         patch("src.llm.ollama.AsyncClient") as mock_async_ollama:
+        agent = make_agent(mock_jira, mock_ollama)
+        mock_async_ollama.return_value.chat = AsyncMock(return_value=fake_stream())
+        mock_jira.return_value.create_issue.side_effect = [Mock(key="TEST-1"), Mock(key="TEST-2")]
+
+        events = collect(agent, "Create two issues")
+        kinds = [kind for kind, _ in events]
+        issues = [data for kind, data in events if kind == "issue"]
+
+        assert [data for kind, data in events if kind == "token"] == TOKENS
+        assert kinds.count("validated") == 2
+        assert "TEST-1" in issues[0] and "TEST-2" in issues[1]
+        assert kinds[-1] == "done"
+        # The first issue is validated before the model has finished the reply
+        last_token = len(kinds) - 1 - kinds[::-1].index("token")
+        assert kinds.index("validated") < last_token
+        assert mock_async_ollama.return_value.chat.call_args.kwargs["stream"] is True
+
+
+def test_stream_reports_errors_as_events(monkeypatch):
+    """Blocked commands and bad replies end the stream with an error event"""
+    monkeypatch.setenv("LLM_PROVIDER", "deepseek")
+    with patch("src.main.JIRA") as mock_jira, \
+         patch("src.llm.ollama.Client") as mock_ollama, \
+         patch("src.llm.ollama.AsyncClient") as mock_async_ollama:
+        agent = make_agent(mock_jira, mock_ollama)
+        assert collect(agent, "Delete everything") == [("error", "Blocked: Command contains restricted keywords")]
+
+        async def bad_stream():
+            yield {"message": {"content": "<think>no answer</think>"}}
+        mock_async_ollama.return_value.chat = AsyncMock(return_value=bad_stream())
+        kind, message = collect(agent, "Create an issue")[-1]
+        assert kind == "error" and "Validation Error" in message